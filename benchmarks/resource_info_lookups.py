@@ -0,0 +1,41 @@
+"""Micro-benchmark for :data:`~stargate.resource_info.resource_info` lookups. Registers the
+example models with a few `Manager` instances and reports lookups per second for the keys
+used on every serialized row.
+
+Run from repository root::
+
+	DATABASE_URL=sqlite:// python -m benchmarks.resource_info_lookups
+
+"""
+import timeit
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from stargate import Manager
+from stargate.resource_info import resource_info
+from stargate.const import ResourceInfoConst
+from app.models import User, City, Location
+
+NUMBER = 100000
+MANAGERS = 5
+
+def setup():
+	app = Flask(__name__)
+	app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+	app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+	db = SQLAlchemy(app)
+	for i in range(MANAGERS):
+		manager = Manager(app, db, url_prefix = '/v{0}'.format(i))
+		for model in (User, City, Location):
+			manager.register_resource(model)
+	return app
+
+def main():
+	setup()
+	user = User()
+	for key in (ResourceInfoConst.PRIMARY_KEY, ResourceInfoConst.SERIALIZER, ResourceInfoConst.COLLECTION_NAME):
+		for label, target in (('model', User), ('instance', user)):
+			seconds = timeit.timeit(lambda: resource_info(key, target), number = NUMBER)
+			print("{0:<22} {1:<9} {2:>12,.0f} lookups/s".format(key, label, NUMBER / seconds))
+
+if __name__ == '__main__':
+	main()
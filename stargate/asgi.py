@@ -0,0 +1,139 @@
+"""ASGI entry point for stargate resources. :class:`ASGIApp` serves a :class:`~flask.Flask` app (and every resource
+registered with its :class:`~stargate.manager.Manager`) to an asyncio server such as uvicorn or hypercorn.
+
+Requests are accepted and their bodies read on event loop, each request is then handled by a worker thread of a
+bounded pool, sized after database connection pool, while event loop keeps accepting connections. Thousands of
+slow requests in flight cost a queued job each instead of a blocked server worker. Query string contract and
+behaviour of views is exactly that of WSGI app, as same views handle requests.
+
+Flask-SQLAlchemy sessions are scoped to app context of a request, which is pushed and removed by worker thread, so
+``Search`` and serialization run unchanged. Requires Python 3.7+.
+
+"""
+
+import io
+import sys
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from .const import AsyncConst
+
+class ASGIApp():
+    """ASGI 3 application wrapping a WSGI `app`.
+
+    :param app: :class:`~flask.Flask` instance (or any WSGI callable).
+    :param max_workers: number of requests handled concurrently. Should not exceed size of database
+                        connection pool, see :meth:`~stargate.manager.Manager.asgi_app`.
+
+    Example usage of this class:
+
+    .. code-block:: python
+
+        manager = Manager(app, db)
+        manager.register_resource(City)
+        asgi_app = manager.asgi_app()
+
+        #uvicorn module:asgi_app
+
+    """
+    def __init__(self, app, max_workers = AsyncConst.MAX_WORKERS):
+        self.app = app
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers = max_workers)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError("Unsupported ASGI scope type {0}".format(scope['type']))
+
+        body = await _read_body(receive)
+        #Client went away before request was complete, nothing to answer
+        if body is None:
+            return
+        environ = build_environ(scope, body)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self._handle, loop, environ, send)
+
+    def _handle(self, loop, environ, send):
+        """Call WSGI app in a worker thread and send its response through event loop. Response body is
+        iterated in the same thread, as streamed responses keep request context on it.
+        """
+        emit = lambda message: asyncio.run_coroutine_threadsafe(send(message), loop).result()
+        started = []
+
+        def start_response(status, headers, exc_info = None):
+            started[:] = [int(status.split(' ', 1)[0]), headers]
+            return lambda data: emit({'type': 'http.response.body', 'body': data, 'more_body': True})
+
+        iterable = self.app(environ, start_response)
+        try:
+            emit({'type': 'http.response.start', 'status': started[0],
+                  'headers': [(name.lower().encode('latin1'), value.encode('latin1')) for name, value in started[1]]})
+            for chunk in iterable:
+                if chunk:
+                    emit({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        finally:
+            if hasattr(iterable, 'close'):
+                iterable.close()
+        emit({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait = True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+async def _read_body(receive):
+    """Return request body, ``None`` if client disconnected before sending all of it.
+    """
+    body = []
+    more_body = True
+    while more_body:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        body.append(message.get('body', b''))
+        more_body = message.get('more_body', False)
+    return b''.join(body)
+
+def build_environ(scope, body):
+    """Build WSGI environ of ASGI http `scope` and request `body`.
+    """
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': 'HTTP/{0}'.format(scope.get('http_version', '1.1')),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'], environ['REMOTE_PORT'] = scope['client'][0], str(scope['client'][1])
+
+    for name, value in scope.get('headers', ()):
+        name = name.decode('latin1').lower()
+        if name == 'content-length':
+            key = 'CONTENT_LENGTH'
+        elif name == 'content-type':
+            key = 'CONTENT_TYPE'
+        else:
+            key = 'HTTP_{0}'.format(name.upper().replace('-', '_'))
+        value = value.decode('latin1')
+        environ[key] = '{0},{1}'.format(environ[key], value) if key in environ else value
+
+    #Body is read completely, chunked requests don't have a length header
+    environ['CONTENT_LENGTH'] = str(len(body))
+    return environ
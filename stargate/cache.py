@@ -0,0 +1,193 @@
+"""Server side cache of ``GET`` responses. A resource registered with `cache` option keeps its responses in a
+:class:`CacheBackend`, keyed by normalized url of request. Backends only need `get`, `set` and `delete`, so
+besides in-process :class:`MemoryCache` any Redis compatible client can be used through :class:`KeyValueCache`.
+
+Cached responses are never updated in place. Every cached resource has a version kept in its backend which is part
+of response keys, :func:`invalidate_responses` replaces versions of a model and of models connected to it through
+relations once a write is committed, so all their responses are missed from then on and expire on their own.
+
+Versions are only as shared as their backend. :class:`MemoryCache` (``cache = True``) is per process, so a write
+handled by one worker process doesn't invalidate responses cached by others, which keep serving them until their
+`ttl` expires. Use a shared backend like :class:`KeyValueCache` when that matters.
+
+"""
+
+import time
+from uuid import uuid4
+from flask import request, json, Response
+from .utils import LRUCache
+from .metadata import model_metadata
+from .const import CacheConst
+
+class CacheBackend():
+    """Key/value interface of response cache backends. Keys and values are strings.
+    """
+    def get(self, key):
+        """Return value of `key` or ``None`` if it is missing or expired.
+        """
+        raise NotImplementedError
+
+    def set(self, key, value, ttl = None):
+        """Store `value` at `key`, for `ttl` seconds if given.
+        """
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+
+class MemoryCache(CacheBackend):
+    """In-process backend holding at most `maxsize` entries, least recently used are evicted first.
+
+    :param maxsize: maximum number of entries to keep.
+    :param ttl: default time to live of entries in seconds.
+
+    """
+    def __init__(self, maxsize = CacheConst.RESPONSES, ttl = None):
+        self._data = LRUCache(maxsize, ttl)
+
+    def get(self, key):
+        return self._data.get(key)
+
+    def set(self, key, value, ttl = None):
+        self._data.set(key, value, ttl = ttl)
+
+    def delete(self, key):
+        self._data.delete(key)
+
+
+class KeyValueCache(CacheBackend):
+    """Backend adapting a Redis compatible `client`, any object with ``get(key)``, ``set(key, value, ex = None)``
+    and ``delete(key)`` will do. Keys are prefixed with `prefix` so several applications can share a store.
+
+    .. code-block:: python
+
+        import redis
+        KeyValueCache(redis.StrictRedis(), prefix = 'myapp:')
+
+    """
+    def __init__(self, client, prefix = CacheConst.KEY_PREFIX):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        if isinstance(value, bytes):
+            value = value.decode('utf-8')
+        return value
+
+    def set(self, key, value, ttl = None):
+        if ttl is None:
+            self.client.set(self.prefix + key, value)
+        else:
+            self.client.set(self.prefix + key, value, ex = int(ttl))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+
+class ResponseCache():
+    """Responses of a resource cached in `backend` for `ttl` seconds. Created by
+    :meth:`~stargate.manager.Manager.create_resource_blueprint` for resources registered with `cache` option.
+
+    :param model: model class of resource.
+    :param backend: :class:`CacheBackend` instance.
+    :param ttl: seconds a response is cached for.
+
+    """
+    def __init__(self, model, backend, ttl = CacheConst.RESPONSE_TTL):
+        self.model = model
+        self.backend = backend
+        self.ttl = ttl
+        self.version_key = 'version:{0}.{1}'.format(model.__module__, model.__name__)
+        self.invalidated_key = 'invalidated:{0}.{1}'.format(model.__module__, model.__name__)
+
+    def version(self):
+        """Current version of resource, generated if backend doesn't have one (first use or evicted).
+        """
+        version = self.backend.get(self.version_key)
+        if version is None:
+            version = uuid4().hex
+            self.backend.set(self.version_key, version)
+        return version
+
+    def invalidate(self):
+        """Replace version of resource, making all its cached responses unreachable. Returns new version.
+        """
+        version = uuid4().hex
+        self.backend.set(self.version_key, version)
+        self.backend.set(self.invalidated_key, repr(time.time()))
+        return version
+
+    def invalidated_within(self, seconds):
+        """`True` if resource was invalidated less than `seconds` ago, e.g. within replication lag of
+        read replicas a response may have been read from.
+        """
+        invalidated = self.backend.get(self.invalidated_key)
+        return invalidated is not None and float(invalidated) > time.time() - seconds
+
+    def key(self):
+        """Cache key of current request: version, host, path and query string sorted by argument.
+        """
+        args = sorted(request.args.items(multi = True))
+        return 'response:{0}:{1}{2}?{3}'.format(self.version(), request.host_url, request.path, json.dumps(args))
+
+    def get(self, key):
+        """Return cached :class:`~flask.Response` stored at `key` or ``None``.
+        """
+        entry = self.backend.get(key)
+        if entry is None:
+            return None
+        status, headers, body = json.loads(entry)
+        return Response(body, status = status, headers = headers)
+
+    def set(self, key, response):
+        """Store `response` at `key`. Only complete ``200`` responses are cached.
+        """
+        if response.status_code != 200 or response.is_streamed:
+            return
+        entry = json.dumps([response.status_code, list(response.headers.items()), response.get_data(as_text = True)])
+        self.backend.set(key, entry, ttl = self.ttl)
+
+#Response caches of resources keyed by model class.
+RESPONSE_CACHES = {}
+
+def register_response_cache(model, cache):
+    """Set :class:`ResponseCache` of `model`, ``None`` removes it.
+    """
+    if cache is None:
+        RESPONSE_CACHES.pop(model, None)
+    else:
+        RESPONSE_CACHES[model] = cache
+
+def invalidate_responses(model):
+    """Invalidate cached responses of `model` and of cached models connected to it through relations, in
+    either direction and over any number of hops, as nested expansions can embed `model` in any of them.
+    Called after a write on `model` is committed.
+    """
+    connected = _connected_models(model, RESPONSE_CACHES)
+    for cached_model, cache in list(RESPONSE_CACHES.items()):
+        if cached_model in connected:
+            cache.invalidate()
+
+def _connected_models(model, models):
+    """Return set of models connected to `model` through relations, following relations of `model`, `models`
+    and every model reached from them in both directions.
+    """
+    related = {}
+    pending = [model] + list(models)
+    while pending:
+        current = pending.pop()
+        if current in related:
+            continue
+        related[current] = set(relation.related_model for relation in model_metadata(current).relations.values())
+        pending.extend(related[current])
+
+    connected = set([model])
+    pending = [model]
+    while pending:
+        current = pending.pop()
+        neighbours = related[current] | set(other for other, targets in related.items() if current in targets)
+        pending.extend(neighbours - connected)
+        connected |= neighbours
+    return connected
@@ -6,6 +6,10 @@ class PaginationConst:
 	PAGE_NUMBER = 1
 	PAGE_SIZE = 10
 	MAX_PAGE_SIZE = 100
+	CURSOR_NEXT = 'next'
+	CURSOR_PREV = 'prev'
+	STREAM_CHUNK_SIZE = 20
+	EXPORT_CHUNK_SIZE = 1000
 
 #Request Query String Constants
 class QueryStringConst:
@@ -17,10 +21,86 @@ class QueryStringConst:
 	EXCLUDE = 'exclude'
 	PAGE_SIZE = 'page_size'
 	PAGE_NUMBER = 'page_number'
+	CURSOR = 'cursor'
+	COUNT = 'count'
+	PRETTY = 'pretty'
+	STREAM = 'stream'
+	FORMAT = 'format'
+
+#Cache Size Constants
+class CacheConst:
+	SERIALIZATION_PLANS = 128
+	COUNTS = 1024
+	EXPANSIONS = 256
+	FILTERS = 512
+	STATEMENTS = 256
+	RESPONSES = 1024
+	RESPONSE_TTL = 60
+	KEY_PREFIX = 'stargate:'
+	HEADER = 'X-Cache'
+	HIT = 'HIT'
+	MISS = 'MISS'
+	BYPASS = 'BYPASS'
+
+#Collection Count Constants
+class CountConst:
+	EXACT = 'exact'
+	NONE = 'none'
+	ESTIMATED = 'estimated'
+	CACHED = 'cached'
+	MODES = frozenset((EXACT, NONE, ESTIMATED, CACHED))
+	CACHE_TTL = 60
+
+#Collection Export Constants
+class ExportConst:
+	NDJSON = 'ndjson'
+	CSV = 'csv'
+	MIMETYPES = {NDJSON: 'application/x-ndjson', CSV: 'text/csv'}
+	ENDPOINT = 'export'
+
+#ASGI Constants, database connection pool defaults of SQLAlchemy
+class AsyncConst:
+	MAX_WORKERS = 15
+	POOL_SIZE = 5
+	MAX_OVERFLOW = 10
+
+#Parallel Query Constants
+class FanOutConst:
+	MAX_WORKERS = 8
+
+#Read Replica Constants
+class ReplicaConst:
+	ROUND_ROBIN = 'round_robin'
+	LEAST_LOADED = 'least_loaded'
+	STRATEGIES = frozenset((ROUND_ROBIN, LEAST_LOADED))
+	PRIMARY_HEADER = 'X-Read-Primary'
+	SESSION_FLAG = 'stargate_read_primary'
+	SESSION_ATTR = '_stargate_read_session'
+	PIN_SECONDS = 5
+
+#Query Limit Constants
+class LimitConst:
+	STATEMENT_TIMEOUT = 'statement_timeout'
+	MAX_FILTER_DEPTH = 'max_filter_depth'
+	MAX_OFFSET = 'max_offset'
+	#SQLite virtual machine instructions between timeout checks
+	SQLITE_PROGRESS_STEPS = 1000
+
+#Write Response Preference Constants
+class PreferConst:
+	HEADER = 'Prefer'
+	APPLIED_HEADER = 'Preference-Applied'
+	RETURN = 'return'
+	MINIMAL = 'minimal'
+	REPRESENTATION = 'representation'
+	RETURNS = frozenset((MINIMAL, REPRESENTATION))
 
 #Resource Constants
 class ResourceConst:
 	PRIMARY_KEY_COLUMN = 'id'
+	UPDATED_AT_COLUMN = 'updated_at'
+	IN_CHUNK_SIZE = 500
+	REQUEST_CACHE_ATTR = '_stargate_resources'
 
 #Relationship Type Constants
 class RelTypeConst:
@@ -35,9 +115,12 @@ class CollectionEvaluationConst:
 #Serialization Constants
 class SerializationConst:
 	EMBEDDED = '_embedded'
+	EXPANDED = 'expanded'
 	ATTRIBUTES = 'attributes'
 	DATA = 'data'
 	NUM_RESULTS = 'num_results'
+	IDS = 'ids'
+	FILTERS = 'filters'
 	LINKS = 'links'
 
 #Resource Info Constants
@@ -47,6 +130,7 @@ class ResourceInfoConst:
 	DESERIALIZER = 'deserializer_for'
 	URL = 'url_for'
 	COLLECTION_NAME = 'collection_name_for'
+	RELATIVE_LINKS = 'relative_links_for'
 
 class MediatypeConstants:
 	CONTENT_TYPE = 'application/json'
@@ -8,7 +8,8 @@ from functools import wraps
 from flask import request, json, jsonify
 from .exception import NotAcceptable, MediaTypeNotSupported, ProcessingException, ConflictException, ValidationError
 from werkzeug import parse_options_header
-from .const import MediatypeConstants
+from .cache import invalidate_responses
+from .const import MediatypeConstants, CacheConst
 
 """View function Content-Type decorators"""
 def requires_api_accept(func):
@@ -61,6 +62,75 @@ def parse_accept_header(value):
         return name, quality
     return map(match_to_pair, MediatypeConstants.ACCEPT_RE.finditer(value))
 
+"""View function conditional request decorator"""
+def conditional_response(func):
+    """Add ``ETag`` (hash of body, unless view has set one) to complete ``200`` responses and turn them
+    into ``304 Not Modified`` if request ``If-None-Match`` or ``If-Modified-Since`` matches, see
+    :meth:`~werkzeug.wrappers.ETagResponseMixin.make_conditional`. Only ``GET`` and ``HEAD`` are affected.
+    """
+    @wraps(func)
+    def new_func(*args, **kw):
+        response = func(*args, **kw)
+        if request.method in ('GET', 'HEAD') and response.status_code == 200 and not response.is_streamed:
+            response.add_etag()
+            response.make_conditional(request)
+        return response
+    return new_func
+
+"""View method response cache decorators"""
+def cached_response(func):
+    """Serve ``GET`` from :class:`~stargate.cache.ResponseCache` of view (`cache` attribute) if it is set.
+    Sets ``X-Cache`` response header to ``HIT`` or ``MISS``.
+
+    With read replicas (`replicas` attribute) requests pinned to primary bypass cache (``BYPASS``), as cached
+    responses may have been read from a replica which hasn't caught up with their client's write yet. For the same
+    reason responses read from a replica within `pin_seconds` of an invalidation are not stored.
+    """
+    @wraps(func)
+    def new_func(self, *args, **kw):
+        cache = self.cache
+        if cache is None:
+            return func(self, *args, **kw)
+        replicas = self.replicas
+        if replicas is not None and replicas.pinned():
+            response = func(self, *args, **kw)
+            response.headers.set(CacheConst.HEADER, CacheConst.BYPASS)
+            return response
+        key = cache.key()
+        response = cache.get(key)
+        if response is not None:
+            response.headers.set(CacheConst.HEADER, CacheConst.HIT)
+            return response
+        response = func(self, *args, **kw)
+        if replicas is None or not cache.invalidated_within(replicas.pin_seconds):
+            cache.set(key, response)
+        response.headers.set(CacheConst.HEADER, CacheConst.MISS)
+        return response
+    return new_func
+
+def invalidates_responses(func):
+    """Invalidate cached responses of view model and its related models once a write succeeded,
+    see :func:`~stargate.cache.invalidate_responses`.
+    """
+    @wraps(func)
+    def new_func(self, *args, **kw):
+        response = func(self, *args, **kw)
+        invalidate_responses(self.model)
+        return response
+    return new_func
+
+def pins_primary(func):
+    """Route reads of client to primary database for a while once a write succeeded, see
+    :meth:`~stargate.routing.ReadReplicas.pin`.
+    """
+    @wraps(func)
+    def new_func(self, *args, **kw):
+        response = func(self, *args, **kw)
+        if self.replicas is not None:
+            self.replicas.pin()
+        return response
+    return new_func
+
 CONFLICT_INDICATORS = ('conflicts with', 'UNIQUE constraint failed',
                         'is not unique')
 
@@ -3,13 +3,39 @@ of a resource to respective class object or list of objects.
 
 """
 
+from collections import defaultdict
 from .resource_info import resource_info
-from .utils import get_resource, get_related_model
+from .utils import require_resources, get_related_model
 from sqlalchemy.inspection import inspect as sqlalchemy_inspect
 from .utils import has_field, string_to_datetime, session_query
 from .const import SerializationConst, ResourceInfoConst
 from .exception import DeserializationException, UnknownRelation, MissingData, UnknownField
 
+def resolve_related(session, model, embedded):
+    """Collect primary keys of related resources referenced in `embedded` (iterable of `_embedded`
+    representations) and fetch them with one chunked ``IN`` query per related model. Unknown 
+    relations are skipped, they are reported by caller.
+    Raise :class:`~stargate.exception.ResourceNotFound` listing every id not found in db.
+
+    :return: `{related_model: {pk_value: resource}}`
+    """
+    pk_ids = defaultdict(list)
+    for links in embedded:
+        for rel_name, rel_object in links.items():
+            if not has_field(model, rel_name) or not isinstance(rel_object, dict):
+                continue
+            related_model = get_related_model(model, rel_name)
+            if related_model is None:
+                continue
+            pk_name = resource_info(ResourceInfoConst.PRIMARY_KEY, related_model)
+            linkage = rel_object.get(SerializationConst.DATA)
+            for rel in (linkage if isinstance(linkage, list) else [linkage]):
+                if isinstance(rel, dict) and pk_name in rel:
+                    pk_ids[related_model].append(rel[pk_name])
+    
+    return dict((related_model, require_resources(session, related_model, ids)) 
+                for related_model, ids in pk_ids.items())
+
 class Deserializer:
     """Default Deserializer class. Each resource regsiter its own copy of this class 
     during initilization in :class:`~stargate.manager.Manager`
@@ -24,7 +50,8 @@ class Deserializer:
 
     def __call__(self, document):
         """Callable for Deserializer class. Deserialize JSONObject representation.
-        Raise :class:`~stargate.exception.MissingDataKey` id `data` key is not present in request payload.
+        Raise :class:`~stargate.exception.MissingData` if `data` key is not present in request payload.
+        If `data` is a JSONArray a list of objects is returned.
 
         Example:
 
@@ -38,13 +65,27 @@ class Deserializer:
         
         """
         if SerializationConst.DATA not in document:
-            raise MissingDataKey("Key Error data")
+            raise MissingData(self.model)
         
         data = document[SerializationConst.DATA]
+
+        if not isinstance(data, list):
+            return self._deserialize_many([data])[0]
         
-        return self._deserialize(data)
+        return self._deserialize_many(data)
+
+    def _deserialize_many(self, instances):
+        """Called internally by __call__ method to deserialize JSONArray representation. Related
+        resources referenced by primary key in any object of array are fetched upfront, see 
+        :func:`resolve_related`.
 
-    def _deserialize(self, instance):
+        :param instances: list of JSON Representation of objects.
+        """
+        resolved = resolve_related(self.session, self.model, 
+                                   (instance.get(SerializationConst.EMBEDDED, {}) for instance in instances))
+        return [self._deserialize(instance, resolved) for instance in instances]
+
+    def _deserialize(self, instance, resolved = None):
         """Called internally by __call__ method to deseriaize JSONObject representation.
         Raise :class:`~stargate.exception.DeserializationException` if operation fails.
         Raise :class:`~stargate.exception.UnknownRelation` if unknown relation name is provided
@@ -52,6 +93,7 @@ class Deserializer:
         in relation `data` key or primary resource `data` key.
 
         :param instance: JSON Representation of object.
+        :param resolved: related resources already fetched by :meth:`Deserializer._resolve_related`.
         """
         try:
             for field in instance:
@@ -73,7 +115,8 @@ class Deserializer:
 
                 if SerializationConst.DATA in rel_object:
                     related_model = get_related_model(self.model, rel_name)
-                    deserialize = RelDeserializer(self.session, related_model, rel_name)
+                    resolved_ = resolved.get(related_model) if resolved else None
+                    deserialize = RelDeserializer(self.session, related_model, rel_name, resolved = resolved_)
                     related_resources[rel_name] = deserialize(rel_object[SerializationConst.DATA])
                 else:
                     raise MissingData(rel_name)
@@ -95,11 +138,13 @@ class RelDeserializer(Deserializer):
     
     :param session: SQLALchemy session object.
     :param model: Related Resource model class.
+    :param resolved: `{pk_value: resource}` of related resources already fetched from db.
 
     """
-    def __init__(self, session, model, relation_name = None):
+    def __init__(self, session, model, relation_name = None, resolved = None):
 
         super(RelDeserializer, self).__init__(model, session)
+        self.resolved = resolved or {}
     
     def __call__(self, data):
 
@@ -109,11 +154,17 @@ class RelDeserializer(Deserializer):
             pk_name = resource_info(ResourceInfoConst.PRIMARY_KEY, self.model)
             
             if pk_name in data:
-                return get_resource(self.session, self.model, data[pk_name])
+                if data[pk_name] not in self.resolved:
+                    self.resolved.update(require_resources(self.session, self.model, [data[pk_name]]))
+                return self.resolved[data[pk_name]]
             
             else:
                 return self.model(**data)
         
-        #If TO_MANY recurse of each object and check above conditions.
+        #If TO_MANY fetch all linked objects at once and check above conditions for each.
         else:
+            pk_name = resource_info(ResourceInfoConst.PRIMARY_KEY, self.model)
+            pk_ids = [rel[pk_name] for rel in data if pk_name in rel and rel[pk_name] not in self.resolved]
+            if pk_ids:
+                self.resolved.update(require_resources(self.session, self.model, pk_ids))
             return list(map(self, data))
\ No newline at end of file
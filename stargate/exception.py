@@ -6,7 +6,8 @@ exception. Werkzeug exceptions are also mapped here.
 """
 
 from flask import jsonify
-from werkzeug.exceptions import NotAcceptable, Conflict, BadRequest, NotFound, InternalServerError, UnsupportedMediaType, UnprocessableEntity
+from werkzeug.exceptions import NotAcceptable, Conflict, BadRequest, NotFound, InternalServerError, UnsupportedMediaType, UnprocessableEntity, \
+                                ServiceUnavailable
 from werkzeug.http import HTTP_STATUS_CODES
 
 ############################--MAIN APPLICATION ERROR CLASS--##################################
@@ -99,13 +100,28 @@ class UnknownRelation(ValidationError):
 class IllegalArgumentError(ValidationError):
     
     def __init__(self, msg, **kwargs):
-        super(IllegalArgumentError, self).__init__()
-        self.msg = msg
+        super(IllegalArgumentError, self).__init__(msg)
 
 class UnknownOperator(ValidationError):
     def __init__(self, msg, **kwargs):
         self.__name__ = 'UnknownOperator'
         super(UnknownOperator, self).__init__(msg)
+############################--QUERY LIMIT ERRORS--############################################
+class QueryLimitExceeded(StargateException):
+    werkzeug_exception = UnprocessableEntity
+
+    def __init__(self, msg, limit = None, value = None):
+        super(QueryLimitExceeded, self).__init__(msg)
+        self.limit = limit
+        self.value = value
+
+    def as_dict(self):
+        dct = super(QueryLimitExceeded, self).as_dict()
+        dct['details'].update({'limit' : self.limit, 'value' : self.value})
+        return dct
+
+class StatementTimeout(QueryLimitExceeded):
+    werkzeug_exception = ServiceUnavailable
 ############################--PROCESSING ERRORS--############################################
 class ProcessingException(StargateException):
     werkzeug_exception = UnprocessableEntity       
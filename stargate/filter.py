@@ -4,18 +4,21 @@ and Disjunction Filters. Also contains a list of supported `OPERATORS`(unary, bi
 """
 
 import inspect
-from .exception import UnknownField, ComparisonToNull, UnknownOperator
-from sqlalchemy import Date, DateTime, Interval, Time, and_, or_
+from collections import namedtuple
+from functools import partial
+from .exception import UnknownField, ComparisonToNull, UnknownOperator, ValidationError
+from sqlalchemy import Date, DateTime, Interval, Time, and_, or_, bindparam
 from dateutil.parser import parse as parse_datetime
 import datetime
 from sqlalchemy.sql.expression import ColumnElement
 from sqlalchemy.orm import RelationshipProperty as RelProperty
 from sqlalchemy.ext.associationproxy import AssociationProxy
 from sqlalchemy.orm.attributes import InstrumentedAttribute
-from .utils import string_to_datetime, get_related_association_proxy_model
+from .utils import string_to_datetime, get_related_association_proxy_model, LRUCache
+from .metadata import model_metadata
+from .const import CacheConst
 
 def _sub_operator(model, argument, fieldname):
-    print(argument, fieldname)
     if isinstance(model, InstrumentedAttribute):
         submodel = model.property
     elif isinstance(model, AssociationProxy):
@@ -37,6 +40,12 @@ OPERATORS = {
     'has': lambda f, a, fn: f.has(_sub_operator(f, a, fn)),
     'any': lambda f, a, fn: f.any(_sub_operator(f, a, fn)),
 }
+#Number of arguments of each operator in `OPERATORS`, computed once.
+OPERATOR_ARITY = dict((name, len(inspect.signature(opfunc).parameters)) for name, opfunc in OPERATORS.items())
+#Attribute name patterns probed for binary operators not in `OPERATORS`.
+BINARY_OPERATOR_PATTERNS = ('%s', '%s_', '__%s__')
+#Filter values compiled as SQL expressions rather than bound parameters.
+CURRENT_TIME_MARKERS = ('CURRENT_TIMESTAMP', 'CURRENT_DATE', 'LOCALTIMESTAMP')
 
 
 class Filter:
@@ -109,7 +118,7 @@ def create_operation(model, fieldname, operator, argument):
     
     if operator in OPERATORS:
         opfunc = OPERATORS[operator]
-        numargs = len(inspect.signature(opfunc).parameters)
+        numargs = OPERATOR_ARITY[operator]
         
         #Unary Operators
         if numargs == 1:
@@ -122,14 +131,15 @@ def create_operation(model, fieldname, operator, argument):
     
     #Binary Operators accepting single argument
     else:
-        opfunc = list(filter(
-                                lambda e: hasattr(field, e % operator), 
-                                ['%s','%s_','__%s__']
-                            ))
-        if not opfunc:
-            raise UnknownOperator(msg="No operator found{0}".format(operator))
-        opfunc = opfunc[0] % operator
-        return getattr(field, opfunc)(argument)    
+        return binary_operator(field, operator)(argument)
+
+def binary_operator(field, operator):
+    """Return bound method of `field` implementing binary `operator`, e.g. ``like``, ``in_`` or ``__eq__``.
+    """
+    for pattern in BINARY_OPERATOR_PATTERNS:
+        if hasattr(field, pattern % operator):
+            return getattr(field, pattern % operator)
+    raise UnknownOperator(msg="No operator found{0}".format(operator))
 
 def create_filter(model, filt):
     if not isinstance(filt, JunctionFilter):
@@ -139,3 +149,146 @@ def create_filter(model, filt):
     if isinstance(filt, ConjunctionFilter):
         return and_(create_filter(model, f) for f in filt)
     return or_(create_filter(model, f) for f in filt)
+
+#Namedtuple holding a compiled filter expression. `criterion` is SQLAlchemy clause with a bound 
+#parameter ``filter_<n>`` for n-th value of filters, `converters` convert raw n-th value before binding.
+COMPILED_FILTER = namedtuple('COMPILED_FILTER', ['criterion', 'converters'])
+#Compiled filter expressions keyed by model and normalized filters.
+COMPILED_FILTERS = LRUCache(CacheConst.FILTERS)
+_PARAM = 'filter_{0}'
+_VALUE = object()
+
+def compile_filters(model, filters):
+    """Return SQLAlchemy criterion for list of `filters` (JSON representation, see 
+    :meth:`Filter.from_json`) with values bound, see :func:`prepare_filters`.
+
+    :param model: Resource model class.
+    :param filters: list of filter JSON representations.
+
+    """
+    shape, criterion, params = prepare_filters(model, filters)
+    return criterion.params(params) if params else criterion
+
+def prepare_filters(model, filters):
+    """Separate values of `filters` from their structure, which is compiled once per model into a 
+    criterion with bound parameters and cached, so identical filters with different values skip
+    parsing and result in same statement text. Returns tuple of normalized filters (hashable), 
+    criterion and dict of parameter values.
+
+    :param model: Resource model class.
+    :param filters: list of filter JSON representations.
+
+    """
+    values = []
+    shape = tuple(_normalize(model, filt, values) for filt in filters)
+    key = (model, shape)
+    compiled = COMPILED_FILTERS.get(key)
+    
+    if compiled is None:
+        converters = []
+        criterion = and_(*[_compile(model, filt, converters) for filt in shape])
+        compiled = COMPILED_FILTER(criterion, tuple(converters))
+        COMPILED_FILTERS.set(key, compiled)
+    
+    params = dict((_PARAM.format(index), convert(value)) 
+                  for index, (convert, value) in enumerate(zip(compiled.converters, values)))
+    return shape, compiled.criterion, params
+
+def filter_depth(filters):
+    """Nesting depth of list of filter JSON representations. A plain filter has depth 1, each
+    `or`/`and` junction adds a level and so does each relation hop of `has`/`any` filters, whose
+    `val` is a filter on related model. Raises :class:`~stargate.exception.ValidationError` if a 
+    junction is not a list or a `has`/`any` argument is not a filter.
+
+    :param filters: list of filter JSON representations.
+
+    """
+    depth = 0
+    stack = [(filt, 1) for filt in filters]
+    while stack:
+        filt, level = stack.pop()
+        depth = max(depth, level)
+        if isinstance(filt, dict):
+            for junction in ('or', 'and'):
+                subfilters = filt.get(junction) or []
+                if not isinstance(subfilters, list):
+                    raise ValidationError(msg="Malformed filter {0}".format(filt))
+                stack.extend((subfilter, level + 1) for subfilter in subfilters)
+            if OPERATOR_ARITY.get(filt.get('op')) == 3:
+                if not isinstance(filt.get('val'), dict):
+                    raise ValidationError(msg="Malformed filter {0}".format(filt))
+                stack.append((filt['val'], level + 1))
+    return depth
+
+def _normalize(model, filt, values):
+    """Return hashable structure of filter JSON `filt`, values bound as parameters are replaced with
+    placeholder and appended to `values`.
+    """
+    if not isinstance(filt, dict):
+        raise ValidationError(msg="Malformed filter {0}".format(filt))
+    
+    for junction in ('or', 'and'):
+        if junction in filt:
+            return (junction, tuple(_normalize(model, f, values) for f in filt[junction]))
+    
+    fieldname = filt.get('name')
+    operator = filt.get('op')
+    argument = filt.get('val')
+    relation = model_metadata(model).relations.get(fieldname)
+    
+    if not isinstance(fieldname, str) or not hasattr(model, fieldname):
+        raise UnknownField(fieldname, model.__name__)
+    
+    if OPERATOR_ARITY.get(operator) == 1:
+        return (fieldname, operator, None)
+    
+    if OPERATOR_ARITY.get(operator) == 3:
+        if relation is None:
+            raise ValidationError(msg="Operator {0} requires a relation, got {1}".format(operator, fieldname))
+        return (fieldname, operator, _normalize(relation.related_model, argument, values))
+    
+    if argument is None or argument in CURRENT_TIME_MARKERS:
+        return (fieldname, operator, ('literal', argument))
+    
+    values.append(argument)
+    return (fieldname, operator, _VALUE)
+
+def _compile(model, filt, converters):
+    """Compile normalized filter `filt` into a criterion, appending a converter to `converters` 
+    for each bound parameter.
+    """
+    if filt[0] in ('or', 'and'):
+        junction = or_ if filt[0] == 'or' else and_
+        return junction(*[_compile(model, f, converters) for f in filt[1]])
+    
+    fieldname, operator, argument = filt
+    field = getattr(model, fieldname)
+    arity = OPERATOR_ARITY.get(operator)
+    
+    if arity == 1:
+        return OPERATORS[operator](field)
+    
+    if arity == 3:
+        related_model = model_metadata(model).relations[fieldname].related_model
+        return getattr(field, operator)(_compile(related_model, argument, converters))
+    
+    if argument is not _VALUE:
+        argument = string_to_datetime(model, fieldname, argument[1])
+        if arity == 2:
+            return OPERATORS[operator](field, [argument])
+        return binary_operator(field, operator)(argument)
+    
+    param = bindparam(_PARAM.format(len(converters)), expanding = arity == 2)
+    if arity == 2:
+        converters.append(partial(_list_value, model, fieldname))
+        return OPERATORS[operator](field, param)
+    
+    converters.append(partial(string_to_datetime, model, fieldname))
+    return binary_operator(field, operator)(param)
+
+def _list_value(model, fieldname, value):
+    """Convert value of list operators (``in``, ``not_in``), comma separated string or list.
+    """
+    if isinstance(value, str):
+        value = value.split(',')
+    return [string_to_datetime(model, fieldname, v) for v in value]
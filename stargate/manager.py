@@ -7,16 +7,21 @@ from flask import Flask, Blueprint, url_for, json, make_response
 from uuid import uuid1
 from collections import namedtuple
 from .resource_info import resource_info
+from .metadata import model_metadata
 from .serializer import Serializer
 from .deserializer import Deserializer
 from functools import partial
 from .exception import IllegalArgumentError, StargateException
 from werkzeug.exceptions import HTTPException
-from .resource_api import ResourceAPI
+from .resource_api import ResourceAPI, ExportAPI
+from .representation import dumps, pretty_requested
 from flask.testing import FlaskClient
 from sqlalchemy.inspection import inspect as sqlalchemy_inspect
 from sqlalchemy.exc import NoInspectionAvailable
-from .const import ResourceConst
+from .cache import CacheBackend, MemoryCache, ResponseCache, register_response_cache
+from .routing import ReadReplicas
+from .search import QUERY_LIMITS, FAN_OUT
+from .const import ResourceConst, CountConst, ExportConst, CacheConst, PreferConst, AsyncConst, ReplicaConst
 
 #HTTP Method for fetching resource/collection
 READONLY_METHODS = frozenset(('GET', ))
@@ -27,7 +32,7 @@ ALL_METHODS = READONLY_METHODS | WRITEONLY_METHODS
 #Default `url_prefix` for `Manager` Class
 DEFAULT_URL_PREFIX = '/api'
 #Namedtuple to hold information about a resource registered with a `Manager` instance
-RESOURCE_INFO = namedtuple('RESOURCE_INFO', ['collection','blueprint','serializer','deserializer', 'pk','apiname'])
+RESOURCE_INFO = namedtuple('RESOURCE_INFO', ['collection','blueprint','serializer','deserializer', 'pk','apiname', 'endpoint', 'relative_links'])
 
 class Manager():
 	"""This class let you expose JSON RESTFul APIs against various resources.
@@ -42,6 +47,15 @@ class Manager():
 
 	:param url_prefix: prefix url for all endpoints registered with `Manager` instance. url_prefix
 						should start with '/'.
+
+	:param relative_links: If `True` resource links in responses are relative to host instead of 
+						fully qualified urls. Can be overridden per resource.
+
+	:param read_binds: read replica engine or database URL, a list of them or a 
+						:class:`~stargate.routing.ReadReplicas` instance. ``GET`` requests of resources
+						are served from replicas, writes and clients pinned to primary use `db`.
+
+	:param read_strategy: how a replica is chosen for a request, `round_robin` or `least_loaded`.
 	
 	Example usage of this class. Models should be defined using flask_sqlalchemy:
 
@@ -55,9 +69,14 @@ class Manager():
 		manager = Manager(app, db, decorators = [auth_decorator])
 		#With url_prefix
 		manager = Manager(app, db, url_prefix = '/v1')
+		#With relative links
+		manager = Manager(app, db, relative_links = True)
+		#With read replicas
+		manager = Manager(app, db, read_binds = [replica_engine_1, replica_engine_2])
 	
 	"""	
-	def __init__(self, app, db, decorators = None, url_prefix = None):
+	def __init__(self, app, db, decorators = None, url_prefix = None, relative_links = False, read_binds = None,
+				read_strategy = ReplicaConst.ROUND_ROBIN):
 
 		#If provided app instance is `flask.Flask` register exception handler too.
 		if isinstance(app, Flask):
@@ -78,10 +97,21 @@ class Manager():
 
 		self.session = db.session
 		self.url_prefix = url_prefix
+		self.relative_links = relative_links
 		
 		self.decorators = decorators or []
 		self.registered_apis = {}
 		self.registerd_blueprints = []
+		self._response_backend = None
+		self._parallel = False
+
+		#Replicas serving GET requests, their sessions are closed with app context
+		if read_binds is None or isinstance(read_binds, ReadReplicas):
+			self.replicas = read_binds
+		else:
+			self.replicas = ReadReplicas(read_binds, strategy = read_strategy)
+		if self.replicas is not None and isinstance(app, Flask):
+			app.teardown_appcontext(self.replicas.remove)
 
 	@staticmethod
 	def api_name(collection_name):
@@ -131,6 +161,32 @@ class Manager():
 			#Specify resource primary key
 			manager.register_resource(User, primary_key = 'ser_id')
 
+			#Emit relative resource links
+			manager.register_resource(User, relative_links = True)
+
+			#Collection total from planner estimate or cache
+			manager.register_resource(User, count = 'estimated')
+			manager.register_resource(User, count = 'cached', count_ttl = 300)
+
+			#Stream collection pages
+			manager.register_resource(User, stream = True)
+
+			#Register /api/user/export NDJSON/CSV export endpoint
+			manager.register_resource(User, export = True)
+
+			#Cache GET responses in process, or in any Redis compatible store
+			manager.register_resource(User, cache = True, cache_ttl = 30)
+			manager.register_resource(User, cache = KeyValueCache(redis_client))
+
+			#Answer POST/PATCH with id, link and written attributes unless client prefers representation
+			manager.register_resource(User, write_return = 'minimal')
+
+			#Run collection total and relation queries concurrently on separate connections
+			manager.register_resource(User, parallel = True)
+
+			#Fail fast on expensive collection queries
+			manager.register_resource(User, statement_timeout = 2, max_filter_depth = 3, max_offset = 10000)
+
 		"""
 		#Create Random Blueprint name
 		blueprint_name = str(uuid1())
@@ -151,7 +207,11 @@ class Manager():
 	
 	def create_resource_blueprint(self, name, model, methods = READONLY_METHODS,
                              url_prefix = None, endpoint = None,fields = None, 
-                       		exclude = None, decorators = [], primary_key = None):
+                       		exclude = None, decorators = [], primary_key = None, relative_links = None,
+                       		count = CountConst.EXACT, count_ttl = CountConst.CACHE_TTL, stream = False,
+                       		export = False, cache = None, cache_ttl = CacheConst.RESPONSE_TTL,
+                       		write_return = PreferConst.REPRESENTATION, parallel = False, statement_timeout = None,
+                       		max_filter_depth = None, max_offset = None):
 		"""This method returns blueprint of a resource with specified options.
 
 		:param name: blueprint name
@@ -163,12 +223,29 @@ class Manager():
 		:param exclude: exclude resource fields for :class:`~stargate.serializer.Serializer`. 
 		:param decorators: view decorator functions. 
 		:param primary_key: primary key column. By default `id` will be used
+		:param relative_links: emit relative resource links. By default `Manager` setting will be used
+		:param count: how collection totals are computed: `exact`, `none`, `estimated` or `cached`
+		:param count_ttl: seconds a total is cached for in `cached` count mode
+		:param stream: stream collection responses from a server side cursor
+		:param export: register ``/<endpoint>/export`` collection export endpoint
+		:param cache: cache ``GET`` responses, ``True`` for an in-process cache shared by resources or a
+			:class:`~stargate.cache.CacheBackend` instance
+		:param cache_ttl: seconds a response is cached for
+		:param write_return: default response of POST and PATCH, `representation` or `minimal`. Clients can 
+			override it with ``Prefer: return=...`` request header
+		:param parallel: run collection total and relation queries of ``GET`` concurrently, each on its own
+			pooled connection. Database pool should be larger than :data:`~stargate.search.FAN_OUT` threads
+		:param statement_timeout: seconds collection queries may run before request fails with ``503``
+		:param max_filter_depth: maximum nesting depth of `filters`, deeper filters fail with ``422``
+		:param max_offset: maximum number of rows skipped by `page_number` pagination, further pages fail
+			with ``422``
 		:return: :class:`~flask.Blueprint`
 
 		This method register view functions using :class:`~stargate.resource_api.ResourceAPI`
 		and provide `endpoint`, `session`, `model` and `primary key`. It also register endpoint
 		using :meth:`~flask.Blueprint.add_url_rule`. Collection and instances have different 
-		HTTP methods and url schemes. Finally this method populate the namedtuple ``RESOURCE_INFO`` 
+		HTTP methods and url schemes. Finally this method populate the namedtuple ``RESOURCE_INFO`` and registers it with 
+		:data:`~stargate.resource_info.resource_info`.
 
 		"""
 
@@ -191,12 +268,28 @@ class Manager():
 			else: 
 				raise ValueError("Model {0} has no specified primary_key".format(model.__class__))
 		
+		#Index model metadata so requests don't introspect model
+		model_metadata(model)
 		#Register default serializer
 		serializer = Serializer(model, primary_key, fields=fields, exclude=exclude)
+		#Compile default serialization plan so first request doesn't pay for model inspection
+		serializer.compile()
 		#Register default deserializer
 		deserializer = Deserializer(model, self.session)
+		#Register response cache, writes to any resource invalidate it
+		response_cache = None
+		if cache:
+			backend = self.response_backend() if cache is True else cache
+			response_cache = ResponseCache(model, backend, cache_ttl)
+		register_response_cache(model, response_cache)
+		#Parallel queries hold connections of their own, reserved out of pool by `asgi_app`
+		self._parallel = self._parallel or bool(parallel)
 		#Register API View.
-		resource_api_view = ResourceAPI.as_view( apiname, self.session, model, primary_key)
+		resource_api_view = ResourceAPI.as_view( apiname, self.session, model, primary_key, 
+												count = count, count_ttl = count_ttl, stream = stream,
+												cache = response_cache, write_return = write_return,
+												parallel = parallel, replicas = self.replicas,
+												limits = QUERY_LIMITS(statement_timeout, max_filter_depth, max_offset))
 
 		#Apply resource decorators to view functions
 		for decorator in decorators_:
@@ -233,11 +326,71 @@ class Manager():
 		nested_instance_url = '{0}/<related_id>'.format(nested_collection_url)
 		self._add_endpoint(blueprint, nested_instance_url, resource_api_view ,methods=resource_methods)
 		
-		#Finally add it to registered APIs
-		self.registered_apis[model] = RESOURCE_INFO(endpoint, blueprint.name, serializer, deserializer, primary_key, apiname)
+		#Register collection export endpoint
+		if export and 'GET' in methods:
+			export_view = ExportAPI.as_view(self.api_name(endpoint + ExportConst.ENDPOINT), self.session, model,
+												replicas = self.replicas)
+			for decorator in decorators_:
+				export_view = decorator(export_view)
+			export_url = '{0}/{1}'.format(collection_url, ExportConst.ENDPOINT)
+			self._add_endpoint(blueprint, export_url, export_view, methods=frozenset(('GET',)))
+
+		if relative_links is None:
+			relative_links = self.relative_links
+
+		#Finally add it to registered APIs and global resource registry
+		view_endpoint = '.'.join((blueprint.name, apiname))
+		info = RESOURCE_INFO(endpoint, blueprint.name, serializer, deserializer, primary_key, apiname, view_endpoint, relative_links)
+		self.registered_apis[model] = info
+		resource_info.register_resource(model, info)
 
 		return blueprint		
 
+	def asgi_app(self, max_workers = None):
+		"""Return :class:`~stargate.asgi.ASGIApp` serving registered resources to an asyncio server.
+		Requests are handled by at most `max_workers` threads, by default as many as connections 
+		database pool can hand out (``SQLALCHEMY_POOL_SIZE + SQLALCHEMY_MAX_OVERFLOW``), so queued 
+		requests wait on event loop instead of holding a thread blocked on pool checkout. If a resource
+		is registered with `parallel`, connections of :data:`~stargate.search.FAN_OUT` threads are 
+		reserved out of pool as well, as each of them holds one while request waits for its queries.
+
+		:param max_workers: number of requests handled concurrently.
+
+		"""
+		if not isinstance(self.app, Flask):
+			raise RuntimeError("ASGI app requires `flask.Flask` instance")
+
+		#ASGI adapter is Python 3.7+ only
+		from .asgi import ASGIApp
+		
+		if max_workers is None:
+			capacity = self._pool_capacity()
+			if capacity is None:
+				max_workers = AsyncConst.MAX_WORKERS
+			else:
+				max_workers = capacity - FAN_OUT.max_workers if self._parallel else capacity
+		return ASGIApp(self.app, max_workers = max_workers)
+
+	def _pool_capacity(self):
+		"""Number of connections database pool can hand out, ``SQLALCHEMY_POOL_SIZE + SQLALCHEMY_MAX_OVERFLOW``.
+		``None`` if it's unbounded (negative ``SQLALCHEMY_MAX_OVERFLOW``) or app config is not available.
+		"""
+		config = getattr(self.app, 'config', None)
+		if config is None:
+			return None
+		pool_size = config.get('SQLALCHEMY_POOL_SIZE') or AsyncConst.POOL_SIZE
+		max_overflow = config.get('SQLALCHEMY_MAX_OVERFLOW')
+		max_overflow = AsyncConst.MAX_OVERFLOW if max_overflow is None else max_overflow
+		return pool_size + max_overflow if max_overflow >= 0 else None
+
+	def response_backend(self):
+		"""In-process :class:`~stargate.cache.MemoryCache` shared by resources of this manager registered 
+		with ``cache = True``. Created on first use.
+		"""
+		if self._response_backend is None:
+			self._response_backend = MemoryCache()
+		return self._response_backend
+
 	def _add_endpoint(self, blueprint, endpoint, view_func, methods=READONLY_METHODS):
 		"""Add url rule by invoking `flask.Flask.Blueprint.add_url_rule` method. Provides
 		view function and HTTP methods to add_rule.
@@ -274,11 +427,7 @@ class Manager():
 		:class:`~werkzeug.exceptions.HTTPException` raised in application.
 
 		"""
-		settings = {}
-		settings.setdefault('indent', 4)
-		settings.setdefault('sort_keys', True)
-
-		data = json.dumps(data, **settings)
+		data = dumps(data, pretty = pretty_requested())
 
 		resp = make_response(data, code)
 		resp.headers.extend(headers or {})
@@ -287,7 +436,11 @@ class Manager():
 	def _args_sanity_checks(self, name, model, methods = None,
                              url_prefix = None, endpoint = None,fields = None, 
                              validation_exceptions = (), exclude = None, 
-                             decorators = [], primary_key = None):
+                             decorators = [], primary_key = None, relative_links = None,
+                             count = CountConst.EXACT, count_ttl = CountConst.CACHE_TTL, stream = False,
+                             export = False, cache = None, cache_ttl = CacheConst.RESPONSE_TTL,
+                             write_return = PreferConst.REPRESENTATION, parallel = False, statement_timeout = None,
+                             max_filter_depth = None, max_offset = None):
 
 		"""This method is invoked from :meth:`~Manager.register_resource` to perform 
 		sanity checks on the values provided. Raises :class:`~stargate.exceptions.IllegalArgumentError`
@@ -324,6 +477,36 @@ class Manager():
 			msg = "Invalid HTTP method in list {0} for model {1}"
 			raise IllegalArgumentError(msg.format(methods, model.__name__)) 
 		
+		if count not in CountConst.MODES:
+			msg = "Invalid count mode {0} for model {1}"
+			raise IllegalArgumentError(msg.format(count, model.__name__))
+
+		if isinstance(count_ttl, bool) or not (isinstance(count_ttl, (int, float)) and count_ttl > 0):
+			msg = "Count TTL should be a positive number of seconds model {0}"
+			raise IllegalArgumentError(msg.format(model.__name__))
+
+		if write_return not in PreferConst.RETURNS:
+			msg = "Invalid write_return {0} for model {1}"
+			raise IllegalArgumentError(msg.format(write_return, model.__name__))
+
+		if statement_timeout is not None and not (isinstance(statement_timeout, (int, float)) and statement_timeout > 0):
+			msg = "Statement timeout should be a positive number of seconds model {0}"
+			raise IllegalArgumentError(msg.format(model.__name__))
+
+		for name, limit in (('max_filter_depth', max_filter_depth), ('max_offset', max_offset)):
+			if limit is not None and not (isinstance(limit, int) and limit >= 0):
+				msg = "{0} should be a non negative integer model {1}"
+				raise IllegalArgumentError(msg.format(name, model.__name__))
+
+		capacity = self._pool_capacity()
+		if parallel and capacity is not None and capacity <= FAN_OUT.max_workers:
+			msg = "Database pool of {0} connections can't serve {1} parallel query threads and requests model {2}"
+			raise IllegalArgumentError(msg.format(capacity, FAN_OUT.max_workers, model.__name__))
+
+		if cache not in (None, True, False) and not isinstance(cache, CacheBackend):
+			msg = "Cache should be `True` or a `CacheBackend` instance model {0}"
+			raise IllegalArgumentError(msg.format(model.__name__))
+
 		for decorator in decorators:
 			if not callable(decorator):
 				msg = "Decorator should be callable model {0} decorator {1}"
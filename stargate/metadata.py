@@ -0,0 +1,74 @@
+"""Model metadata index. Everything stargate needs to know about a model class (relations, primary
+key, columns and their types, hybrid properties) is read from SQLAlchemy mapper once and kept here,
+so request handling never introspects a model again. Index of a registered model is built by
+:meth:`~stargate.manager.Manager.create_resource_blueprint`, other models are indexed on first use.
+
+"""
+
+from collections import namedtuple
+from sqlalchemy.inspection import inspect as sqlalchemy_inspect
+from sqlalchemy.ext.associationproxy import AssociationProxy
+from sqlalchemy.ext.hybrid import HYBRID_PROPERTY
+
+#Namedtuple holding metadata of a model class.
+#`relations` maps relation name to `RELATION_METADATA`, `relation_names` is sorted. `columns` are column
+#attribute names in mapper order and `column_types` maps them to SQLAlchemy types. `foreign_keys` are
+#names of foreign key columns, `hybrids` names of hybrid properties and `readonly` names of descriptors
+#that can't be set.
+MODEL_METADATA = namedtuple('MODEL_METADATA', ['model', 'pk_names', 'pk_attributes', 'columns', 'column_types',
+                                               'foreign_keys', 'hybrids', 'relations', 'relation_names', 'readonly'])
+#Namedtuple holding a relation of a model. `direction`, `uselist` and `lazy` are those of relationship
+#property (of local side for association proxies), `prop` is the property itself or ``None`` for association proxies.
+RELATION_METADATA = namedtuple('RELATION_METADATA', ['name', 'related_model', 'direction', 'uselist', 'lazy', 'prop'])
+
+_INDEX = {}
+
+def model_metadata(model):
+    """Return `MODEL_METADATA` of `model`, building it on first call.
+    """
+    try:
+        return _INDEX[model]
+    except KeyError:
+        metadata = _INDEX[model] = build_metadata(model)
+        return metadata
+
+def build_metadata(model):
+    """Read `MODEL_METADATA` of `model` from its mapper.
+    """
+    mapper = sqlalchemy_inspect(model)
+
+    pk_names = tuple(mapper.get_property_by_column(column).key for column in mapper.primary_key)
+    pk_attributes = tuple(getattr(model, name) for name in pk_names)
+
+    columns = tuple(mapper.column_attrs.keys())
+    column_types = dict((prop.key, prop.columns[0].type) for prop in mapper.column_attrs)
+    foreign_keys = frozenset(column.name for column in mapper.columns if column.foreign_keys)
+
+    relations = {}
+    for prop in mapper.relationships:
+        relations[prop.key] = RELATION_METADATA(prop.key, prop.mapper.class_, prop.direction,
+                                                prop.uselist, prop.lazy, prop)
+
+    hybrids = []
+    readonly = set()
+    for name, descriptor in mapper.all_orm_descriptors.items():
+        if name == '__mapper__':
+            continue
+        if descriptor.extension_type == HYBRID_PROPERTY:
+            hybrids.append(name)
+        if getattr(descriptor, 'fset', False) is None:
+            readonly.add(name)
+        attribute = getattr(model, name, None)
+        if isinstance(attribute, AssociationProxy):
+            relations[name] = _proxy_metadata(name, attribute)
+
+    return MODEL_METADATA(model, pk_names, pk_attributes, columns, column_types, foreign_keys, tuple(hybrids),
+                          relations, tuple(sorted(relations)), frozenset(readonly))
+
+def _proxy_metadata(name, proxy):
+    """`RELATION_METADATA` of an association proxy, related model is the model of proxied attribute.
+    """
+    local = proxy.local_attr.property
+    remote = proxy.remote_attr.property
+    related_mapper = getattr(remote, 'mapper', None) or remote.parent
+    return RELATION_METADATA(name, related_mapper.class_, local.direction, local.uselist, local.lazy, None)
@@ -1,11 +1,57 @@
 """Representation class for API. Provides Collection, and Instance representation according to API format.
 Provides data, links, link header etc. Custom headers can be injected by using `_HEADERS` inside `meta` key.
+Response documents are encoded compactly by :func:`dumps`, pretty printed only if requested.
 
 """
-from flask import request, make_response, jsonify, json
+import hashlib
+from datetime import date, time, timedelta
+from flask import request, make_response, jsonify, json, Response, stream_with_context
 from .resource_info import resource_info
-from .utils import get_paginated_url, get_pagination_links
-from .const import ResourceInfoConst, SerializationConst, MediatypeConstants
+from .utils import get_paginated_url, get_pagination_links, get_cursor_links
+from .const import ResourceInfoConst, SerializationConst, MediatypeConstants, QueryStringConst
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class JSONEncoder(json.JSONEncoder):
+    """JSON encoder for response documents. Encodes date, time and datetime values
+    in ISO 8601 format and intervals as number of seconds.
+    """
+    def default(self, o):
+        if isinstance(o, (date, time)):
+            return o.isoformat()
+        if isinstance(o, timedelta):
+            return o.total_seconds()
+        return super(JSONEncoder, self).default(o)
+
+def _fast_default(o):
+    """`default` hook of fast backend for types it can't encode natively.
+    """
+    if isinstance(o, timedelta):
+        return o.total_seconds()
+    return JSONEncoder().default(o)
+
+def dumps(document, pretty = False):
+    """Encode response document to JSON string. Compact output is produced using `orjson` 
+    if it is installed. Pretty output is indented with sorted keys.
+
+    :param document: Response document.
+    :param pretty: Indent output.
+
+    """
+    if pretty:
+        return json.dumps(document, cls = JSONEncoder, indent = 4, sort_keys = True)
+    if orjson is not None:
+        return orjson.dumps(document, default = _fast_default).decode('utf-8')
+    return json.dumps(document, cls = JSONEncoder, separators = (',', ':'))
+
+def pretty_requested():
+    """Check `pretty` query string option of current request.
+    """
+    value = request.args.get(QueryStringConst.PRETTY)
+    return value is not None and value.lower() not in ('0', 'false', 'no')
 
 class Representation():
     """Response Representation class. This class is used in view functions to generate appropriate
@@ -18,6 +64,8 @@ class Representation():
     :param message: Status message if any.
     :param content_type: Content Type for response. 
     :param headers: Additional Headers. 
+
+    Response body is compact JSON unless ``pretty`` query string option is provided.
         
       """  
     _response_message = {200: 'Ok.', 201: "Created", 204: "No Content"}
@@ -33,11 +81,7 @@ class Representation():
         
         headers = self.__base_repr__['meta'].pop('_HEADERS', {}) if 'meta' in self.__base_repr__ else {}
         
-        settings = {}
-        settings.setdefault('indent', 20)
-        settings.setdefault('sort_keys', True)
-        
-        response_doc = json.dumps(self.__base_repr__, **settings)
+        response_doc = dumps(self.__base_repr__, pretty = pretty_requested())
         response = make_response(response_doc)
         
         if headers:
@@ -52,12 +96,15 @@ class InstanceRepresentation(Representation):
     :param model: Resource Model Class.
     :param pk_id: Primary key id for resource.
     :param data: Serialized data. 
+    :param last_modified: Modification time of resource. If provided response has ``Last-Modified``
+        header and a weak ``ETag`` from :func:`resource_etag`.
     :param *args: Additional list arguments for Parent class. 
     :param **kw: Additional key word arguments for Parent class.
 
     """
     def __init__(self, model, pk_id, data, *args, **kw):
         
+        self.last_modified = kw.pop('last_modified', None)
         super(InstanceRepresentation, self).__init__(*args, **kw)
         self.model = model
         self.pk_id = pk_id
@@ -69,9 +116,27 @@ class InstanceRepresentation(Representation):
         
         self.__base_repr__['meta']['_HEADERS']['rel'] = self_link
         self.__base_repr__[SerializationConst.DATA] = self.data
-        return super(InstanceRepresentation,self).to_response()
+        response = super(InstanceRepresentation,self).to_response()
+        if self.last_modified is not None:
+            set_validators(response, self.model, self.pk_id, self.last_modified)
+        return response
                
 
+def resource_etag(model, pk_id, last_modified):
+    """Weak ETag value of a resource representation built from its modification time and request query
+    string, so it can be computed without loading resource.
+    """
+    args = sorted(request.args.items(multi = True))
+    key = json.dumps([model.__name__, str(pk_id), last_modified.isoformat(), args])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+def set_validators(response, model, pk_id, last_modified):
+    """Set ``ETag`` and ``Last-Modified`` headers of a resource `response`.
+    """
+    response.set_etag(resource_etag(model, pk_id, last_modified), weak = True)
+    response.last_modified = last_modified
+    return response
+
 class CollectionRepresentation(Representation):
     """This class override default Representation class to provide Collection Representation
     according to API specification.
@@ -89,10 +154,59 @@ class CollectionRepresentation(Representation):
         self.model = model
 
     def to_response(self, page_size = None, page_number = None, pagination = None):
+        """Make response of collection. If `pagination` is a cursor page (see 
+        :class:`~stargate.search.CursorPagination`) only `self`, `next` and `prev` links
+        are rendered and `num_results` is omitted. `num_results` and `last` link are omitted 
+        as well if total was not counted.
+        """
+        self_link = self._add_pagination(page_size, page_number, pagination)
         
+        self.__base_repr__['meta']['_HEADERS']['rel'] = self_link
+        self.__base_repr__[SerializationConst.DATA] = self.data
+        
+        return super(CollectionRepresentation,self).to_response()
+
+    def to_stream_response(self, page_size, page_number, pagination):
+        """Make streamed response of a :class:`~stargate.search.StreamedPagination` page. In this
+        case `data` should be an iterable of serialized chunks. Each chunk is encoded and written as 
+        soon as it is serialized, pagination links and `num_results` are written after last chunk.
+
+        First chunk is fetched and serialized before response is started, so a failing query or 
+        serialization still results in an error response. An error in a later chunk can only 
+        truncate response body.
+        """
+        headers = self.__base_repr__['meta'].pop('_HEADERS', {})
+        headers['rel'] = get_paginated_url(resource_info(ResourceInfoConst.URL, self.model), page_number, page_size)
+        chunks = iter(self.data)
+        first = next(chunks, None)
+
+        def generate():
+            yield '{{"{0}":['.format(SerializationConst.DATA)
+            if first is not None:
+                yield ','.join(dumps(row) for row in first)
+                for rows in chunks:
+                    yield ',' + ','.join(dumps(row) for row in rows)
+            self._add_pagination(page_size, page_number, pagination)
+            yield '],' + dumps(self.__base_repr__)[1:]
+
+        response = Response(stream_with_context(generate()))
+        for key, value in headers.items():
+            response.headers.set(key, value)
+        return response
+
+    def _add_pagination(self, page_size, page_number, pagination):
+        """Add `num_results` and pagination links to representation. Returns self link.
+        """
         self_link =  resource_info(ResourceInfoConst.URL, self.model)
+        relative = resource_info(ResourceInfoConst.RELATIVE_LINKS, self.model)
         
-        if pagination is not None and page_number is not None and page_size is not None:
+        if pagination is not None and hasattr(pagination, 'next_cursor'):
+            links = get_cursor_links(pagination.page_size, pagination.cursor, pagination.next_cursor, pagination.prev_cursor,
+                                     relative = relative)
+            self_link = links.pop('self')
+            self.__base_repr__[SerializationConst.LINKS] = links
+
+        elif pagination is not None and page_number is not None and page_size is not None:
             num_results = pagination.total
             first = 1
             last = pagination.pages
@@ -102,10 +216,31 @@ class CollectionRepresentation(Representation):
             page_number = page_number
         
             self_link = get_paginated_url(self_link, page_number, page_size)
-            self.__base_repr__[SerializationConst.NUM_RESULTS] = num_results
-            self.__base_repr__[SerializationConst.LINKS] = get_pagination_links(page_size, page_number, num_results, first, last, next, prev)
+            if num_results is not None:
+                self.__base_repr__[SerializationConst.NUM_RESULTS] = num_results
+            self.__base_repr__[SerializationConst.LINKS] = get_pagination_links(page_size, page_number, num_results, first, last, next, prev,
+                                                                                   relative = relative)
         
-        self.__base_repr__['meta']['_HEADERS']['rel'] = self_link
-        self.__base_repr__[SerializationConst.DATA] = self.data
+        return self_link
+
+class BulkRepresentation(Representation):
+    """This class override default Representation class to report outcome of a bulk operation 
+    on collection, `num_results` is the number of affected resources.
+
+    :param model: Resource Model Class.
+    :param num_results: Number of affected resources. 
+    :param *args: Additional list arguments for Parent class. 
+    :param **kw: Additional key word arguments for Parent class.
+
+    """
+    def __init__(self, model, num_results, *args, **kw):
         
-        return super(CollectionRepresentation,self).to_response()
+        super(BulkRepresentation, self).__init__(*args, **kw)
+        self.model = model
+        self.num_results = num_results
+
+    def to_response(self):
+
+        self.__base_repr__['meta']['_HEADERS']['rel'] = resource_info(ResourceInfoConst.URL, self.model)
+        self.__base_repr__[SerializationConst.NUM_RESULTS] = self.num_results
+        return super(BulkRepresentation,self).to_response()
@@ -3,17 +3,28 @@ Endpoint for methods may vary in case of collection and instance. Support all db
 which can result in case of mentioned HTTP methods. More options can be found in docs of individual func.
 
 """
-from flask import request, json, jsonify
+import csv
+import io
+from datetime import date, time
+from flask import request, json, jsonify, Response, stream_with_context
+from werkzeug.http import is_resource_modified
 from flask.views import MethodView
 from .resource_info import resource_info
-from .decorators import catch_processing_exceptions, catch_integrity_errors, requires_api_accept, requires_api_mimetype
+from .decorators import catch_processing_exceptions, catch_integrity_errors, requires_api_accept, requires_api_mimetype, \
+						cached_response, invalidates_responses, conditional_response, pins_primary
 from .exception import ValidationError, DatabaseError, MissingData, MissingPrimaryKey, UnknownField, UnknownRelation
-from .search import Search, session_query
+from .search import Search, CursorPagination, StreamedPagination, session_query, NO_LIMITS
 from .utils import get_related_model, get_relations
-from .representation import InstanceRepresentation, CollectionRepresentation
+from .deserializer import resolve_related
+from .routing import read_session
+from .metadata import model_metadata
+from sqlalchemy.orm.interfaces import MANYTOONE
+from .representation import InstanceRepresentation, CollectionRepresentation, BulkRepresentation, dumps, \
+						set_validators, resource_etag, pretty_requested
 from flask_sqlalchemy import Pagination
 from .utils import get_resource, is_like_list, has_field, string_to_datetime
-from .const import PaginationConst, QueryStringConst, ResourceInfoConst, SerializationConst
+from .const import PaginationConst, QueryStringConst, ResourceInfoConst, SerializationConst, CountConst, ExportConst, \
+						ResourceConst, PreferConst
 
 class ResourceAPI(MethodView):
 	"""This class is used to provide view functions against resources. By default on ``GET`` method
@@ -21,7 +32,8 @@ class ResourceAPI(MethodView):
 	parameter that parent class :class:`~flask.views.MethodView` provides.
 
 	It applies :meth:`~stargate.decorators.requires_api_accept`, :meth:`~stargate.decorators.requires_api_mimetype`
-	:meth:`~stargate.decorators.catch_processing_exceptions` decorators by default.
+	:meth:`~stargate.decorators.catch_processing_exceptions` and :meth:`~stargate.decorators.conditional_response`
+	decorators by default.
 
 	Example usage for this class: 
 
@@ -37,14 +49,36 @@ class ResourceAPI(MethodView):
 		#MethodView args example
 		ResourceAPI.as_view(session, model, primary_key = 'ser_id', _external=True)
 
+		#Skip collection total by default
+		ResourceAPI.as_view(session, model, count = CountConst.NONE)
+
+		#Cache GET responses
+		ResourceAPI.as_view(session, model, cache = ResponseCache(model, MemoryCache()))
+
+		#Answer writes with id, link and written attributes only
+		ResourceAPI.as_view(session, model, write_return = PreferConst.MINIMAL)
+
+		#Count collections and load relations concurrently
+		ResourceAPI.as_view(session, model, parallel = True)
+
+		#Serve GET from read replicas
+		ResourceAPI.as_view(session, model, replicas = ReadReplicas(replica_engine))
+
+		#Abort collection queries after 2 seconds
+		ResourceAPI.as_view(session, model, limits = QUERY_LIMITS(2, None, None))
+
 	"""
 	decorators = [  
                     requires_api_accept, 
                     requires_api_mimetype,
-                    catch_processing_exceptions
+                    catch_processing_exceptions,
+                    conditional_response
                  ]
 
-	def __init__(self, session, model, primary_key = None,*args,**kw):
+	def __init__(self, session, model, primary_key = None, count = CountConst.EXACT, 
+				count_ttl = CountConst.CACHE_TTL, stream = False, cache = None, 
+				write_return = PreferConst.REPRESENTATION, parallel = False, replicas = None, 
+				limits = NO_LIMITS, *args,**kw):
         
 		super(ResourceAPI, self).__init__(*args,**kw)
 
@@ -54,8 +88,17 @@ class ResourceAPI(MethodView):
 		self.model = model
 
 		self.primary_key = primary_key
+		self.count = count
+		self.count_ttl = count_ttl
+		self.stream = stream
+		self.cache = cache
+		self.write_return = write_return
+		self.parallel = parallel
+		self.replicas = replicas
+		self.limits = limits
 				
 
+	@cached_response
 	def get(self, pk_id = None, relation = None, related_id = None):
 		"""Provides HTTP GET Method against a resource. Can be a collection or single instance.
 		For more information about method and options check `get method`
@@ -66,7 +109,20 @@ class ResourceAPI(MethodView):
 		:param related_id: primary key id od related resource 
 		:return: :class:`~stargate.representation.Representation`
 
-		For request query string options check `docs get.collection`
+		For request query string options check `docs get.collection`. Collections are paginated
+		by `page_number` unless `cursor` is present in query string, in which case keyset pagination
+		is used (see :meth:`~stargate.search.Search._search_keyset`). `count` query string option
+		overrides how collection total is computed (see :meth:`~stargate.search.Search._paginate`), 
+		only towards a cheaper mode than resource default: clients can skip count of any resource 
+		and choose any mode of a resource counted exactly.
+		If `stream` is enabled collection pages are fetched from a server side cursor and written 
+		to response as they are serialized. If `cache` is set responses are served from it, see
+		:class:`~stargate.cache.ResponseCache`.
+
+		Responses carry an ``ETag`` and conditional requests are answered with ``304 Not Modified``.
+		Resources with ``updated_at`` column and no to-many relations requested without `expand` 
+		are validated by modification time instead, so a conditional request is answered from 
+		``SELECT updated_at`` alone (see :meth:`ResourceAPI._not_modified`).
 		
 		"""
 		try:
@@ -81,6 +137,11 @@ class ResourceAPI(MethodView):
 			fields = query_string[QueryStringConst.FIELDS] if QueryStringConst.FIELDS in query_string else []
 			exclude = query_string[QueryStringConst.EXCLUDE] if QueryStringConst.EXCLUDE in query_string else []
 			expand = query_string[QueryStringConst.EXPAND] if QueryStringConst.EXPAND in query_string else None
+			cursor = query_string[QueryStringConst.CURSOR].strip() if QueryStringConst.CURSOR in query_string else None
+			count = query_string[QueryStringConst.COUNT] if QueryStringConst.COUNT in query_string else self.count
+			stream = query_string[QueryStringConst.STREAM].lower() not in ('0', 'false', 'no') if QueryStringConst.STREAM in query_string else self.stream
+			#Pretty printed responses are indented as a whole, hence never streamed
+			stream = stream and not pretty_requested()
 			page_number = int(query_string[QueryStringConst.PAGE_NUMBER]) if QueryStringConst.PAGE_NUMBER in query_string else PaginationConst.PAGE_NUMBER
 			page_size = int(query_string[QueryStringConst.PAGE_SIZE]) if QueryStringConst.PAGE_SIZE in query_string else PaginationConst.PAGE_SIZE
 			page_size = page_size if page_size <= PaginationConst.MAX_PAGE_SIZE else PaginationConst.MAX_PAGE_SIZE
@@ -88,6 +149,11 @@ class ResourceAPI(MethodView):
 		except Exception  as e:
 			raise ValidationError(msg=str(e))
 
+		if count not in CountConst.MODES:
+			raise ValidationError(msg="Unknown count mode {0}".format(count))
+		if count not in (self.count, CountConst.NONE) and self.count != CountConst.EXACT:
+			count = self.count
+
 		"""Parse params received in request query string
 		"""
 		if filters:
@@ -117,15 +183,24 @@ class ResourceAPI(MethodView):
 		
 		try:
 			#initilize search query
-			search_obj = Search(self.session, self.model, relation = relation)
+			search_obj = Search(read_session(self.session, self.replicas), self.model, relation = relation, count = count, count_ttl = self.count_ttl,
+								parallel = self.parallel, limits = self.limits)
 		except Exception as exception:
 			detail = 'Unable to construct query {0}'
 			raise DatabaseError(msg=detail.format(exception))
 
+		#Resource validated by modification time
+		validate_time = pk_id is not None and relation is None and expand is None and self._row_validated()
+		if validate_time and (request.if_none_match or request.if_modified_since):
+			response = self._not_modified(search_obj, pk_id)
+			if response is not None:
+				return response
+
 		#Search collection/resource using meth: `stargate.search.Search.search_resource`.
 		result_set = search_obj.search_resource(pk_id, related_id, filters = filters, sort = sort, 
 												group_by = group_by, page_size = page_size, 
-												page_number = page_number)
+												page_number = page_number, expand = expand, cursor = cursor,
+												stream = stream, fields = fields, exclude = exclude)
 		
 		#If related collection/resource get serializer for related model else primary model.
 		if relation is None:
@@ -137,17 +212,49 @@ class ResourceAPI(MethodView):
 		`stargate.representation.CollectionRepresentation` otherwise 
 		`stargate.representation.InstanceRepresentation`
 		"""
-		if isinstance(result_set, Pagination):
-			data = serializer(result_set.items, fields = fields, exclude = exclude, expand = expand)
+		if isinstance(result_set, StreamedPagination):
+			data = (serializer(chunk, fields = fields, exclude = exclude, expand = expand, prefetched = search_obj.prefetched)
+					for chunk in result_set.chunks())
+			representation = CollectionRepresentation(self.model, data, 200)
+			return representation.to_stream_response(page_size, page_number, result_set)
+
+		elif isinstance(result_set, (Pagination, CursorPagination)):
+			data = serializer(result_set.items, fields = fields, exclude = exclude, expand = expand, prefetched = search_obj.prefetched)
 			representation = CollectionRepresentation(self.model, data, 200)
 			return representation.to_response(page_size = page_size, page_number = page_number, pagination = result_set)
 		else:
 			data = serializer(result_set, fields = fields, exclude = exclude, expand = expand)
-			representation = InstanceRepresentation(self.model, pk_id, data, 200)
+			last_modified = getattr(result_set, ResourceConst.UPDATED_AT_COLUMN, None) if validate_time else None
+			representation = InstanceRepresentation(self.model, pk_id, data, 200, last_modified = last_modified)
 			return representation.to_response()
 
+	def _row_validated(self):
+		"""`True` if representation of a resource only depends on its own row, i.e. every relation embedded
+		in it is many-to-one and its link changes along with a foreign key of resource. Meta of to-many relations
+		(their existence and page links of ``lazy='dynamic'`` ones) changes with related rows while ``updated_at``
+		of resource doesn't, so such resources are validated by body.
+		"""
+		return all(relation.prop is not None and relation.direction is MANYTOONE
+					for relation in model_metadata(self.model).relations.values())
+
+	def _not_modified(self, search_obj, pk_id):
+		"""Return ``304 Not Modified`` response if conditional request matches ``updated_at`` of resource,
+		read with :meth:`~stargate.search.Search.last_modified`. Returns ``None`` otherwise, in which case
+		resource is loaded and serialized as usual.
+		"""
+		last_modified = search_obj.last_modified(pk_id)
+		if last_modified is None:
+			return None
+		
+		etag = resource_etag(self.model, pk_id, last_modified)
+		if is_resource_modified(request.environ, etag = etag, last_modified = last_modified):
+			return None
+		return set_validators(Response(status = 304), self.model, pk_id, last_modified)
+
 		
 
+	@invalidates_responses
+	@pins_primary
 	def post(self):
 		"""Create resource against data provided in payload. 
 		
@@ -159,6 +266,13 @@ class ResourceAPI(MethodView):
 		
 		For more information on POST method and payload options check `post method docs`
 
+		If `data` is a JSONArray every object is created in a single transaction and response
+		`data` is a list of `{primary_key: value, _link: url}` for created resources, in payload order.
+
+		Response of a single resource is either its representation with every relation expanded or, 
+		if ``Prefer: return=minimal`` is requested (or is resource default), its primary key, link and 
+		attributes of payload, see :meth:`ResourceAPI._return_preference`.
+
 		"""
 		try:
 			#Load JSON from payload
@@ -167,14 +281,27 @@ class ResourceAPI(MethodView):
 		except Exception as exception:
 			raise ValidationError("Unable to decode Request Body : ".format(str(exception)))
 
+		#Names of written attributes, payload is consumed by deserializer
+		payload = data.get(SerializationConst.DATA)
+		written = list(payload.get(SerializationConst.ATTRIBUTES) or ()) if isinstance(payload, dict) else None
+
 		try:
 			#Deserialize data
 			deserializer = resource_info(ResourceInfoConst.DESERIALIZER, self.model)
 			instance = deserializer(data)
-			#Add object to db session
-			self.session.add(instance)
+			#Add object(s) to db session, inserts are batched per table in one flush
+			if isinstance(instance, list):
+				self.session.add_all(instance)
+			else:
+				self.session.add(instance)
 		
 			self.session.flush()
+			#Read generated keys (and written attributes) before commit expires instances
+			pk_name = resource_info(ResourceInfoConst.PRIMARY_KEY, self.model)
+			pk_vals = [getattr(inst, pk_name) for inst in instance] if isinstance(instance, list) else None
+			preference, applied = self._return_preference()
+			if pk_vals is None and preference == PreferConst.MINIMAL:
+				result = self._minimal(instance, pk_name, written)
 			self.session.commit()
 		
 		except Exception as ex:
@@ -182,6 +309,15 @@ class ResourceAPI(MethodView):
 			self.session.close()
 			raise DatabaseError("Unable to save object Error: `{0}`".format(str(ex)))
 
+		if pk_vals is not None:
+			result = [self._created(pk_name, pk_val) for pk_val in pk_vals]
+			representation = CollectionRepresentation(self.model, result, 201)
+			return representation.to_response()
+
+		if preference == PreferConst.MINIMAL:
+			representation = InstanceRepresentation(self.model, result[pk_name], result, 201)
+			return self._applied(representation.to_response(), preference, applied)
+
 		#FIXME: How to return response as representation?
 		#Get all relations for serialization
 		relations = get_relations(self.model)
@@ -190,16 +326,53 @@ class ResourceAPI(MethodView):
 		#Serialize data with all resource expanded
 		result = serializer(instance, expand = relations)
 		
-		pk_name = resource_info(ResourceInfoConst.PRIMARY_KEY, self.model)
 		pk_val = getattr(instance, pk_name)
 		representation = InstanceRepresentation(self.model, pk_val, result, 201)
 
-		return representation.to_response()
+		return self._applied(representation.to_response(), preference, applied)
+
+	def _created(self, pk_name, pk_val):
+		"""Compact representation of a resource created in bulk POST.
+		"""
+		return {pk_name: pk_val, '_link': resource_info(ResourceInfoConst.URL, self.model, pk_id = pk_val)}
+
+	def _minimal(self, instance, pk_name, written):
+		"""Minimal representation of a written resource: primary key, link and `written` attributes.
+		Only columns serialized in full representation of resource are included, so `fields` and `exclude`
+		of resource apply. Must be called after flush and before commit, so no attribute is reloaded.
+		"""
+		columns = resource_info(ResourceInfoConst.SERIALIZER, self.model).compile(self.model).columns
+		result = self._created(pk_name, getattr(instance, pk_name))
+		result[SerializationConst.ATTRIBUTES] = dict((field, getattr(instance, field)) for field in written or ()
+													if field != pk_name and field in columns)
+		return result
+
+	def _return_preference(self):
+		"""Return preference of write response, `minimal` or `representation`, and whether it was requested
+		by ``Prefer`` header (``Prefer: return=minimal``). Resource default (`write_return`) is used if
+		request doesn't specify one.
+		"""
+		for preference in request.headers.get(PreferConst.HEADER, '').split(','):
+			name, _, value = preference.partition('=')
+			value = value.strip().strip('"').lower()
+			if name.strip().lower() == PreferConst.RETURN and value in PreferConst.RETURNS:
+				return value, True
+		return self.write_return, False
+
+	def _applied(self, response, preference, applied):
+		"""Set ``Preference-Applied`` header of `response` if preference was requested.
+		"""
+		if applied:
+			response.headers.set(PreferConst.APPLIED_HEADER, '{0}={1}'.format(PreferConst.RETURN, preference))
+		return response
 
-	def patch(self, pk_id):
+	@invalidates_responses
+	@pins_primary
+	def patch(self, pk_id = None):
 		"""Update resource(s) against data provided in payload. Can create new resources on fly as well
 		
-		:param pk_id: primary key id of resource to be updated.
+		:param pk_id: primary key id of resource to be updated. If it is not provided collection is
+			updated in bulk, see :meth:`ResourceAPI._bulk_patch`.
 		:return: :class:`~stargate.representation.Representation` instance.
 
 		Raise following exceptions:
@@ -213,19 +386,27 @@ class ResourceAPI(MethodView):
 
 		For more information on PATCH method and payload options check `post method docs`
 
+		Response is resource representation with every relation expanded, or its primary key, link and 
+		updated attributes if ``Prefer: return=minimal`` is requested (or is resource default).
+
 		"""
 		try:
 			data = json.loads(request.get_data()) or {}
 		except Exception as exception:
 			raise ValidationError("Unable to decode Request Body : ".format(str(exception)))
 		
-		primary_resource = get_resource(self.session, self.model, pk_id)
+		if pk_id is None:
+			return self._bulk_patch(data)
+
+		primary_resource = get_resource(self.session, self.model, pk_id, cached = True)
 		#get data out of payload
 		data = data.pop(SerializationConst.DATA, {})
 		#Get embedded resource
 		links = data.pop(SerializationConst.EMBEDDED, {})
 		#Get all relations of primary resource
 		all_links = get_relations(self.model)
+		#Fetch related resources linked by primary key, one query per related model
+		resolved = resolve_related(self.session, self.model, [links])
 		
 		for linkname, link in links.items():
 			if SerializationConst.DATA not in link:
@@ -246,8 +427,7 @@ class ResourceAPI(MethodView):
 				for rel in linkage:
 					
 					if fk_name in rel:
-						inst = get_resource(self.session, related_model, rel[fk_name])
-						newvalue.append(inst)
+						newvalue.append(resolved[related_model][rel[fk_name]])
 					else:
 						raise MissingPrimaryKey(rel)
 			
@@ -258,8 +438,7 @@ class ResourceAPI(MethodView):
 				else:
 					fk_name = resource_info(ResourceInfoConst.PRIMARY_KEY, related_model)
 					if fk_name in linkage:
-						inst = get_resource(self.session, related_model, linkage[fk_name])
-						newvalue = inst
+						newvalue = resolved[related_model][linkage[fk_name]]
 					else:
 						raise MissingPrimaryKey(msg="Missing primary key in request")
 
@@ -280,24 +459,33 @@ class ResourceAPI(MethodView):
 		if data:
 			for field, value in data.items():
 				setattr(primary_resource, field, value)
+		
+		preference, applied = self._return_preference()
 		try:
 			self.session.add(primary_resource)
 			self.session.flush()
+			if preference == PreferConst.MINIMAL:
+				pk_name = resource_info(ResourceInfoConst.PRIMARY_KEY, self.model)
+				result = self._minimal(primary_resource, pk_name, data)
 			self.session.commit()
 		except Exception as e:
 			raise DatabaseError("Unable to update resource: {0}".format(str(e)))
 		
-		#FIXME: How to return proper representation using API response style?
-		serializer = resource_info(ResourceInfoConst.SERIALIZER, self.model)
-		result = serializer(primary_resource, expand = ','.join(all_links))
+		if preference != PreferConst.MINIMAL:
+			#FIXME: How to return proper representation using API response style?
+			serializer = resource_info(ResourceInfoConst.SERIALIZER, self.model)
+			result = serializer(primary_resource, expand = ','.join(all_links))
 		
 		repr = InstanceRepresentation(self.model, pk_id, result, 200)
-		return repr.to_response()
+		return self._applied(repr.to_response(), preference, applied)
 
-	def delete(self, pk_id):
+	@invalidates_responses
+	@pins_primary
+	def delete(self, pk_id = None):
 		"""Delete resource against id provided in path param.
 
-		:param pk_id: primary key id of resource to be updated.
+		:param pk_id: primary key id of resource to be updated. If it is not provided resources of 
+			collection are deleted in bulk, see :meth:`ResourceAPI._bulk_delete`.
 		:return: :class:`~stargate.representation.Representation` instance.
 		
 		Raise following exception if operation fail:
@@ -307,6 +495,9 @@ class ResourceAPI(MethodView):
 		For more information on DELETE method and payload options check `post method docs`
 
 		"""
+		if pk_id is None:
+			return self._bulk_delete()
+
 		try:
 			resource = get_resource(self.session, self.model, pk_id)
 			self.session.delete(resource)
@@ -314,4 +505,188 @@ class ResourceAPI(MethodView):
 		except Exception as e:
 			raise DatabaseError("Unable to Delete resource: {0}".format(str(e)))
 
-		return jsonify({'status_code': 204, 'message': 'No Content'})
\ No newline at end of file
+		return jsonify({'status_code': 204, 'message': 'No Content'})
+
+	def _bulk_patch(self, data):
+		"""Update attributes of all collection resources matching `ids` or `filters` given in payload
+		with a single ``UPDATE ... WHERE`` statement. Relations (`_embedded`) can't be updated in bulk.
+
+		Example payload:
+
+		.. code-block:: json
+
+			{"filters": [{"name": "age", "op": "lt", "val": 18}], "data": {"attributes": {"age": 18}}}
+
+		:param data: JSON request payload.
+		:return: :class:`~stargate.representation.BulkRepresentation` with number of updated resources.
+
+		"""
+		query = self._bulk_query(data)
+		data = data.get(SerializationConst.DATA) or {}
+		
+		if data.get(SerializationConst.EMBEDDED):
+			raise ValidationError(msg="Relations can not be updated in bulk")
+
+		data = data.get(SerializationConst.ATTRIBUTES) or {}
+		if not data:
+			raise MissingData(self.model)
+
+		for field in data:
+			if not has_field(self.model, field):
+				raise UnknownField(field, self.model.__name__)
+		
+		data = dict((k, string_to_datetime(self.model, k, v)) for k, v in data.items())
+		
+		try:
+			num_results = query.update(data, synchronize_session = False)
+			self.session.commit()
+		except Exception as e:
+			self.session.rollback()
+			raise DatabaseError("Unable to update resources: {0}".format(str(e)))
+
+		return BulkRepresentation(self.model, num_results, 200).to_response()
+
+	def _bulk_delete(self):
+		"""Delete all collection resources matching `ids` or `filters` given in payload, or `filters`
+		request query string option, with a single ``DELETE ... WHERE`` statement. ORM level cascades
+		are not applied, database ``ON DELETE`` rules are.
+
+		:return: :class:`~stargate.representation.BulkRepresentation` with number of deleted resources.
+
+		"""
+		try:
+			data = json.loads(request.get_data() or '{}') or {}
+			if QueryStringConst.FILTER in request.args:
+				data[SerializationConst.FILTERS] = json.loads(request.args[QueryStringConst.FILTER])
+		except Exception as exception:
+			raise ValidationError(msg="Unable to decode Request Body : {0}".format(str(exception)))
+
+		query = self._bulk_query(data)
+		
+		try:
+			num_results = query.delete(synchronize_session = False)
+			self.session.commit()
+		except Exception as e:
+			self.session.rollback()
+			raise DatabaseError("Unable to Delete resources: {0}".format(str(e)))
+
+		return BulkRepresentation(self.model, num_results, 200).to_response()
+
+	def _bulk_query(self, data):
+		"""Build query selecting resources targeted by bulk operation. Raise 
+		:class:`~stargate.exception.ValidationError` if neither `ids` nor `filters` is given, 
+		so a bulk operation never targets whole collection by accident.
+		"""
+		ids = data.get(SerializationConst.IDS)
+		filters = data.get(SerializationConst.FILTERS)
+		
+		if not ids and not filters:
+			raise ValidationError(msg="Bulk operation requires `ids` or `filters`")
+		
+		if ids and not isinstance(ids, list):
+			raise ValidationError(msg="`ids` must be a list of primary keys")
+		
+		if filters and not isinstance(filters, list):
+			filters = [filters]
+
+		return Search(self.session, self.model).bulk_query(ids = ids, filters = filters)
+
+
+class ExportAPI(MethodView):
+	"""This class is used to export complete collection of a resource. Only ``GET`` is exposed.
+	It honours `filters`, `sort` and `field` request query string options of
+	:meth:`ResourceAPI.get` and writes every matching row as newline delimited JSON (default)
+	or CSV. Rows are fetched from a server side cursor and written as they are encoded, so 
+	memory use doesn't grow with collection size and no ``COUNT`` query is issued.
+
+	Example usage for this class: 
+
+	.. sourcecode:: python
+		
+		from resource_api import ExportAPI
+
+		ExportAPI.as_view(session, model)
+
+		#Fetch 500 rows per round trip
+		ExportAPI.as_view(session, model, chunk_size = 500)
+
+		#Export from read replicas
+		ExportAPI.as_view(session, model, replicas = ReadReplicas(replica_engine))
+
+	"""
+	decorators = [catch_processing_exceptions]
+
+	def __init__(self, session, model, chunk_size = PaginationConst.EXPORT_CHUNK_SIZE, replicas = None, *args, **kw):
+		super(ExportAPI, self).__init__(*args, **kw)
+		self.session = session
+		self.model = model
+		self.chunk_size = chunk_size
+		self.replicas = replicas
+
+	def get(self):
+		"""Provides HTTP GET Method against resource collection export. `format` query string option
+		selects ``ndjson`` or ``csv`` output.
+
+		:return: streamed :class:`~flask.Response`
+
+		"""
+		query_string = request.args.to_dict()
+		filters = query_string.get(QueryStringConst.FILTER, '').strip().strip(',')
+		sort = query_string.get(QueryStringConst.SORT, '').strip().strip(',')
+		fields = query_string.get(QueryStringConst.FIELDS, '').strip().strip(',')
+		fmt = query_string.get(QueryStringConst.FORMAT, ExportConst.NDJSON).lower()
+
+		if fmt not in ExportConst.MIMETYPES:
+			raise ValidationError(msg="Unknown export format {0}".format(fmt))
+
+		if filters:
+			try:
+				filters = json.loads(filters)
+			except Exception as e:
+				raise ValidationError(msg=str(e))
+
+		if sort:
+			sort = [('-', value[1:]) if value.startswith('-') else ('+', value)
+					for value in sort.split(',')]
+			for _, field in sort:
+				if not has_field(self.model, field):
+					raise UnknownField(field, self.model.__name__)
+
+		fields = fields.split(',') if fields else None
+
+		search_obj = Search(read_session(self.session, self.replicas), self.model)
+		instances = search_obj.export_collection(filters = filters, sort = sort, chunk_size = self.chunk_size, fields = fields)
+		serializer = resource_info(ResourceInfoConst.SERIALIZER, self.model)
+		columns, records = serializer.records(instances, fields = fields)
+
+		if fmt == ExportConst.CSV:
+			lines = _csv_lines(columns, records)
+		else:
+			lines = ('{0}\n'.format(dumps(record)) for record in records)
+
+		return Response(stream_with_context(lines), mimetype = ExportConst.MIMETYPES[fmt])
+
+def _csv_lines(columns, records):
+	"""Yield header and one CSV line per record. ``None`` is written as empty field and
+	dates/times in ISO 8601 format.
+	"""
+	buf = io.StringIO()
+	writer = csv.writer(buf)
+
+	def line(values):
+		writer.writerow(values)
+		value = buf.getvalue()
+		buf.seek(0)
+		buf.truncate()
+		return value
+
+	yield line(columns)
+	for record in records:
+		yield line([_csv_value(record.get(c)) for c in columns])
+
+def _csv_value(value):
+	if value is None:
+		return ''
+	if isinstance(value, (date, time)):
+		return value.isoformat()
+	return value
@@ -6,7 +6,8 @@ get information about a resource at runtime. Supported options are primary_key,
 import inspect
 from six import with_metaclass
 from sqlalchemy.orm.attributes import InstrumentedAttribute
-from flask import url_for
+from flask import url_for, g
+from werkzeug.urls import url_quote
 from .const import ResourceInfoConst
 
 class Singleton(type):
@@ -22,14 +23,41 @@ class Singleton(type):
 
 
 class RegisteredManagers():
-    """Keep a set of all registered :class:`~stargate.manager.Manager` instances.
+    """Keep a set of all registered :class:`~stargate.manager.Manager` instances and a flat
+    registry of resources keyed by model class.
     """
     def __init__(self):
         self.created_managers = set()
+        self.registry = {}
+        self._lookup_cache = {}
 
     def register(self, resmanager):
         self.created_managers.add(resmanager)
 
+    def register_resource(self, model, info):
+        """Add resource info record of `model` to the registry. Called by 
+        :meth:`~stargate.manager.Manager.create_resource_blueprint`.
+        """
+        self.registry[model] = info
+        self._lookup_cache.clear()
+
+    def lookup(self, model):
+        """Return resource info record registered for `model` or one of its base classes.
+        Returns ``None`` if model is not registered.
+        """
+        try:
+            return self._lookup_cache[model]
+        except KeyError:
+            pass
+        info = self.registry.get(model)
+        if info is None:
+            for base in inspect.getmro(model)[1:]:
+                if base in self.registry:
+                    info = self.registry[base]
+                    break
+        self._lookup_cache[model] = info
+        return info
+
 
 class ResourceInfo(with_metaclass(Singleton, RegisteredManagers)):
     """This class provides information about a resource registered with any 
@@ -40,9 +68,11 @@ class ResourceInfo(with_metaclass(Singleton, RegisteredManagers)):
         - URL
         - SERIALIZER
         - DESERIALIZER
+        - RELATIVE_LINKS
     
     This is a Singleton class that can be accessed any where in the application by just
-    importing it.
+    importing it. Lookups are served from a registry keyed by model class, subclasses of
+    registered models are resolved once and cached.
 
     Example:
     
@@ -70,49 +100,75 @@ class ResourceInfo(with_metaclass(Singleton, RegisteredManagers)):
 
     """
     def __call__(self, key, instance_or_model, **kw):
-        if self.created_managers:
-            
-            if isinstance(instance_or_model, type):
-                model = instance_or_model
-
-            else:
-                model = instance_or_model.__class__
-
-            for manager in self.created_managers:
-
-                try:
-                    if key == ResourceInfoConst.PRIMARY_KEY:
-                        primary_key = manager.registered_apis[model].pk
-                        if isinstance(primary_key, str):
-                            return primary_key
-                        else:
-                            return primary_key(model)
-
-                    elif key == ResourceInfoConst.COLLECTION_NAME:
-                        return manager.registered_apis[model].collection
-
-                    elif key == ResourceInfoConst.SERIALIZER:
-                        return manager.registered_apis[model].serializer
-
-                    elif key == ResourceInfoConst.DESERIALIZER:
-                        return manager.registered_apis[model].deserializer
-
-                    elif key == ResourceInfoConst.URL:
-                        blueprint_name = manager.registered_apis[model].blueprint
-                        api_name = manager.registered_apis[model].apiname
-                        parts = [blueprint_name, api_name]
-                        url = url_for('.'.join(parts), _external = True, **kw)
-                        return url
-
-                    else:
-                        raise ValueError("Unknown resource manager attribute: {0}".format(key))
-                except ValueError:
-                    pass
+        if not self.created_managers:
+            raise RuntimeError("No Manager Instance Found")
+
+        if isinstance(instance_or_model, type):
+            model = instance_or_model
+        else:
+            model = instance_or_model.__class__
+
+        info = self._lookup_cache.get(model) or self.lookup(model)
+        if info is None:
             message = ('Model: {0} is not registered to any `Manager` instance. Hence Cannot lookup attribute: {1}').format(model, key)
             raise ValueError(message)
+
+        try:
+            getter = _GETTERS[key]
+        except KeyError:
+            raise ValueError("Unknown resource manager attribute: {0}".format(key))
+        return getter(info, model, kw)
+
+
+def _primary_key(info, model, kw):
+    primary_key = info.pk
+    if isinstance(primary_key, str):
+        return primary_key
+    return primary_key(model)
+
+#Resource info key to record accessor mapping used by `ResourceInfo.__call__`
+_GETTERS = {
+    ResourceInfoConst.PRIMARY_KEY: _primary_key,
+    ResourceInfoConst.SERIALIZER: lambda info, model, kw: info.serializer,
+    ResourceInfoConst.DESERIALIZER: lambda info, model, kw: info.deserializer,
+    ResourceInfoConst.COLLECTION_NAME: lambda info, model, kw: info.collection,
+    ResourceInfoConst.URL: lambda info, model, kw: _url(info, kw),
+    ResourceInfoConst.RELATIVE_LINKS: lambda info, model, kw: bool(info.relative_links),
+}
+
+#Path parameters of resource url rules in the order they appear in the url
+URL_PARTS = ('pk_id', 'relation', 'related_id')
+
+def _url(info, kw):
+    """Build resource url by appending path parameters to the collection url. Falls back to
+    :func:`~flask.url_for` if any other keyword (query string argument) is provided.
+    """
+    if any(k not in URL_PARTS for k in kw):
+        return url_for(info.endpoint, _external = not info.relative_links, **kw)
+
+    url = _collection_url(info)
+    for part in URL_PARTS:
+        value = kw.get(part)
+        if value is None:
+            break
+        if isinstance(value, int):
+            url = '{0}/{1}'.format(url, value)
         else:
-            raise RuntimeError("No Manager Instance Found")
+            url = '{0}/{1}'.format(url, url_quote(value))
+    return url
 
+def _collection_url(info):
+    """Collection url of a resource. Built with :func:`~flask.url_for` once per request 
+    and kept on :data:`~flask.g`, so host and scheme always match current request.
+    """
+    urls = getattr(g, '_stargate_collection_urls', None)
+    if urls is None:
+        urls = g._stargate_collection_urls = {}
+    try:
+        return urls[info.endpoint]
+    except KeyError:
+        url = urls[info.endpoint] = url_for(info.endpoint, _external = not info.relative_links)
+        return url
         
 #This instance is imported in all other modules.
-resource_info = ResourceInfo()
\ No newline at end of file
+resource_info = ResourceInfo()
@@ -0,0 +1,103 @@
+"""Read replica routing. A :class:`~stargate.manager.Manager` created with `read_binds` serves ``GET`` requests of
+its resources from a session bound to one of :class:`ReadReplicas`, so read throughput scales with number of
+replicas while writes keep going to primary database of `db`.
+
+Replicas lag behind primary, so a client which has just written is pinned to primary for a few seconds through a
+flag in its :data:`flask.session` (set after every successful write when app has a ``SECRET_KEY``). Clients can
+also ask for primary explicitly with a request header.
+
+"""
+
+import time
+import itertools
+from flask import g, request, session, current_app
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from .const import ReplicaConst
+
+class ReadReplicas():
+    """Read only binds of a :class:`~stargate.manager.Manager`.
+
+    :param binds: replica :class:`~sqlalchemy.engine.Engine` or database URL, or a list of them.
+    :param strategy: how a replica is chosen for a request, `round_robin` or `least_loaded` (fewest
+                     connections checked out of replica pool, ties broken in round robin order).
+    :param header: request header routing reads of a request to primary, e.g. ``X-Read-Primary: 1``.
+    :param pin_seconds: seconds reads of a client go to primary after it wrote.
+
+    Example usage of this class:
+
+    .. code-block:: python
+
+        manager = Manager(app, db, read_binds = ['postgresql://replica-1/app', 'postgresql://replica-2/app'])
+        #Or
+        replicas = ReadReplicas([engine_1, engine_2], strategy = 'least_loaded', pin_seconds = 10)
+        manager = Manager(app, db, read_binds = replicas)
+
+    """
+    def __init__(self, binds, strategy = ReplicaConst.ROUND_ROBIN, header = ReplicaConst.PRIMARY_HEADER,
+                 pin_seconds = ReplicaConst.PIN_SECONDS):
+        if not isinstance(binds, (list, tuple)):
+            binds = [binds]
+        if not binds:
+            raise ValueError("At least one read bind is required")
+        if strategy not in ReplicaConst.STRATEGIES:
+            raise ValueError("Unknown replica strategy {0}".format(strategy))
+
+        self.engines = [create_engine(bind) if isinstance(bind, str) else bind for bind in binds]
+        self.strategy = strategy
+        self.header = header
+        self.pin_seconds = pin_seconds
+        self._turn = itertools.count()
+
+    def choose(self):
+        """Return engine of replica next request should read from.
+        """
+        start = next(self._turn) % len(self.engines)
+        engines = self.engines[start:] + self.engines[:start]
+        if self.strategy == ReplicaConst.LEAST_LOADED:
+            return min(engines, key = _checked_out)
+        return engines[0]
+
+    def session(self):
+        """Session bound to a replica, created once per app context and closed on its teardown
+        (see :meth:`remove`).
+        """
+        replica_session = getattr(g, ReplicaConst.SESSION_ATTR, None)
+        if replica_session is None:
+            replica_session = Session(bind = self.choose(), autoflush = False)
+            setattr(g, ReplicaConst.SESSION_ATTR, replica_session)
+        return replica_session
+
+    def remove(self, exception = None):
+        """Close replica session of current app context, registered as app context teardown function.
+        """
+        replica_session = g.pop(ReplicaConst.SESSION_ATTR, None)
+        if replica_session is not None:
+            replica_session.close()
+
+    def pinned(self):
+        """`True` if current request should read from primary, because of request header or a recent
+        write of client.
+        """
+        if request.headers.get(self.header):
+            return True
+        return session.get(ReplicaConst.SESSION_FLAG, 0) > time.time()
+
+    def pin(self):
+        """Route reads of current client to primary for `pin_seconds`. Needs app ``SECRET_KEY`` as
+        flag is kept in :data:`flask.session`, without it only request header pins reads.
+        """
+        if current_app.secret_key and self.pin_seconds:
+            session[ReplicaConst.SESSION_FLAG] = time.time() + self.pin_seconds
+
+def read_session(primary, replicas):
+    """Session a ``GET`` request reads from: session of a replica of `replicas` unless it's ``None`` or
+    request is pinned to `primary` session (see :meth:`ReadReplicas.pinned`).
+    """
+    if replicas is None or replicas.pinned():
+        return primary
+    return replicas.session()
+
+def _checked_out(engine):
+    checked_out = getattr(engine.pool, 'checkedout', None)
+    return checked_out() if checked_out is not None else 0
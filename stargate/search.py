@@ -3,20 +3,513 @@ Provides filteration, grouping, ordering on collections and related collections.
 
 """
 
-import inspect
-from sqlalchemy.orm.attributes import QueryableAttribute
-from sqlalchemy.orm import ColumnProperty, joinedload
-from .filter import Filter, create_filter
+import json
+import time
+import threading
+from collections import defaultdict, namedtuple
+from contextlib import contextmanager
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import func, and_, or_, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.inspection import inspect as sqlalchemy_inspect
+from sqlalchemy.orm import joinedload, aliased, scoped_session, load_only, Session
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.ext import baked
+from sqlalchemy import bindparam
+from sqlalchemy.sql.expression import Executable, ClauseElement
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm.interfaces import ONETOMANY
+from flask import current_app, has_app_context
+from flask_sqlalchemy import Pagination
+from .filter import compile_filters, prepare_filters, filter_depth
 from .resource_info import resource_info
-from .utils import get_related_model, is_like_list, session_query, get_resource
-from .const import ResourceInfoConst
+from .metadata import model_metadata
+from .exception import ValidationError, QueryLimitExceeded, StatementTimeout
+from .utils import get_related_model, is_like_list, session_query, get_resource, primary_key_identity
+from .utils import encode_cursor, decode_cursor, string_to_datetime, LRUCache
+from .const import ResourceInfoConst, PaginationConst, CountConst, CacheConst, ResourceConst, FanOutConst, \
+                    LimitConst
+
+try:
+    from sqlalchemy.orm import selectinload
+    SELECTIN_LOADING = True
+except ImportError:
+    #SQLAlchemy < 1.2
+    from sqlalchemy.orm import subqueryload as selectinload
+    SELECTIN_LOADING = False
 
 
 def primary_key_names(model):
-    return [key for key, field in inspect.getmembers(model)
-            if isinstance(field, QueryableAttribute)
-            and isinstance(field.property, ColumnProperty)
-            and field.property.columns[0].primary_key]
+    return list(model_metadata(model).pk_names)
+
+def keyset_criterion(columns, values):
+    """Build WHERE clause selecting rows after `values` in order of `columns`. `columns` is a 
+    list of tuples of column and ascending flag. For columns ``(a, b)`` it results in
+    ``a > :a OR (a = :a AND b > :b)``.
+    """
+    clauses = []
+    for index, (column, ascending) in enumerate(columns):
+        clause = [previous == value for (previous, _), value in zip(columns[:index], values[:index])]
+        clause.append(column > values[index] if ascending else column < values[index])
+        clauses.append(and_(*clause))
+    return or_(*clauses)
+
+#Guardrails of collection queries of a resource, a limit set to `None` is not enforced.
+QUERY_LIMITS = namedtuple('QUERY_LIMITS', ['statement_timeout', 'max_filter_depth', 'max_offset'])
+NO_LIMITS = QUERY_LIMITS(None, None, None)
+
+@contextmanager
+def statement_timeout(session, seconds, mapper = None):
+    """Abort statements executed through `session` within block once `seconds` have passed. PostgreSQL
+    and MySQL enforce it server side (``statement_timeout``, ``max_execution_time``), SQLite with a 
+    progress handler, other dialects are not limited. A database error raised after deadline is
+    reraised as :class:`~stargate.exception.StatementTimeout`.
+
+    :param session: SQLAlchemy session, block runs on its connection.
+    :param seconds: timeout in seconds, ``None`` disables it.
+    :param mapper: mapper used to pick bind of `session`.
+
+    """
+    if not seconds:
+        yield
+        return
+
+    connection = session.connection(mapper = mapper)
+    dialect = connection.dialect.name
+    milliseconds = max(int(seconds * 1000), 1)
+    deadline = time.time() + seconds
+    if dialect == 'postgresql':
+        connection.execute(text('SET LOCAL statement_timeout = {0}'.format(milliseconds)))
+    elif dialect == 'mysql':
+        connection.execute(text('SET SESSION max_execution_time = {0}'.format(milliseconds)))
+    elif dialect == 'sqlite':
+        connection.connection.set_progress_handler(lambda: time.time() > deadline, LimitConst.SQLITE_PROGRESS_STEPS)
+    
+    failed = False
+    try:
+        yield
+    except Exception as exception:
+        failed = True
+        if not isinstance(exception, OperationalError) or time.time() < deadline:
+            raise
+        msg = "Query exceeded statement timeout of {0} seconds".format(seconds)
+        raise StatementTimeout(msg, limit = LimitConst.STATEMENT_TIMEOUT, value = seconds)
+    finally:
+        if dialect == 'sqlite':
+            connection.connection.set_progress_handler(None, 0)
+        elif failed:
+            #Transaction of a failed block may be aborted or its connection broken, so no statement is run.
+            #PostgreSQL resets `SET LOCAL` on rollback, MySQL connection is discarded instead of going
+            #back to pool with session timeout set
+            if dialect == 'mysql':
+                connection.invalidate()
+        elif dialect == 'postgresql':
+            connection.execute(text('SET LOCAL statement_timeout TO DEFAULT'))
+        elif dialect == 'mysql':
+            connection.execute(text('SET SESSION max_execution_time = DEFAULT'))
+
+def _run_timed(seconds, func, session, *args):
+    with statement_timeout(session, seconds):
+        return func(session, *args)
+
+#Collection totals for `CountConst.CACHED` mode keyed by model, filters and grouping.
+COUNT_CACHE = LRUCache(CacheConst.COUNTS, ttl = CountConst.CACHE_TTL)
+
+class Explain(Executable, ClauseElement):
+    """``EXPLAIN (FORMAT JSON)`` of a select `statement`. Compiled along with statement, so its
+    parameters are processed on execution like those of statement itself, including expanding
+    ``IN`` parameters of filters.
+    """
+    def __init__(self, statement):
+        self.statement = statement
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kw):
+    return 'EXPLAIN (FORMAT JSON) {0}'.format(compiler.process(element.statement, **kw))
+
+def estimate_count(session, query):
+    """Return planner row estimate of `query` using ``EXPLAIN`` on PostgreSQL. Returns `None` 
+    for other databases.
+    """
+    bind = session.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return None
+    plan = session.connection().execute(Explain(query.order_by(None).statement)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+class UncountedPagination(Pagination):
+    """Page of a collection whose total was not counted (`CountConst.NONE`). Existence of 
+    next page is determined by fetching one extra row.
+    """
+    def __init__(self, query, page, per_page, items, has_next):
+        super(UncountedPagination, self).__init__(query, page, per_page, None, items)
+        self._has_next = has_next
+
+    @property
+    def pages(self):
+        return None
+
+    @property
+    def has_next(self):
+        return self._has_next
+
+    @property
+    def next_num(self):
+        return self.page + 1 if self._has_next else None
+
+class StreamedPagination(Pagination):
+    """Page of a collection streamed from a server side cursor. Instances are only available 
+    through :meth:`chunks`, total and next page are known after all chunks are consumed.
+
+    :param search: :class:`Search` instance which created this page.
+    :param query: Filtered and ordered collection query.
+    :param page: page_number for collection.
+    :param per_page: page_size for collection.
+    :param count_key: Normalized model, filters and grouping of collection query.
+    :param on_chunk: callable invoked with each chunk before it's yielded.
+
+    """
+    def __init__(self, search, query, page, per_page, count_key, on_chunk = None):
+        super(StreamedPagination, self).__init__(query, page, per_page, None, [])
+        self.search = search
+        self.count_key = count_key
+        self.on_chunk = on_chunk
+        self._has_next = False
+
+    def chunks(self, chunk_size = PaginationConst.STREAM_CHUNK_SIZE):
+        uncounted = self.search.count == CountConst.NONE
+        limit = self.per_page + 1 if uncounted else self.per_page
+        query = self.query.limit(limit).offset((self.page - 1) * self.per_page).yield_per(chunk_size)
+        
+        fetched = 0
+        chunk = []
+        for instance in query:
+            fetched += 1
+            if fetched > self.per_page:
+                break
+            chunk.append(instance)
+            if len(chunk) == chunk_size:
+                if self.on_chunk is not None:
+                    self.on_chunk(chunk)
+                yield chunk
+                chunk = []
+        
+        if chunk:
+            if self.on_chunk is not None:
+                self.on_chunk(chunk)
+            yield chunk
+
+        if uncounted:
+            self._has_next = fetched > self.per_page
+        elif self.page == 1 and fetched < self.per_page:
+            self.total = fetched
+        else:
+            self.total = self.search._count(self.query, self.count_key)
+
+    @property
+    def pages(self):
+        return None if self.total is None else super(StreamedPagination, self).pages
+
+    @property
+    def has_next(self):
+        return self._has_next if self.total is None else super(StreamedPagination, self).has_next
+
+    @property
+    def next_num(self):
+        return self.page + 1 if self.has_next else None
+
+class CursorPagination():
+    """Page of a keyset paginated collection returned by :meth:`Search._search_keyset`.
+
+    :param items: instances in current page.
+    :param page_size: page_size for collection.
+    :param cursor: cursor of current page.
+    :param next_cursor: cursor of next page, `None` if this is the last page.
+    :param prev_cursor: cursor of previous page, `None` if this is the first page.
+
+    """
+    def __init__(self, items, page_size, cursor, next_cursor, prev_cursor):
+        self.items = items
+        self.page_size = page_size
+        self.cursor = cursor
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+def plan_loader_options(model, plan, grouped = False, streamed = False, skip = ()):
+    """Plan loader options for relations serialized by a `SERIALIZATION_PLAN`. To-one
+    relations are joined eagerly (or loaded with a separate IN query if query is grouped), 
+    to-many relations are loaded with one IN query. Returns a tuple of loader options 
+    and list of `lazy='dynamic'` relationship properties which can't be eagerly loaded.
+
+    :param model: model class of collection query.
+    :param plan: `SERIALIZATION_PLAN` of collection serializer.
+    :param grouped: `True` if collection query has a GROUP BY clause.
+    :param streamed: `True` if collection is fetched using `yield_per`. Subquery eager 
+                    loading (SQLAlchemy < 1.2) can't be combined with it.
+    :param skip: names of relations loaded separately, see :func:`fan_out_relations`.
+
+    """
+    relations = model_metadata(model).relations
+    options = []
+    dynamic = []
+    for rel in plan.relations:
+        if rel.name in skip or rel.name not in relations or relations[rel.name].prop is None:
+            continue
+        prop = relations[rel.name].prop
+        if prop.lazy == 'dynamic':
+            dynamic.append((prop, rel))
+        elif prop.uselist or grouped:
+            if streamed and not SELECTIN_LOADING:
+                continue
+            options.extend(_nested_options(selectinload(getattr(model, rel.name)), prop.mapper.class_, rel.children, streamed))
+        else:
+            options.extend(_nested_options(joinedload(getattr(model, rel.name)), prop.mapper.class_, rel.children, streamed))
+    return options, dynamic
+
+def fan_out_relations(model, plan):
+    """Relationship properties of a `SERIALIZATION_PLAN` which :class:`Search` loads with a query 
+    of their own when `parallel` is enabled, instead of an IN query issued by loader options: plain
+    one to many relations without nested expansions. These queries don't depend on each other 
+    and run concurrently on :data:`FAN_OUT`.
+
+    :param model: model class of collection query.
+    :param plan: `SERIALIZATION_PLAN` of collection serializer.
+
+    """
+    relations = model_metadata(model).relations
+    props = []
+    for rel in plan.relations:
+        prop = relations[rel.name].prop if rel.name in relations else None
+        if prop is None or prop.lazy == 'dynamic' or rel.children:
+            continue
+        if prop.uselist and _one_to_many(prop):
+            props.append(prop)
+    return props
+
+def _one_to_many(prop):
+    return prop.direction is ONETOMANY and prop.secondary is None and len(prop.local_remote_pairs) == 1
+
+def _local_key(model, prop):
+    return sqlalchemy_inspect(model).get_property_by_column(prop.local_remote_pairs[0][0]).key
+
+def relation_keys(model, pk_name, prop, items):
+    """Mapping of values of local column of a one to many relation `prop` to primary keys of `items`.
+    Returns ``None`` if relation is not a plain one to many relation.
+    """
+    if not _one_to_many(prop):
+        return None
+    local_key = _local_key(model, prop)
+    keys = dict((getattr(item, local_key), getattr(item, pk_name)) for item in items)
+    keys.pop(None, None)
+    return keys
+
+def related_rows(session, prop, values):
+    """Load related instances of one to many relation `prop` whose remote column is in `values` with
+    one IN query. Returns dict of remote column value and list of instances in relation order.
+    """
+    related = defaultdict(list)
+    if not values:
+        return related
+
+    remote = prop.local_remote_pairs[0][1]
+    related_mapper = prop.mapper
+    remote_key = related_mapper.get_property_by_column(remote).key
+    order_by = prop.order_by or list(related_mapper.primary_key)
+    for value in range(0, len(values), ResourceConst.IN_CHUNK_SIZE):
+        query = session.query(related_mapper.class_).filter(remote.in_(values[value:value + ResourceConst.IN_CHUNK_SIZE]))
+        for instance in query.order_by(*order_by):
+            related[getattr(instance, remote_key)].append(instance)
+    return related
+
+def dynamic_pages(session, prop, keys, expand):
+    """First page of a `lazy='dynamic'` one to many relation `prop` for parents in `keys` (see 
+    :func:`relation_keys`) with one grouped COUNT query and, if relation is expanded, one 
+    windowed query. Returns dict of parent primary key and :class:`~flask_sqlalchemy.Pagination`.
+    """
+    if not keys:
+        return {}
+
+    remote = prop.local_remote_pairs[0][1]
+    related_mapper = prop.mapper
+    remote_key = related_mapper.get_property_by_column(remote).key
+    page_size = PaginationConst.PAGE_SIZE
+
+    counts = session.query(remote, func.count()).filter(remote.in_(list(keys))).group_by(remote).all()
+    related = defaultdict(list)
+
+    if expand:
+        related_class = related_mapper.class_
+        order_by = [column for column in related_mapper.primary_key]
+        row_number = func.row_number().over(partition_by = remote, order_by = order_by).label('row_number')
+        subquery = session.query(related_class, row_number).filter(remote.in_(list(keys))).subquery()
+        windowed = aliased(related_class, subquery)
+        query = session.query(windowed).filter(subquery.c.row_number <= page_size)
+        for instance in query:
+            related[getattr(instance, remote_key)].append(instance)
+
+    return dict((keys[key], Pagination(None, PaginationConst.PAGE_NUMBER, page_size, total, related[key])) 
+                for key, total in counts)
+
+def plan_load_columns(model, plan, sort = None, extra = ()):
+    """Plan columns loaded for instances serialized by a `SERIALIZATION_PLAN`, so sparse fieldsets
+    (`fields`/`exclude` options) are pushed down into SELECT column list with :func:`~sqlalchemy.orm.load_only`.
+    Primary and foreign key columns (used to load relations) are always loaded, as well as `sort` keys and
+    `extra` columns. Returns a sorted tuple of column names, or ``None`` if every column is needed or plan 
+    serializes attributes other than columns (e.g. hybrid properties depending on any column).
+
+    :param model: model class of query.
+    :param plan: `SERIALIZATION_PLAN` of serializer.
+    :param sort: sort attribute(s) of query.
+    :param extra: names of additional columns to load, ignored if model doesn't have them.
+
+    """
+    metadata = model_metadata(model)
+    if any(name not in metadata.column_types for name in plan.columns):
+        return None
+    
+    columns = set(plan.columns)
+    columns.update(metadata.pk_names)
+    columns.update(name for name in metadata.columns if name in metadata.foreign_keys)
+    columns.update(name for symbol, name in sort or () if name in metadata.column_types)
+    columns.update(name for name in extra if name in metadata.column_types)
+    
+    if len(columns) == len(metadata.columns):
+        return None
+    return tuple(sorted(columns))
+
+def _nested_options(loader, model, expansions, streamed):
+    """Return `loader` of a relation along with loader options chained to it for nested expansions 
+    (see :func:`~stargate.utils.parse_expansions`), so expanded relations of expanded resources 
+    are loaded with the collection as well.
+    """
+    options = [loader]
+    relations = model_metadata(model).relations
+    for expansion in expansions:
+        if expansion.name not in relations or relations[expansion.name].prop is None:
+            continue
+        prop = relations[expansion.name].prop
+        attribute = getattr(model, expansion.name)
+        if prop.lazy == 'dynamic':
+            continue
+        elif prop.uselist:
+            if streamed and not SELECTIN_LOADING:
+                continue
+            nested = loader.selectinload(attribute) if SELECTIN_LOADING else loader.subqueryload(attribute)
+        else:
+            nested = loader.joinedload(attribute)
+        options.extend(_nested_options(nested, prop.mapper.class_, expansion.children, streamed))
+    return options
+
+class StatementCache():
+    """Cache of compiled collection statements backed by :mod:`sqlalchemy.ext.baked`. A statement
+    is compiled once per model, filter structure, sort, grouping and loader options, filter values,
+    page size and offset are bound parameters.
+
+    :meth:`stats` reports number of entries held by bakery itself (`compiled`) along with
+    `shape_hits` and `shape_misses`. The latter only count lookups of shape keys in an LRU of their
+    own (see :meth:`record`), they tell how often requests repeat a shape, not whether bakery served
+    a compiled statement.
+
+    :param size: Maximum number of statement shapes kept.
+
+    """
+    def __init__(self, size = CacheConst.STATEMENTS):
+        self.size = size
+        self.bakery = baked.bakery(size = size)
+        self._shapes = LRUCache(size)
+        self._lock = threading.Lock()
+        self.shape_hits = 0
+        self.shape_misses = 0
+
+    def record(self, key):
+        """Count lookup of statement shape `key` as hit if it was seen before or miss otherwise.
+        """
+        with self._lock:
+            if self._shapes.get(key) is not None:
+                self.shape_hits += 1
+            else:
+                self._shapes.set(key, True)
+                self.shape_misses += 1
+
+    def stats(self):
+        """Return dict of `compiled` entries in bakery, `shape_hits`, `shape_misses` and `size` of cache.
+        """
+        with self._lock:
+            return dict(compiled = len(self.bakery.cache), shape_hits = self.shape_hits,
+                        shape_misses = self.shape_misses, size = self.size)
+
+    def clear(self):
+        with self._lock:
+            self.bakery.cache.clear()
+            self._shapes.clear()
+            self.shape_hits = 0
+            self.shape_misses = 0
+
+#Compiled collection statements of all `Search` instances.
+STATEMENT_CACHE = StatementCache()
+
+class CachedStatements():
+    """Items and count statements of a collection built from :data:`STATEMENT_CACHE`, see
+    :meth:`Search._cached_statements`.
+    """
+    LIMIT = 'stargate_limit'
+    OFFSET = 'stargate_offset'
+
+    def __init__(self, session, items, total, params):
+        self.session = session
+        self.items = items
+        self.total = total
+        self.params = params
+
+    def fetch(self, limit, offset):
+        params = dict(self.params)
+        params.update({self.LIMIT: limit, self.OFFSET: offset})
+        return self.items(self.session).params(params).all()
+
+    def count(self, session = None):
+        return self.total(session or self.session).params(self.params).count()
+
+class FanOut():
+    """Bounded thread pool running independent queries of a :class:`Search` concurrently. Each job
+    gets a session of its own, so it checks out a separate connection from pool of `bind`, and 
+    runs in app context of submitting thread as model query properties require one. Threads are 
+    started on first use.
+
+    :param max_workers: maximum number of queries in flight, across all requests.
+
+    """
+    def __init__(self, max_workers = FanOutConst.MAX_WORKERS):
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, bind, func, *args):
+        """Schedule ``func(session, *args)`` on a new session of `bind`, closed once `func` returns.
+        Returns a :class:`~concurrent.futures.Future`.
+        """
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers = self.max_workers)
+        app = current_app._get_current_object() if has_app_context() else None
+        return self._executor.submit(_run_in_session, app, bind, func, args)
+
+def _run_in_session(app, bind, func, args):
+    if app is not None:
+        with app.app_context():
+            return _run_in_session(None, bind, func, args)
+
+    session = Session(bind = bind)
+    try:
+        return func(session, *args)
+    finally:
+        session.close()
+
+#Thread pool of `Search` instances created with `parallel` enabled.
+FAN_OUT = FanOut()
 
 class Search():
 	"""Search class for searching collection or instance. Search through collection
@@ -27,17 +520,32 @@ class Search():
 	:param model: user defined model class Using :class:`~flask_sqlalchemy.SQLALchemy.Model`. 
 	:param relation: If related collection/instance need to be searched. 
 	:param initial_query: initial query to be appended to search query in this class
+	:param count: how collection total is computed, one of `CountConst.MODES`.
+	:param count_ttl: seconds a total is cached for in `CountConst.CACHED` mode.
+	:param parallel: run collection total and relation queries concurrently on :data:`FAN_OUT`.
+	:param limits: :data:`QUERY_LIMITS` enforced on collection searches.
 		
 	"""
-	def __init__(self, session, model, relation = None, _initial_query=None):
+	def __init__(self, session, model, relation = None, _initial_query=None, 
+				count = CountConst.EXACT, count_ttl = CountConst.CACHE_TTL, parallel = False, limits = NO_LIMITS):
 		
 		self.session = session
 		self.model = model
 		self.relation = relation
 		self.initial_query = _initial_query
+		self.count = count
+		self.count_ttl = count_ttl
+		self.parallel = parallel
+		self.limits = limits
+		#Future of collection total counted concurrently with page, see `_paginate`.
+		self.pending_total = None
+		#First page of `lazy='dynamic'` relations of collection items. Mapping of 
+		#relation name to dict of parent primary key and `flask_sqlalchemy.Pagination`.
+		self.prefetched = {}
 
 	def search_resource(self, pk_id = None, related_id = None, filters=None, sort=None, 
-						group_by=None,page_size=None, page_number=None):
+						group_by=None,page_size=None, page_number=None, expand=None, cursor=None, 
+						stream=False, fields=None, exclude=None):
 		"""Public method `Search` class. This method can be used to perform search
 		on either related collection or primary collection. Moreover it can also be used to 
 		search single instances.
@@ -49,6 +557,12 @@ class Search():
 		:param group_by: group attribute(s) for collection.
 		:param page_size: page_size for collection.
 		:param page_number: page_number for collection.
+		:param expand: resource expansion string, used to plan relation loading.
+		:param cursor: cursor for keyset pagination. Empty string for first page. If `None`
+						collection is paginated using `page_number`.
+		:param stream: return :class:`StreamedPagination` for `page_number` paginated collections.
+		:param fields: serialized attributes, only their columns are loaded (see :func:`plan_load_columns`).
+		:param exclude: attributes excluded from serialization, their columns are not loaded.
 
 		"""
 		if self.initial_query is not None:
@@ -67,32 +581,68 @@ class Search():
 
 			if is_like_list(primary_resource, self.relation):
 				query = session_query(self.session, related_model[0].__class__)
-				return self._search_collection(query, filters, sort, group_by, page_size, page_number)
+				return self._search_collection(query, filters, sort, group_by, page_size, page_number, expand, cursor, stream,
+												fields, exclude)
 		
 			else:
 				return related_model
 		
 		elif pk_id is not None:
-			return self._search_one(query, pk_id, None)
+			return self._search_one(query, pk_id, None, fields, exclude)
 		
 		else:
-			return self._search_collection(query, filters, sort, group_by, page_size, page_number)
+			return self._search_collection(query, filters, sort, group_by, page_size, page_number, expand, cursor, stream,
+											fields, exclude)
 	
-	def _search_one(self, query, pk_value, related_id):
+	def last_modified(self, pk_value):
+		"""Return ``updated_at`` column value of resource with a single column ``SELECT``, without
+		loading resource. Returns ``None`` if model has no such column, resource is never updated or
+		doesn't exist.
+
+		:param pk_value: Primary key value of resource.
+
+		"""
+		metadata = model_metadata(self.model)
+		if ResourceConst.UPDATED_AT_COLUMN not in metadata.column_types:
+			return None
+
+		pk_name = resource_info(ResourceInfoConst.PRIMARY_KEY, self.model)
+		ident = primary_key_identity(self.model, pk_name, pk_value)
+		if ident is None:
+			criteria = [getattr(self.model, pk_name) == pk_value]
+		elif len(metadata.pk_attributes) == 1:
+			criteria = [metadata.pk_attributes[0] == ident]
+		else:
+			criteria = [attribute == value for attribute, value in zip(metadata.pk_attributes, ident)]
+		
+		column = getattr(self.model, ResourceConst.UPDATED_AT_COLUMN)
+		return self.session.query(column).filter(*criteria).scalar()
+
+	def _search_one(self, query, pk_value, related_id, fields = None, exclude = None):
 		"""This method is internally used by search_resource if a single resource need to be fetched.
 		This method is invoked in `id` for primary resource is not None or related resource `id` is set.
 
 		:param query: Initial query from :meth:`~stargate.search.Search.search_resource()`
 		:param pk_value: Primary key value for resource to be fetched. 
 		:param related_id: Primary key id for related resource to be fetched. 
+		:param fields: serialized attributes of resource.
+		:param exclude: attributes excluded from serialization.
 		
 		"""
-		resource = get_resource(self.session, self.model, pk_value)
+		options = None
+		if self.relation is None and (fields or exclude):
+			serializer = resource_info(ResourceInfoConst.SERIALIZER, self.model)
+			plan = serializer.compile(self.model, fields = fields, exclude = exclude)
+			columns = plan_load_columns(self.model, plan, extra = (ResourceConst.UPDATED_AT_COLUMN,))
+			options = [load_only(*columns)] if columns else None
+
+		resource = get_resource(self.session, self.model, pk_value, cached = True, options = options)
 		if self.relation is not None:
 			resource = getattr(resource, self.relation)	
 		return resource
 
-	def _search_collection(self, query,filters, sort, group_by, page_size, page_number):
+	def _search_collection(self, query,filters, sort, group_by, page_size, page_number, expand = None, cursor = None,
+							stream = False, fields = None, exclude = None):
 		"""This method is internally used by search_resource if a collection resource need 
 		to be fetched.
 		
@@ -102,13 +652,181 @@ class Search():
 		:param group_by: group attribute(s) for collection.
 		:param page_size: page_size for collection.
 		:param page_number: page_number for collection.
+		:param expand: resource expansion string.
+		:param cursor: cursor for keyset pagination, see :meth:`~Search._search_keyset`.
+		:param stream: fetch collection lazily from a server side cursor, see :class:`StreamedPagination`.
+		:param fields: serialized attributes of collection items.
+		:param exclude: attributes excluded from serialization.
+
+		Relations serialized for each item are loaded with a constant number of queries
+		using options from :func:`plan_loader_options`, only columns of serialized attributes
+		are selected (see :func:`plan_load_columns`). With `parallel` enabled total and relations
+		of :func:`fan_out_relations` are fetched concurrently with page and with each other.
+
+		Filter depth and offset are checked against :attr:`limits` before any query is issued,
+		queries are aborted after statement timeout (see :func:`statement_timeout`). Streamed 
+		pages are fetched after this method returns and are not timed.
+		
+		"""
+		self._check_limits(filters, page_number, page_size, cursor)
+		with statement_timeout(self.session, self.limits.statement_timeout, sqlalchemy_inspect(self.model)):
+			return self._fetch_collection(query, filters, sort, group_by, page_size, page_number, expand, cursor,
+											stream, fields, exclude)
+
+	def _check_limits(self, filters, page_number, page_size, cursor):
+		"""Raise :class:`~stargate.exception.QueryLimitExceeded` if `filters` are nested deeper than
+		`max_filter_depth` or page starts past `max_offset` rows.
+		"""
+		max_depth = self.limits.max_filter_depth
+		if max_depth is not None and filters:
+			depth = filter_depth(filters)
+			if depth > max_depth:
+				msg = "Filters nested {0} levels deep, at most {1} are allowed".format(depth, max_depth)
+				raise QueryLimitExceeded(msg, limit = LimitConst.MAX_FILTER_DEPTH, value = max_depth)
+		
+		max_offset = self.limits.max_offset
+		if max_offset is not None and cursor is None and page_number and page_size:
+			offset = (page_number - 1) * page_size
+			if offset > max_offset:
+				msg = "Page offset {0} exceeds {1}, use cursor pagination to read further".format(offset, max_offset)
+				raise QueryLimitExceeded(msg, limit = LimitConst.MAX_OFFSET, value = max_offset)
+
+	def _fetch_collection(self, query, filters, sort, group_by, page_size, page_number, expand = None, cursor = None,
+							stream = False, fields = None, exclude = None):
+		"""Search collection once limits are checked, see :meth:`_search_collection`.
+		"""
+		model = query.column_descriptions[0]['entity']
+		serializer = resource_info(ResourceInfoConst.SERIALIZER, model)
+		plan = serializer.compile(model, fields = fields, exclude = exclude, expand = expand)
+		stream = stream and cursor is None
+		fanned = fan_out_relations(model, plan) if self.parallel and not stream else []
+		skip = tuple(prop.key for prop in fanned)
+		options, dynamic = plan_loader_options(model, plan, grouped = bool(group_by), streamed = stream, skip = skip)
+		columns = plan_load_columns(model, plan, sort = sort)
+		if columns:
+			options.append(load_only(*columns))
+		
+		count_key = (model, json.dumps(filters, sort_keys = True), tuple(group_by or ()))
+
+		if cursor is None and not stream and self.count != CountConst.ESTIMATED and \
+				self.initial_query is None and model is self.model:
+			statements = self._cached_statements(model, (plan.relations, columns, skip), options, filters, sort, group_by)
+			collection = self._paginate(None, page_number, page_size, count_key, statements)
+			self._prefetch_relations(model, plan.pk_name, dynamic, collection.items, fanned)
+			self._await_total(collection, count_key)
+			return collection
+
+		query = self._filter(query, filters)
+
+		if options:
+			query = query.options(*options)
+
+		if cursor is not None:
+			if group_by:
+				raise ValidationError("Grouping is not supported with cursor pagination")
+			collection = self._search_keyset(query, model, plan.pk_name, sort, page_size, cursor)
 		
+		else:
+			query = self._sort(query, sort)
+			query = self._group(query, group_by)
+
+			if stream:
+				prefetch = lambda items: self._prefetch_relations(model, plan.pk_name, dynamic, items)
+				return StreamedPagination(self, query, page_number, page_size, count_key, on_chunk = prefetch)
+			
+			collection = self._paginate(query, page_number, page_size, count_key)
+		
+		self._prefetch_relations(model, plan.pk_name, dynamic, collection.items, fanned)
+		self._await_total(collection, count_key)
+		return collection
+
+	def export_collection(self, filters = None, sort = None, chunk_size = PaginationConst.EXPORT_CHUNK_SIZE, fields = None):
+		"""Iterate over every instance of collection matching `filters` in `sort` order. Rows are
+		fetched from a server side cursor `chunk_size` at a time, relations are not loaded and
+		collection is not counted.
+
+		:param filters: filters str representation received in request query string. 
+		:param sort: sort attribute(s) for collection.
+		:param chunk_size: number of rows fetched per round trip.
+		:param fields: exported attributes, only their columns are loaded.
+
+		"""
+		query = session_query(self.session, self.model)
+		if fields:
+			serializer = resource_info(ResourceInfoConst.SERIALIZER, self.model)
+			columns = plan_load_columns(self.model, serializer.compile(fields = fields), sort = sort)
+			if columns:
+				query = query.options(load_only(*columns))
+		query = self._filter(query, filters)
+		query = self._sort(query, sort)
+		return query.yield_per(chunk_size)
+
+	def bulk_query(self, ids = None, filters = None):
+		"""Query selecting instances of collection targeted by bulk PATCH or DELETE, either by
+		primary key `ids` or `filters` (or both).
+
+		:param ids: list of primary key values.
+		:param filters: filters JSON representation, see :meth:`~stargate.filter.Filter.from_json`.
+
+		"""
+		query = session_query(self.session, self.model)
+		if ids:
+			pk_name = resource_info(ResourceInfoConst.PRIMARY_KEY, self.model)
+			query = query.filter(getattr(self.model, pk_name).in_(ids))
+		return self._filter(query, filters)
+
+	def _filter(self, query, filters):
+		"""Apply filters received in request query string to `query`.
 		"""
 		if filters:
-			filters = [Filter.from_json(self.model, f) for f in filters]
-			filters = [create_filter(self.model, f) for f in filters]
-			query = query.filter(*filters)
-	    
+			query = query.filter(compile_filters(self.model, filters))
+		return query
+
+	def _cached_statements(self, model, options_key, options, filters, sort, group_by):
+		"""Build items and count statements of collection through :data:`STATEMENT_CACHE`. Statements
+		are keyed by model, structure of filters (see :func:`~stargate.filter.prepare_filters`), sort,
+		grouping and `options_key`, serialized relations and loaded columns which determine loader `options`.
+		"""
+		if filters:
+			shape, criterion, params = prepare_filters(model, filters)
+		else:
+			shape, criterion, params = (), None, {}
+		sort = tuple(sort or ())
+		group_by = tuple(group_by or ())
+		STATEMENT_CACHE.record((model, shape, sort, group_by, options_key))
+
+		base = STATEMENT_CACHE.bakery(lambda session: session_query(session, model), model)
+		if criterion is not None:
+			base.add_criteria(lambda q: q.filter(criterion), shape)
+		if group_by:
+			base.add_criteria(lambda q: self._group(q, group_by), group_by)
+		
+		items = base.with_criteria(lambda q: q.options(*options), options_key)
+		if sort:
+			items.add_criteria(lambda q: self._sort(q, sort), sort)
+		items.add_criteria(lambda q: q.limit(bindparam(CachedStatements.LIMIT)).offset(bindparam(CachedStatements.OFFSET)))
+		
+		session = self.session() if isinstance(self.session, scoped_session) else self.session
+		return CachedStatements(session, items, base, params)
+
+	def _group(self, query, group_by):
+		"""Apply group attribute(s) received in request query string to `query`.
+		"""
+		for field_name in group_by or ():
+			if '.' in field_name:
+				field_name, field_name_in_relation = field_name.split('.')
+				relation_model = get_related_model(self.model, field_name)
+				field = getattr(relation_model, field_name_in_relation)
+				query = query.join(relation_model)
+				query = query.group_by(field)
+			else:
+				field = getattr(self.model, field_name)
+				query = query.group_by(field)
+		return query
+
+	def _sort(self, query, sort):
+		"""Apply sort attribute(s) received in request query string to `query`.
+		"""
 		if sort:
 			for (symbol, field_name) in sort:
 				direction_name = 'asc' if symbol == '+' else 'desc'
@@ -123,17 +841,189 @@ class Search():
 					field = getattr(self.model, field_name)
 					direction = getattr(field, direction_name)
 					query = query.order_by(direction())
-		if group_by:
-			for field_name in group_by:
-				if '.' in field_name:
-					field_name, field_name_in_relation = field_name.split('.')
-					relation_model = get_related_model(self.model, field_name)
-					field = getattr(relation_model, field_name_in_relation)
-					query = query.join(relation_model)
-					query = query.group_by(field)
-				else:
-					field = getattr(self.model, field_name)
-					query = query.group_by(field)
+		return query
 
-		collection = query.paginate(page_number, page_size,error_out=False)
-		return collection
+	def _prefetch_relations(self, model, pk_name, dynamic, items, fanned = ()):
+		"""Prefetch all `dynamic` relations of `items` into :attr:`prefetched` and load `fanned`
+		relations (see :func:`fan_out_relations`) into `items`. Queries of all relations are 
+		submitted before any result is awaited.
+		"""
+		self.prefetched = {}
+		pages = []
+		for prop, rel in dynamic:
+			keys = relation_keys(model, pk_name, prop, items)
+			if keys is not None:
+				pages.append((prop, self._run(dynamic_pages, prop, keys, rel.expand)))
+		
+		rows = []
+		for prop in fanned:
+			keys = relation_keys(model, pk_name, prop, items)
+			rows.append((prop, self._run(related_rows, prop, list(keys))))
+
+		for prop, result in pages:
+			prefetched = result()
+			for page in prefetched.values():
+				page.items = self._merge(page.items)
+			self.prefetched[prop.key] = prefetched
+
+		for prop, result in rows:
+			related = result()
+			local_key = _local_key(model, prop)
+			for item in items:
+				set_committed_value(item, prop.key, self._merge(related.get(getattr(item, local_key), ())))
+
+	def _run(self, func, *args):
+		"""Call ``func(session, *args)``. With `parallel` enabled it's submitted to :data:`FAN_OUT`
+		and runs on its own session. Returns a callable returning result of `func`.
+		"""
+		if not self.parallel:
+			result = func(self.session, *args)
+			return lambda: result
+		future = FAN_OUT.submit(self.session.get_bind(mapper = sqlalchemy_inspect(self.model)), 
+								partial(_run_timed, self.limits.statement_timeout, func), *args)
+		return future.result
+
+	def _merge(self, instances):
+		"""Attach `instances` loaded by :meth:`_run` to session of search, without querying.
+		"""
+		if not self.parallel:
+			return list(instances)
+		return [self.session.merge(instance, load = False) for instance in instances]
+
+	def _paginate(self, query, page_number, page_size, count_key, statements = None):
+		"""Fetch a page of collection. Total is computed according to `count` mode:
+		`exact` runs ``COUNT(*)``, `none` skips it, `estimated` uses database planner estimate 
+		and `cached` serves it from :data:`COUNT_CACHE` for `count_ttl` seconds.
+
+		:param query: Filtered and ordered collection query.
+		:param page_number: page_number for collection.
+		:param page_size: page_size for collection.
+		:param count_key: Normalized model, filters and grouping of collection query.
+		:param statements: :class:`CachedStatements` of collection, used instead of `query` if provided.
+
+		"""
+		if statements is not None:
+			fetch = statements.fetch
+		else:
+			fetch = lambda limit, offset: query.limit(limit).offset(offset).all()
+		
+		offset = (page_number - 1) * page_size
+		if self.count == CountConst.NONE:
+			items = fetch(page_size + 1, offset)
+			return UncountedPagination(query, page_number, page_size, items[:page_size], len(items) > page_size)
+
+		pending = self._count_concurrently(query, count_key, statements)
+		items = fetch(page_size, offset)
+		if page_number == 1 and len(items) < page_size:
+			if pending is not None:
+				pending.cancel()
+			total = len(items)
+		elif pending is not None:
+			self.pending_total = pending
+			total = None
+		else:
+			total = self._count(query, count_key, statements)
+		return Pagination(query, page_number, page_size, total, items)
+
+	def _count_concurrently(self, query, count_key, statements = None):
+		"""Submit exact count of collection to :data:`FAN_OUT` if `parallel` is enabled and `count`
+		mode requires it. Returns a :class:`~concurrent.futures.Future` or ``None``.
+		"""
+		if not self.parallel or self.count not in (CountConst.EXACT, CountConst.CACHED):
+			return None
+		if self.count == CountConst.CACHED and COUNT_CACHE.get(count_key) is not None:
+			return None
+		
+		bind = self.session.get_bind(mapper = sqlalchemy_inspect(self.model))
+		if statements is not None:
+			count = lambda session: statements.count(session)
+		else:
+			count = lambda session: query.with_session(session).order_by(None).count()
+		return FAN_OUT.submit(bind, partial(_run_timed, self.limits.statement_timeout, count))
+
+	def _await_total(self, collection, count_key):
+		"""Set total of `collection` from :attr:`pending_total`, if it's counted concurrently.
+		"""
+		pending, self.pending_total = self.pending_total, None
+		if pending is None:
+			return
+		collection.total = pending.result()
+		if self.count == CountConst.CACHED:
+			COUNT_CACHE.set(count_key, collection.total, ttl = self.count_ttl)
+
+	def _count(self, query, count_key, statements = None):
+		"""Total of collection query according to `count` mode. Falls back to exact count if
+		estimate is not available.
+		"""
+		if statements is not None:
+			exact_count = statements.count
+		else:
+			exact_count = lambda: query.order_by(None).count()
+		
+		total = None
+		if self.count == CountConst.CACHED:
+			total = COUNT_CACHE.get(count_key)
+			if total is None:
+				total = exact_count()
+				COUNT_CACHE.set(count_key, total, ttl = self.count_ttl)
+		
+		elif self.count == CountConst.ESTIMATED:
+			total = estimate_count(self.session, query)
+		
+		if total is None:
+			total = exact_count()
+		return total
+
+	def _search_keyset(self, query, model, pk_name, sort, page_size, cursor):
+		"""Keyset pagination of collection. Rows are ordered by `sort` fields followed by primary 
+		key and page boundary is applied as a WHERE clause on these columns, so cost of a page
+		doesn't depend on its position and no COUNT is required. Returns :class:`CursorPagination`.
+
+		:param query: Filtered collection query.
+		:param model: model class of collection.
+		:param pk_name: primary key name of `model`.
+		:param sort: sort attribute(s) for collection. Related model attributes are not supported.
+		:param page_size: page_size for collection.
+		:param cursor: cursor received in query string. Empty string for first page.
+
+		"""
+		keys = list(sort or [])
+		for symbol, field_name in keys:
+			if '.' in field_name:
+				raise ValidationError("Sorting by related attribute {0} is not supported with cursor pagination".format(field_name))
+			#`column > NULL` never holds, rows past a NULL boundary would be skipped
+			columns = getattr(getattr(model, field_name).property, 'columns', ())
+			if any(column.nullable for column in columns):
+				raise ValidationError("Sorting by nullable attribute {0} is not supported with cursor pagination".format(field_name))
+		if pk_name not in [field_name for symbol, field_name in keys]:
+			keys.append(('+', pk_name))
+
+		if cursor:
+			direction, values = decode_cursor(cursor)
+			if len(values) != len(keys):
+				raise ValidationError("Cursor doesn't match sort order: {0}".format(cursor))
+			values = [string_to_datetime(model, field_name, value) for (symbol, field_name), value in zip(keys, values)]
+		else:
+			direction, values = PaginationConst.CURSOR_NEXT, None
+		
+		backwards = direction == PaginationConst.CURSOR_PREV
+		columns = [(getattr(model, field_name), (symbol == '+') != backwards) for symbol, field_name in keys]
+
+		if values is not None:
+			query = query.filter(keyset_criterion(columns, values))
+		query = query.order_by(*[column.asc() if ascending else column.desc() for column, ascending in columns])
+
+		items = query.limit(page_size + 1).all()
+		has_more = len(items) > page_size
+		items = items[:page_size]
+		if backwards:
+			items.reverse()
+
+		next_cursor = prev_cursor = None
+		if items:
+			key_values = lambda item: [getattr(item, field_name) for symbol, field_name in keys]
+			if has_more or backwards:
+				next_cursor = encode_cursor(PaginationConst.CURSOR_NEXT, key_values(items[-1]))
+			if values is not None and (has_more or not backwards):
+				prev_cursor = encode_cursor(PaginationConst.CURSOR_PREV, key_values(items[0]))
+		return CursorPagination(items, page_size, cursor, next_cursor, prev_cursor)
@@ -4,18 +4,26 @@ like resource expansion, field selection, field exclusion and skip relationship
 """
 
 import re
+from collections import namedtuple
 from sqlalchemy.exc import NoInspectionAvailable
-from sqlalchemy.ext.hybrid import HYBRID_PROPERTY
 from sqlalchemy import Column
 from .resource_info import resource_info
+from .metadata import model_metadata
 from sqlalchemy.inspection import inspect as sqlalchemy_inspect
-from datetime import date, datetime, time, timedelta
 from .exception import IllegalArgumentError, SerializationException
-from .utils import get_relations, get_related_model, parse_expansions
+from .utils import get_relations, get_related_model, parse_expansions, find_expansion
 from sqlalchemy.orm import class_mapper
-from flask_sqlalchemy import BaseQuery
-from .const import PaginationConst, SerializationConst, RelTypeConst, CollectionEvaluationConst, ResourceInfoConst
-from .utils import is_like_list, get_pagination_links, get_paginated_url
+from flask_sqlalchemy import BaseQuery, Pagination
+from .const import PaginationConst, SerializationConst, RelTypeConst, CollectionEvaluationConst, ResourceInfoConst, CacheConst
+from .utils import is_like_list, get_pagination_links, get_paginated_url, LRUCache
+
+#Namedtuple holding everything needed to serialize instances of a model for one combination of
+#fields, exclude and expand options. Built once by `Serializer.compile` and reused for every row.
+SERIALIZATION_PLAN = namedtuple('SERIALIZATION_PLAN', ['model', 'pk_name', 'columns', 'relations', 'expanded'])
+#Namedtuple holding a relation of a `SERIALIZATION_PLAN`, its related model and expansion options.
+RELATION_PLAN = namedtuple('RELATION_PLAN', ['name', 'related_model', 'expand', 'fields', 'children'])
+#First page of an empty `lazy='dynamic'` relation.
+EMPTY_PAGE = Pagination(None, PaginationConst.PAGE_NUMBER, PaginationConst.PAGE_SIZE, 0, [])
 
 """Serialization Helper Methods"""
 def get_column_name(column):
@@ -36,9 +44,9 @@ def foreign_key_columns(model):
     return [c for c in all_columns if c.foreign_keys]
 
 def foreign_keys(model):
-    return [column.name for column in foreign_key_columns(model)]
+    return list(model_metadata(model).foreign_keys)
 
-def expand_resource(related_value, fields, serialize_rel = False):
+def expand_resource(related_value, fields, serialize_rel = False, expand = None):
     
     if isinstance(related_value, list):
         related_model = related_value[0]
@@ -46,12 +54,42 @@ def expand_resource(related_value, fields, serialize_rel = False):
         related_model = related_value
     
     serializer = resource_info(ResourceInfoConst.SERIALIZER, related_model)
-    data = serializer(related_value, fields = fields, serialize_rel = False)
+    #Nested expansions embed expanded relations only
+    if expand:
+        serialize_rel = SerializationConst.EXPANDED
+    data = serializer(related_value, fields = fields, expand = expand or None, serialize_rel = serialize_rel)
     
     pk_id_ = getattr(related_model, resource_info(ResourceInfoConst.PRIMARY_KEY,related_model))
     self_link = resource_info(ResourceInfoConst.URL, related_model, pk_id = pk_id_)
     return data, self_link
 
+def plan_relationship(model, relation, expand = None):
+    """Resolve related model and expansion options of a relation. Returns a `RELATION_PLAN`.
+
+    :param model: Resource model class.
+    :param relation: relation name.
+    :param expand: Parsed expansions, see :func:`~stargate.utils.parse_expansions`.
+
+    """
+    expansion = find_expansion(expand, relation)
+    
+    if expansion is None:
+        return RELATION_PLAN(relation, get_related_model(model, relation), False, None, ())
+
+    return RELATION_PLAN(relation, get_related_model(model, relation), True, expansion.fields, expansion.children)
+
+def _column_values(plan, instance):
+    """Return `{column: value}` of columns in `plan` for `instance`. Callable attributes 
+    are invoked.
+    """
+    values = {}
+    for column in plan.columns:
+        val = getattr(instance, column)
+        if callable(val):
+            val = val()
+        values[column] = val
+    return values
+
 def serialize_relationship(model, instance, relation, expand = None):
     """Relation serializer function. This method is called from _serialize_one() on all the 
     relations of object.
@@ -59,40 +97,38 @@ def serialize_relationship(model, instance, relation, expand = None):
     :param model: Resource model class.
     :param instance: Primary resource.
     :param relation: relation name.
-    :param expand: Parsed list of resource that need to be expanded.
+    :param expand: Resource expansion string or parsed expansions.
         
     """
-    EXPAND = True
-    fields = None
-    
-    if expand is None:
-        EXPAND = False
-    
-    else:
-        if  relation in expand['expand']:
-            pass
-        
-        else:
-            relation_ = [t[0] for t in expand['expand_partial'] if t[0] == relation]
-            if relation_:
-                for t in expand['expand_partial']: 
-                    if t[0] == relation:
-                        fields = t[1]
-            else:
-                EXPAND = False
-                
+    pk_name = resource_info(ResourceInfoConst.PRIMARY_KEY, model)
+    if expand is not None:
+        expand = parse_expansions(model, expand)
+    return _serialize_relation(model, instance, pk_name, plan_relationship(model, relation, expand))
+
+def _serialize_relation(model, instance, pk_name, rel_plan, prefetched = None):
+    """Serialize a single relation of `instance` using a precomputed `RELATION_PLAN`. First page
+    of `lazy='dynamic'` relations is taken from `prefetched` if available (see 
+    :meth:`~stargate.search.Search._search_collection`).
+    """
+    relation = rel_plan.name
+    related_model = rel_plan.related_model
+    EXPAND = rel_plan.expand
+    fields = rel_plan.fields
+    children = rel_plan.children
 
     result = {}
-    related_model = get_related_model(model, relation)
     related_value = getattr(instance, relation)
     pagination_links = {}
 
-    pk_value = getattr(instance, resource_info(ResourceInfoConst.PRIMARY_KEY,model))
+    pk_value = getattr(instance, pk_name)
     #Lazy Loading
     if isinstance(related_value, BaseQuery):
-        related_value_paginated = related_value.paginate(PaginationConst.PAGE_NUMBER, PaginationConst.PAGE_SIZE, error_out=False)
+        if prefetched is not None and relation in prefetched:
+            related_value_paginated = prefetched[relation].get(pk_value) or EMPTY_PAGE
+        else:
+            related_value_paginated = related_value.paginate(PaginationConst.PAGE_NUMBER, PaginationConst.PAGE_SIZE, error_out=False)
         related_value = related_value_paginated.items
-        if related_value:
+        if related_value_paginated.total:
             self_link = resource_info(ResourceInfoConst.URL, model, pk_id = pk_value, relation = relation)
             result['meta'] = {}
             result['meta']['_links'] = get_pagination_links(PaginationConst.PAGE_SIZE, PaginationConst.PAGE_NUMBER, related_value_paginated.total, 1, related_value_paginated.pages, related_value_paginated.next_num, related_value_paginated.prev_num , url = self_link)
@@ -102,7 +138,7 @@ def serialize_relationship(model, instance, relation, expand = None):
             result['meta']['_evaluation'] = CollectionEvaluationConst.LAZY
             
             if EXPAND:
-                result['data'], self_link = expand_resource(related_value, fields, serialize_rel = False)
+                result['data'], self_link = expand_resource(related_value, fields, expand = children)
     
     #Eager Loading
     elif isinstance(related_value, list):
@@ -114,7 +150,7 @@ def serialize_relationship(model, instance, relation, expand = None):
             result['meta']['_evaluation'] = CollectionEvaluationConst.EAGER
 
             if EXPAND:
-                result['data'], self_link = expand_resource(related_value, fields, serialize_rel = False)
+                result['data'], self_link = expand_resource(related_value, fields, expand = children)
     
     #Single Instance.
     elif related_value is not None:
@@ -124,10 +160,9 @@ def serialize_relationship(model, instance, relation, expand = None):
         result['meta'] = {}
         result['meta']['_type'] = RelTypeConst.TO_ONE
         result['meta']['_links'] = {'self': self_link}
-        serializer = resource_info(ResourceInfoConst.SERIALIZER,related_model)
         
         if EXPAND:
-            result['data'], self_link = expand_resource(related_value, fields, serialize_rel = False)
+            result['data'], self_link = expand_resource(related_value, fields, expand = children)
     else:
         result['data'] = {}
     return result
@@ -144,6 +179,11 @@ class Serializer():
     :param primary_key: Primary key column for model.
     :param fields: Resource attributes to be serialized. By default all attributes will be seriaized.
     :param exclude: Exclude resource attributes from serialization.
+    :param cache_size: Maximum number of serialization plans kept by this serializer.
+
+    Columns, relations and expansions are resolved once per model and combination of 
+    `fields`, `exclude` and `expand` options by :meth:`~Serializer.compile` and cached, 
+    so serializing a collection only fetches and converts attribute values.
 
     This class can be used globally within stargate package. Example usage of this class:
     #Return User serialization class
@@ -154,9 +194,10 @@ class Serializer():
         data = serializer(data)
 
     """
-    def __init__(self, model, primary_key, fields = None, exclude = None):
+    def __init__(self, model, primary_key, fields = None, exclude = None, cache_size = CacheConst.SERIALIZATION_PLANS):
         
         self.model = model
+        self.primary_key = primary_key
         
         if fields is not None and exclude is not None:
             raise IllegalArgumentError('Cannot specify both `fields` and `exclude` keyword'
@@ -170,8 +211,9 @@ class Serializer():
         
         self.allowed_fields = fields
         self.exclude = exclude
+        self._plans = LRUCache(cache_size)
     
-    def __call__(self, result_set, fields = None, exclude = None, expand = None, serialize_rel = True):
+    def __call__(self, result_set, fields = None, exclude = None, expand = None, serialize_rel = True, prefetched = None):
         """Callable for Serializer class. Can serialize list and single instance of SQLAlchemy 
         resutlset objects.
         
@@ -187,98 +229,127 @@ class Serializer():
         :param fields: Resource attributes to be serialized.
         :param exclude: Resource attributes to be exluded from serialized.
         :param expand: Exclude resource attributes from serialization.
-        :param serialize_rel: Boolean for serializing related resources.
+        :param serialize_rel: Boolean for serializing related resources, `SerializationConst.EXPANDED`
+            to serialize expanded relations only.
+        :param prefetched: Prefetched `lazy='dynamic'` relations from :attr:`~stargate.search.Search.prefetched`.
 
         """
         if result_set:
             instance = result_set[0] if isinstance(result_set, list) else result_set
-            model = type(instance)
-        
-            columns = set()
+            plan = self.compile(type(instance), fields = fields, exclude = exclude, expand = expand)
             
-            if fields  and exclude:
-                raise IllegalArgumentError('Cannot specify both `fields` and `exclude` keyword'
-                                 ' arguments simultaneously')
-            if self.allowed_fields:
-                columns = self.allowed_fields
+            if isinstance(result_set, list):
+                return self._serialize_many(plan, result_set, serialize_rel = serialize_rel, prefetched = prefetched)
             
             else:
-                try:
-                    inspected_instance = sqlalchemy_inspect(model)
-                except NoInspectionAvailable:
-                    raise IllegalArgumentError(msg="No inspection available for class{0}".format(model.__class__))
-                column_attrs = inspected_instance.column_attrs.keys()
-                descriptors = inspected_instance.all_orm_descriptors.items()
-                hybrid_columns = [k for k, d in descriptors if d.extension_type == HYBRID_PROPERTY]
-                columns = column_attrs + hybrid_columns
-                foreign_key_columns = foreign_keys(model)
-                columns = [c for c in columns if c not in foreign_key_columns]
-                
-            if self.exclude:
-                columns = [c for c in columns if c not in self.exclude]
+                return self._serialize_one(plan, result_set, serialize_rel = serialize_rel, prefetched = prefetched)
+        else:
+            return None
 
-            pk_name = resource_info(ResourceInfoConst.PRIMARY_KEY, model)
-            
-            if fields:
-                fields = set(fields)
-                fields.add(pk_name)
-                columns = [c for c in columns if c in fields]
+    def compile(self, model = None, fields = None, exclude = None, expand = None):
+        """Return the `SERIALIZATION_PLAN` for `model` and the provided request options. Plans 
+        are built on first use and kept in a bounded LRU cache.
 
-            if exclude:
-                columns = [c for c in columns if c not in fields]
-            
-            if expand:
-                expand = parse_expansions(model, expand)
-            
-            if isinstance(result_set, list):
-                return self._serialize_many(columns, result_set, expand = expand, serialize_rel = serialize_rel)
+        :param model: Model class of instances to be serialized. Defaults to serializer model.
+        :param fields: Resource attributes to be serialized.
+        :param exclude: Resource attributes to be exluded from serialized.
+        :param expand: Resource expansion string or parsed expansions.
+
+        """
+        if fields and exclude:
+            raise IllegalArgumentError('Cannot specify both `fields` and `exclude` keyword'
+                             ' arguments simultaneously')
+        model = self.model if model is None else model
+        expand = parse_expansions(model, expand) if expand else None
+        key = (model, frozenset(fields) if fields else None, frozenset(exclude) if exclude else None, expand)
+        plan = self._plans.get(key)
+
+        if plan is None:
+            plan = self._build_plan(model, fields, exclude, expand)
+            self._plans.set(key, plan)
+        return plan
+
+    def _build_plan(self, model, fields, exclude, expand):
+        """Called internally from compile() to resolve serialized columns and relations.
+        """
+        if self.allowed_fields:
+            columns = self.allowed_fields
+        
+        else:
+            try:
+                metadata = model_metadata(model)
+            except NoInspectionAvailable:
+                raise IllegalArgumentError(msg="No inspection available for class{0}".format(model.__class__))
+            columns = metadata.columns + metadata.hybrids
+            columns = [c for c in columns if c not in metadata.foreign_keys]
             
-            else:
-                return self._serialize_one(columns, result_set, expand = expand, serialize_rel = serialize_rel)
+        if self.exclude:
+            columns = [c for c in columns if c not in self.exclude]
+
+        if model is self.model:
+            pk_name = self.primary_key
         else:
-            return None
+            pk_name = resource_info(ResourceInfoConst.PRIMARY_KEY, model)
+        
+        if fields:
+            fields = set(fields)
+            fields.add(pk_name)
+            columns = [c for c in columns if c in fields]
 
-    def _serialize_many(self, columns, result_set, expand = None, serialize_rel = False):
+        if exclude:
+            columns = [c for c in columns if c not in exclude or c == pk_name]
+        
+        relations = tuple(plan_relationship(model, rel, expand = expand) for rel in get_relations(model))
+        expanded = tuple(rel for rel in relations if rel.expand)
+        return SERIALIZATION_PLAN(model, pk_name, tuple(columns), relations, expanded)
+
+    def _serialize_many(self, plan, result_set, serialize_rel = False, prefetched = None):
         """Called internally from __call__ if list of object need to be serialized
         
-        :param columns: Resource database table columns.
+        :param plan: `SERIALIZATION_PLAN` returned by :meth:`~Serializer.compile`.
         :param result_set: Objects needs to be serilized.
-        :param expand: List of relations need to be expanded.
         :param serialize_rel: Boolean for serializing related resources.
         
         """
         result = []
         for instance in result_set:
             try:
-                serialized = self._serialize_one(columns, instance, expand = expand, serialize_rel = serialize_rel)
+                serialized = self._serialize_one(plan, instance, serialize_rel = serialize_rel, prefetched = prefetched)
                 result.append(serialized)
             except SerializationException as exception:
                 raise SerializationException(instance, str(exception))
         return result
 
-    def _serialize_one(self, columns, instance, expand = None, serialize_rel = None):
+    def records(self, instances, fields = None, exclude = None):
+        """Yield flat column records for `instances`, used by collection export. Records contain
+        primary key and serialized columns only: no links, no relations. 
+
+        :param instances: iterable of model instances (e.g. a `yield_per` query).
+        :param fields: fields to be included.
+        :param exclude: fields to be excluded.
+        :return: `(columns, records)` tuple, where records is a generator of dicts.
+
+        """
+        plan = self.compile(fields = fields, exclude = exclude)
+        columns = (plan.pk_name,) + tuple(c for c in plan.columns if c != plan.pk_name)
+        records = (_column_values(plan, instance) for instance in instances)
+        return columns, records
+
+    def _serialize_one(self, plan, instance, serialize_rel = None, prefetched = None):
         """Called internally from __call__ if single object need to be serialized
         
-        :param columns: Resource database table columns.
+        :param plan: `SERIALIZATION_PLAN` returned by :meth:`~Serializer.compile`.
         :param instance: Object needs to be serilized.
-        :param expand: List of relations need to be expanded.
         :param serialize_rel: Boolean for serializing related resources.
+        :param prefetched: Prefetched `lazy='dynamic'` relations.
         
         """
         result = {}
         
         try:
-            model = type(instance)
-            pk_name = resource_info(ResourceInfoConst.PRIMARY_KEY, model)
-            attributes = dict((column, getattr(instance, column))
-                              for column in columns)
-            attributes = dict((k, (v() if callable(v) else v))
-                              for k, v in attributes.items())
-            for key, val in attributes.items():
-                if isinstance(val, (date, datetime, time)):
-                    attributes[key] = val.isoformat()
-                elif isinstance(val, timedelta):
-                    attributes[key] = total_seconds(val)
+            model = plan.model
+            pk_name = plan.pk_name
+            attributes = _column_values(plan, instance)
             
             if attributes:
                 result[pk_name] = attributes.pop(pk_name)
@@ -286,10 +357,10 @@ class Serializer():
                 result['_link'] = resource_info(ResourceInfoConst.URL, model, pk_id = result[pk_name])
             
             if serialize_rel:
-                relations = get_relations(model)
-                result[SerializationConst.EMBEDDED] = dict((rel, serialize_relationship(model, instance, rel, expand = expand))
+                relations = plan.expanded if serialize_rel == SerializationConst.EXPANDED else plan.relations
+                result[SerializationConst.EMBEDDED] = dict((rel.name, _serialize_relation(model, instance, pk_name, rel, prefetched))
                                                         for rel in relations)
             return result
             
         except SerializationException as exception:
-            raise SerializationException(instance, str(exception))
\ No newline at end of file
+            raise SerializationException(instance, str(exception))
@@ -6,31 +6,91 @@ for parameters and return type information.
 import datetime
 import re
 import math
+import json
+import base64
+import binascii
+import threading
+import time
+from collections import OrderedDict, namedtuple
 from sqlalchemy.orm.exc import MultipleResultsFound
 from sqlalchemy.orm.exc import NoResultFound
-from .exception import StargateException, ResourceNotFound
+from .exception import StargateException, ResourceNotFound, ValidationError
 from .resource_info import resource_info
-from .const import ResourceInfoConst
-from sqlalchemy import inspect as sqlalchemy_inspect
+from .metadata import model_metadata
+from .const import ResourceInfoConst, ResourceConst, CacheConst, PaginationConst
 from dateutil.parser import parse as parse_datetime
 from sqlalchemy.sql.expression import ColumnElement
 from sqlalchemy.ext.associationproxy import AssociationProxy
 from sqlalchemy.orm import RelationshipProperty as RelProperty
 from sqlalchemy import Date, DateTime, Interval, Time
-from sqlalchemy.orm import class_mapper
+from sqlalchemy import event
+from sqlalchemy.orm import class_mapper, scoped_session, Session
 from sqlalchemy.orm import RelationshipProperty as RelProperty
 from sqlalchemy.ext.associationproxy import AssociationProxy
 from sqlalchemy.inspection import inspect
-from flask import request
+from flask import request, g, has_app_context
+from werkzeug.urls import url_encode
+
+class LRUCache():
+	"""Thread safe mapping bounded to `maxsize` entries. Least recently used entries are
+	evicted first once the bound is reached. Entries can optionally expire after `ttl` seconds.
+	Used to memoize per-model computations like serialization plans.
+
+	:param maxsize: maximum number of entries to keep.
+	:param ttl: default time to live of entries in seconds. `None` means entries never expire.
+
+	"""
+	def __init__(self, maxsize = 128, ttl = None):
+		self.maxsize = maxsize
+		self.ttl = ttl
+		self._data = OrderedDict()
+		self._lock = threading.RLock()
+
+	def get(self, key, default = None):
+		with self._lock:
+			try:
+				expires, value = self._data.pop(key)
+			except KeyError:
+				return default
+			if expires is not None and expires < time.time():
+				return default
+			self._data[key] = (expires, value)
+			return value
+
+	def set(self, key, value, ttl = None):
+		ttl = self.ttl if ttl is None else ttl
+		expires = time.time() + ttl if ttl is not None else None
+		with self._lock:
+			self._data.pop(key, None)
+			self._data[key] = (expires, value)
+			while len(self._data) > self.maxsize:
+				self._data.popitem(last = False)
+
+	def delete(self, key):
+		with self._lock:
+			self._data.pop(key, None)
+
+	def clear(self):
+		with self._lock:
+			self._data.clear()
+
+	def __contains__(self, key):
+		return key in self._data
+
+	def __len__(self):
+		return len(self._data)
 
 def session_query(session, model):
-	"""return SQLAlchemy query object against model class"""
+	"""return SQLAlchemy query object against model class. Query of model query property is
+	moved to `session` if it's a plain session other than its own, e.g. of a read replica."""
 	if hasattr(model, 'query'):
 		if callable(model.query):
 			query = model.query()
 		else:
 			query = model.query
 		if hasattr(query, 'filter'):
+			if not isinstance(session, scoped_session) and query.session is not session:
+				query = query.with_session(session)
 			return query
 	return session.query(model)
 
@@ -39,29 +99,35 @@ def is_like_list(instance, relation):
 	property ``userlist``
 
 	"""
-	if relation in instance._sa_class_manager:
-		return instance._sa_class_manager[relation].property.uselist
-	elif hasattr(instance, relation):
-		attr = getattr(instance._sa_instance_state.class_, relation)
-		if hasattr(attr, 'property'):
-			return attr.property.uselist
-		related_value = getattr(type(instance), relation, None)
-		if isinstance(related_value, AssociationProxy):
-			local_prop = related_value.local_attr.prop
-		if isinstance(local_prop, RelProperty):
-			return local_prop.uselist
-	return False
-
-def get_resource(session, model, pk_id):
-	"""Get resource from db with specified model class and primary key value.
+	relation = model_metadata(type(instance)).relations.get(relation)
+	return relation.uselist if relation is not None else False
+
+def get_resource(session, model, pk_id, cached = False, options = None):
+	"""Get resource from db with specified model class and primary key value. Lookup goes 
+	through session identity map first (see :meth:`~sqlalchemy.orm.query.Query.get`), so a
+	resource already loaded in session doesn't hit db again. For composite primary keys `pk_id`
+	can be a tuple or comma separated string of values in mapper primary key order.
+
+	If `cached` is set resource is also kept in a per request cache of `session`, which holds strong
+	references unlike identity map, so repeated lookups within one request are free. Cache is dropped
+	whenever session flushes, ends a transaction or detaches objects. `options` are loader options
+	applied if resource has to be loaded from db.
 	"""
 	pk_name = resource_info(ResourceInfoConst.PRIMARY_KEY, model)
-		
+	ident = primary_key_identity(model, pk_name, pk_id)
+	cache = _request_resources(session) if cached else None
+	
+	if cache is not None and (model, ident) in cache:
+		return cache[(model, ident)]
+
 	try:
 		query = session_query(session, model)
-		query = query.filter(getattr(model, pk_name) == pk_id)
-		resource = query.first()
-		return resource
+		if options:
+			query = query.options(*options)
+		if ident is not None:
+			resource = query.get(ident)
+		else:
+			resource = query.filter(getattr(model, pk_name) == pk_id).first()
 	except NoResultFound as exception:
 		detail = 'No result found'
 		raise ResourceNotFound(model.__name__(), id = pk_name, msg=detail)
@@ -69,19 +135,124 @@ def get_resource(session, model, pk_id):
 	except MultipleResultsFound as exception:
 		detail = 'Multiple results found'
 		raise StargateException(msg=detail)
+	
+	if cache is not None and resource is not None:
+		cache[(model, ident)] = resource
+	return resource
+
+def primary_key_identity(model, pk_name, pk_id):
+	"""Return identity of `pk_id` for :meth:`~sqlalchemy.orm.query.Query.get`: a value coerced
+	to primary key column type, or a tuple for composite keys. Returns ``None`` if `pk_name` is not
+	mapper primary key, in which case resource can only be looked up with a filter.
+	"""
+	pk_attributes = model_metadata(model).pk_attributes
+	
+	try:
+		if len(pk_attributes) == 1:
+			if pk_attributes[0].key != pk_name:
+				return None
+			return _coerce_pk(pk_attributes[0], pk_id)
+
+		values = pk_id.split(',') if isinstance(pk_id, str) else pk_id
+		if len(values) != len(pk_attributes):
+			raise ValidationError(msg="Expected {0} primary key values got {1}".format(len(pk_attributes), pk_id))
+		return tuple(_coerce_pk(attribute, value) for attribute, value in zip(pk_attributes, values))
+	
+	except TypeError:
+		raise ValidationError(msg="Malformed primary key {0}".format(pk_id))
+
+def _request_resources(session):
+	"""Per request resource cache of `session`, ``None`` outside of application context.
+	"""
+	if not has_app_context():
+		return None
+	if isinstance(session, scoped_session):
+		session = session()
+	caches = getattr(g, ResourceConst.REQUEST_CACHE_ATTR, None)
+	if caches is None:
+		caches = {}
+		setattr(g, ResourceConst.REQUEST_CACHE_ATTR, caches)
+	return caches.setdefault(session, {})
+
+def _clear_request_resources(session, *args):
+	"""Drop per request resource cache of `session`, objects it holds may be stale or detached.
+	"""
+	if has_app_context():
+		getattr(g, ResourceConst.REQUEST_CACHE_ATTR, {}).pop(session, None)
+
+def _clear_bulk_request_resources(context):
+	_clear_request_resources(context.session)
+
+for _event in ('after_flush', 'after_commit', 'after_rollback', 'after_soft_rollback', 'persistent_to_detached'):
+	event.listen(Session, _event, _clear_request_resources)
+event.listen(Session, 'after_bulk_update', _clear_bulk_request_resources)
+event.listen(Session, 'after_bulk_delete', _clear_bulk_request_resources)
+
+def get_resources(session, model, pk_ids, chunk_size = ResourceConst.IN_CHUNK_SIZE):
+	"""Get resources of specified model class against a list of primary key values with one
+	``IN`` query per `chunk_size` ids. Returns `{pk_value: resource}` dict keyed by values as 
+	provided (e.g. ``"1"`` and ``1`` both resolve integer key), ids not found in db are absent from it.
+	"""
+	pk_name = resource_info(ResourceInfoConst.PRIMARY_KEY, model)
+	pk_column = getattr(model, pk_name)
+	
+	try:
+		coerced = dict((pk_id, _coerce_pk(pk_column, pk_id)) for pk_id in set(pk_ids))
+	except TypeError:
+		raise ValidationError(msg="Malformed primary key in {0}".format(list(pk_ids)))
+	
+	values = list(set(coerced.values()))
+	found = {}
+	for start in range(0, len(values), chunk_size):
+		query = session_query(session, model).filter(pk_column.in_(values[start:start + chunk_size]))
+		found.update((getattr(resource, pk_name), resource) for resource in query)
+	
+	return dict((pk_id, found[value]) for pk_id, value in coerced.items() if value in found)
+
+def require_resources(session, model, pk_ids):
+	"""Same as :func:`get_resources` but raise :class:`~stargate.exception.ResourceNotFound`
+	listing every primary key value not found in db.
+	"""
+	resources = get_resources(session, model, pk_ids)
+	missing = [pk_id for pk_id in pk_ids if pk_id not in resources]
+	if missing:
+		detail = 'No result found for {0} primary key(s) {1}'.format(model.__name__, missing)
+		raise ResourceNotFound(model.__name__, id = missing, msg = detail)
+	return resources
+
+def _coerce_pk(pk_column, pk_id):
+	"""Convert primary key value received in payload to python type of primary key column, so 
+	it can be matched against values loaded from db.
+	"""
+	try:
+		python_type = pk_column.property.columns[0].type.python_type
+	except (AttributeError, NotImplementedError):
+		return pk_id
+	hash(pk_id)
+	if not isinstance(pk_id, str) or python_type is str:
+		return pk_id
+	try:
+		return python_type(pk_id)
+	except (TypeError, ValueError):
+		return pk_id
 
 def has_field(model, fieldname):
 	"""Check if the specified model has the provided fieldname defined.
 	"""
-	descriptors = sqlalchemy_inspect(model).all_orm_descriptors._data
-	if fieldname in descriptors and hasattr(descriptors[fieldname], 'fset'):
-		return descriptors[fieldname].fset is not None
-	return hasattr(model, fieldname)
+	metadata = model_metadata(model)
+	if fieldname in metadata.readonly:
+		return False
+	return fieldname in metadata.column_types or fieldname in metadata.relations or hasattr(model, fieldname)
 
 def get_field_type(model, fieldname):
 	"""Check where a given field is a model attribute, association proxy or Relationship 
 	property
 	"""
+	metadata = model_metadata(model)
+	if fieldname in metadata.column_types:
+		return metadata.column_types[fieldname]
+	if fieldname in metadata.relations:
+		return None
 	field = getattr(model, fieldname)
 	if isinstance(field, ColumnElement):
 		return field.type
@@ -117,9 +288,18 @@ def string_to_datetime(model, fieldname, value):
 		return datetime.timedelta(seconds=value)
 	return value
 
-def get_pagination_links(page_size, page_number, num_results, first, last, next, prev, url = None):
+def request_url(relative = False):
+	"""Url of current request without query string, relative to host if `relative` is set.
+	"""
+	if relative:
+		return request.script_root + request.path
+	return request.base_url
+
+def get_pagination_links(page_size, page_number, num_results, first, last, next, prev, url = None, relative = False):
 	"""Get pagination links for a collection provided collection's first, last, next and prev.
-	In case of related collection pagination provide initial `url`. 
+	In case of related collection pagination provide initial `url`. If `num_results` is `None`
+	`last` link is not available and `next` is used as provided. Links of current request are
+	relative to host if `relative` is set.
 	"""
 	if url is not None:
 		link_url =  url	
@@ -129,19 +309,25 @@ def get_pagination_links(page_size, page_number, num_results, first, last, next,
 		new_query = dict((k, v) for k, v in query_params.items()
 							if k not in ('page_number', 'page_size'))
 		new_query_string = '&'.join(map('='.join, new_query.items()))
-		link_url =  '{0}?{1}'.format(request.base_url, new_query_string)
+		link_url =  '{0}?{1}'.format(request_url(relative), new_query_string)
 
-	if num_results == 0:
+	#Total was not counted, `next` is provided by caller and `last` is unknown
+	if num_results is None:
+		last = None
+
+	elif num_results == 0:
 		last = 1
+		next = None
 
 	else:
 		last = int(math.ceil(num_results / page_size))
+		next = page_number + 1 if page_number < last else None
 
 	prev = page_number - 1 if page_number > 1 else None
-	next = page_number + 1 if page_number < last else None
 
 	first = get_paginated_url(link_url,first,page_size)
-	last = get_paginated_url(link_url,last,page_size)
+	if last is not None:
+		last = get_paginated_url(link_url,last,page_size)
 
 	if next is not None:
 		next = get_paginated_url(link_url,next,page_size)
@@ -165,22 +351,56 @@ def get_paginated_url(link, page_number, page_size):
 		return "{0}?page_number={1}&page_size={2}".format(link, page_number, page_size)
 
 
+def get_cursor_links(page_size, cursor, next_cursor, prev_cursor, url = None, relative = False):
+	"""Get self, next and prev links of a cursor paginated collection. Links are only
+	generated for cursors which are not `None`. In case of related collection pagination
+	provide initial `url`, otherwise links are relative to host if `relative` is set.
+	"""
+	if url is not None:
+		link_url = url
+		params = []
+	else:
+		link_url = request_url(relative)
+		params = [(k, v) for k, v in request.args.items(multi = True)
+					if k not in ('page_number', 'page_size', 'cursor')]
+
+	def link(token):
+		if token is None:
+			return None
+		return '{0}?{1}'.format(link_url, url_encode(params + [('cursor', token), ('page_size', page_size)]))
+
+	return {'self': link(cursor), 'next': link(next_cursor), 'prev': link(prev_cursor)}
+
+def encode_cursor(direction, values):
+	"""Encode pagination direction and sort key values of boundary row into an opaque
+	url safe cursor.
+	"""
+	document = json.dumps([direction, values], default = lambda v: v.isoformat() if hasattr(v, 'isoformat') else str(v))
+	return base64.urlsafe_b64encode(document.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+	"""Decode cursor created by :func:`encode_cursor`. Returns tuple of direction and key 
+	values. Raise :class:`~stargate.exception.ValidationError` if cursor is malformed.
+	"""
+	try:
+		padded = cursor + '=' * (-len(cursor) % 4)
+		direction, values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+	except (TypeError, ValueError, binascii.Error) as exception:
+		raise ValidationError("Malformed cursor: {0}".format(cursor))
+	if not isinstance(values, list) or direction not in (PaginationConst.CURSOR_NEXT, PaginationConst.CURSOR_PREV):
+		raise ValidationError("Malformed cursor: {0}".format(cursor))
+	return direction, values
+
 def get_relations(model):
 	"""Get all relations of a model.
 	"""
-	NON_RELATION_ATTRS = ('query', 'query_class', '_sa_class_manager','_decl_class_registry')
-	return [k for k in dir(model) if not (k.startswith('__') or k in NON_RELATION_ATTRS) and get_related_model(model, k)]
+	return list(model_metadata(model).relation_names)
 	
 def get_related_model(model, relationname):
 	"""Get related model provided with relation name. Relation can be association proxy.
 	"""
-	if hasattr(model, relationname):
-		attr = getattr(model, relationname)
-	if hasattr(attr, 'property') and isinstance(attr.property, RelProperty):
-		return attr.property.mapper.class_
-	if isinstance(attr, AssociationProxy):
-		return get_related_association_proxy_model(attr)
-	return None
+	relation = model_metadata(model).relations.get(relationname)
+	return relation.related_model if relation is not None else None
 
 def get_related_association_proxy_model(attr):
 	prop = attr.remote_attr.property
@@ -199,34 +419,91 @@ def parse_expansions(model, expand):
 		- expand=location(latitude,longitude),city
 			In this case only two attributes of location will be included in response.
 
-		This method return a dict of resource that are to be expanded fully and another dict key
-		which indicates reources which are to be expanded partially.
+		- expand=city(title,location(latitude))
+			Expansions can be nested, here title of city is included along with its location 
+			relationship, which is expanded with latitude only.
+
+		This method return a tuple of `EXPANSION` (sorted by relation name), one for each 
+		relation of `model` to be expanded. `fields` is ``None`` if relation is expanded fully,
+		`children` holds nested expansions of related model in same format. Unknown relations 
+		are skipped. Result is cached per model and expansion string, already parsed expansions
+		are returned as is.
 		
 		Example:
 
 		expand=location(latitude,longitude),city
-		{"expand": city, "expand_partial":('location', [latitude, longitude])}
-
-	"""
-	REGEX_MATCH_FIELD = r'((\w+)\(([\s+\w\s+,\s+.]+)\))'
-	#FIXME: This should be namedtuple
-	nested_fields = re.findall(REGEX_MATCH_FIELD, expand)
-
-	resource = expand
-	resource = re.sub(REGEX_MATCH_FIELD, '', resource)
-	resource = re.sub(r'\s+', '', resource)
-	resource = re.sub(r'\A(?:\s+)?,(?:\s+)?', '', resource)
-	resource = re.sub(r'(?:\s+)?,(?:\s+)?$', '', resource)
-	resource = resource.split(',')
-	expand_full = set(resource)
-
-	all_relations = get_relations(model)
-	all_joins = set()
-	expand_partial = list()
-	for fields in nested_fields:
-		if fields[1] in all_relations:
-			nested_resource_fields = [field.strip() for field in fields[2].split(',') if field is not None]
-			resource_fields = set(nested_resource_fields)
-			expand_partial.append((fields[1], resource_fields))
-	return dict(expand = expand_full, expand_partial = expand_partial)
+		(EXPANSION('city', None, ()), EXPANSION('location', frozenset(['latitude', 'longitude']), ()))
+
+	"""
+	if isinstance(expand, tuple):
+		return expand
+
+	key = (model, expand)
+	expansions = _EXPANSIONS.get(key)
+	if expansions is None:
+		tokens = _EXPANSION_TOKEN.findall(expand)
+		items, position = _parse_expansion_items(tokens, 0)
+		if position != len(tokens):
+			raise ValidationError(msg="Malformed expansion {0}".format(expand))
+		expansions = _resolve_expansions(model, items)
+		_EXPANSIONS.set(key, expansions)
+	return expansions
+
+def find_expansion(expansions, relation):
+	"""Return `EXPANSION` of `relation` from parsed `expansions` or ``None`` if not expanded.
+	"""
+	for expansion in expansions or ():
+		if expansion.name == relation:
+			return expansion
+	return None
+
+#Namedtuple holding an expanded relation, fields of related resource (``None`` for all) and 
+#nested expansions of related resource.
+EXPANSION = namedtuple('EXPANSION', ['name', 'fields', 'children'])
+_EXPANSION_TOKEN = re.compile(r'[\w.]+|[(),]')
+_EXPANSIONS = LRUCache(CacheConst.EXPANSIONS)
+
+def _parse_expansion_items(tokens, position):
+	"""Parse `tokens` of an expansion string into list of `(name, items)` where `items` is ``None`` 
+	for plain names and list in same format for parenthesized names. Returns list and position of 
+	first unconsumed token.
+	"""
+	items = []
+	while position < len(tokens):
+		token = tokens[position]
+		if token == ')':
+			break
+		position += 1
+		if token in ('(', ','):
+			continue
+		if position < len(tokens) and tokens[position] == '(':
+			nested, position = _parse_expansion_items(tokens, position + 1)
+			if position >= len(tokens) or tokens[position] != ')':
+				raise ValidationError(msg="Unbalanced parentheses in expansion")
+			position += 1
+			items.append((token, nested))
+		else:
+			items.append((token, None))
+	return items, position
+
+def _resolve_expansions(model, items):
+	"""Resolve parsed expansion `items` against relations of `model`. Names within parentheses 
+	are fields of related resource unless they are relations of related resource. 
+	"""
+	relations = set(get_relations(model))
+	expansions = {}
+	for name, nested in items:
+		if name not in relations:
+			continue
+		if nested is None:
+			expansions[name] = EXPANSION(name, None, ())
+			continue
+		if name in expansions and expansions[name].fields is None and not expansions[name].children:
+			continue
+		related_model = get_related_model(model, name)
+		related_relations = set(get_relations(related_model))
+		fields = frozenset(n for n, i in nested if i is None and n not in related_relations)
+		children = _resolve_expansions(related_model, [(n, i) for n, i in nested if i is not None or n in related_relations])
+		expansions[name] = EXPANSION(name, fields or None, children)
+	return tuple(expansions[name] for name in sorted(expansions))
 
@@ -9,6 +9,8 @@ from app.models import User, City, Location, TestPrimaryKey
 from app import init_app, db
 from .data_insertion import insert_simple_test_data, insert_filteration_data, insert_pagination_data
 from functools import wraps 
+from contextlib import contextmanager
+from sqlalchemy import event
 
 """Test Decorator"""
 def auth_key_header(func):
@@ -20,6 +22,23 @@ def auth_key_header(func):
         return func(*args, **kw)
     return new_func
 
+"""Test Helpers"""
+@contextmanager
+def count_queries(app, parameters = False):
+	"""Collect statements executed on engine of `db` within block, along with their parameters
+	as `(statement, parameters)` if `parameters` is set. Yields list of collected statements.
+	"""
+	statements = []
+	def before_cursor_execute(conn, cursor, statement, params, *args):
+		statements.append((statement, params) if parameters else statement)
+
+	engine = db.get_engine(app)
+	event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+	try:
+		yield statements
+	finally:
+		event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
 class TestSetup(unittest.TestCase):
 		
 		@classmethod
@@ -0,0 +1,84 @@
+from . import PaginatedTestBase
+import asyncio
+from flask import json
+
+class TestASGIApp(PaginatedTestBase):
+
+		@classmethod
+		def setUpClass(self):
+			super(TestASGIApp, self).setUpClass()
+			self.asgi_app = self.manager.asgi_app(max_workers = 4)
+
+		async def request(self, method, path, query_string = b'', body = b''):
+			messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+			sent = []
+			async def receive():
+				return messages.pop(0)
+			async def send(message):
+				sent.append(message)
+
+			scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query_string, 'root_path': '',
+					'headers': [(b'content-type', b'application/json'), (b'host', b'localhost:5000')],
+					'server': ('localhost', 5000), 'scheme': 'http', 'http_version': '1.1'}
+			await self.asgi_app(scope, receive, send)
+			self.assertEqual(sent[0]['type'], 'http.response.start')
+			self.assertFalse(sent[-1]['more_body'])
+			return sent[0]['status'], b''.join(message.get('body', b'') for message in sent[1:])
+
+		def run_requests(self, *requests):
+			async def gather():
+				return await asyncio.gather(*requests)
+
+			loop = asyncio.new_event_loop()
+			try:
+				return loop.run_until_complete(gather())
+			finally:
+				loop.close()
+
+		def test_concurrent_get(self):
+			pages = range(1, 13)
+			results = self.run_requests(*[self.request('GET', '/api/user', 'page_size=10&page_number={0}'.format(page).encode())
+										for page in pages])
+			for page, (status, body) in zip(pages, results):
+				self.assertEqual(status, 200)
+				response = self.client.get('/api/user?page_size=10&page_number={0}'.format(page), headers={"Content-Type": "application/json"})
+				self.assertEqual(json.loads(body), json.loads(response.get_data()))
+
+		def test_streamed_get(self):
+			(status, body), = self.run_requests(self.request('GET', '/api/user', b'page_size=50&stream=1'))
+			self.assertEqual(status, 200)
+			self.assertEqual(len(json.loads(body)['data']), 50)
+
+		def test_post_and_errors(self):
+			payload = json.dumps({"data": {"attributes": {"title": "Gilgit"}}}).encode('utf-8')
+			(_, body), (missing, _) = self.run_requests(self.request('POST', '/api/city', body = payload),
+															self.request('GET', '/api/unknown'))
+			self.assertEqual(json.loads(body)['meta']['status_code'], 201)
+			self.assertEqual(json.loads(body)['data']['attributes']['title'], 'Gilgit')
+			self.assertEqual(missing, 404)
+
+		def test_disconnect(self):
+			messages = [{'type': 'http.request', 'body': b'{"data":', 'more_body': True}, {'type': 'http.disconnect'}]
+			sent = []
+			async def receive():
+				return messages.pop(0)
+			async def send(message):
+				sent.append(message)
+
+			scope = {'type': 'http', 'method': 'POST', 'path': '/api/city', 'query_string': b'', 'root_path': '',
+					'headers': [(b'content-type', b'application/json')]}
+			self.run_requests(self.asgi_app(scope, receive, send))
+			self.assertEqual(sent, [])
+
+		def test_lifespan(self):
+			messages = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+			sent = []
+			async def receive():
+				return messages.pop(0)
+			async def send(message):
+				sent.append(message['type'])
+
+			asgi_app = self.manager.asgi_app()
+			self.assertEqual(asgi_app.max_workers, 15)
+			self.run_requests(asgi_app({'type': 'lifespan'}, receive, send))
+			self.assertEqual(sent, ['lifespan.startup.complete', 'lifespan.shutdown.complete'])
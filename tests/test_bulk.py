@@ -0,0 +1,68 @@
+import unittest
+from flask import json
+from stargate import Manager
+from stargate.resource_info import resource_info
+from app.models import User, City, Location
+from app import init_app, db
+from .data_insertion import insert_pagination_data
+
+class TestBulkOperations(unittest.TestCase):
+		
+		@classmethod
+		def setUpClass(self):
+			self.app = init_app(test=True)
+			self.client = self.app.test_client()
+			self.manager = Manager(self.app, db)
+			self.manager.register_resource(User, methods = ['GET', 'PATCH', 'DELETE'])
+			self.manager.register_resource(Location)
+			self.manager.register_resource(City)
+
+			with self.app.test_request_context():
+				db.create_all()
+			insert_pagination_data(self.app)
+		
+		@classmethod
+		def tearDownClass(self):
+			with self.app.test_request_context():
+				db.session.remove()
+				db.drop_all()
+				resource_info.created_managers.clear()
+
+		def request(self, method, url, data = None):
+			response = getattr(self.client, method)(url, data = json.dumps(data) if data is not None else None,
+													headers={"Content-Type": "application/json"})
+			return response._status_code, json.loads(response.get_data())
+
+		def test_bulk_patch_ids(self):
+			request_data = {"ids": [1, 2, 3], "data": {"attributes": {"age": 30}}}
+			status, data = self.request('patch', '/api/user', request_data)
+			self.assertEqual(status, 200)
+			self.assertEqual(data['num_results'], 3)
+
+			status, data = self.request('get', '/api/user?filters=[{"name":"age","op":"eq","val":30}]')
+			self.assertEqual([user['id'] for user in data['data']], [1, 2, 3])
+
+		def test_bulk_patch_filters(self):
+			request_data = {"filters": [{"name": "id", "op": "gt", "val": 110}], "data": {"attributes": {"phone": "0000"}}}
+			status, data = self.request('patch', '/api/user', request_data)
+			self.assertEqual(data['num_results'], 10)
+
+			status, data = self.request('get', '/api/user/115')
+			self.assertEqual(data['data']['attributes']['phone'], '0000')
+
+		def test_bulk_delete(self):
+			status, data = self.request('delete', '/api/user', {"ids": [50, 51]})
+			self.assertEqual(data['num_results'], 2)
+			
+			status, data = self.request('delete', '/api/user?filters=[{"name":"id","op":"in","val":"50,51,52"}]')
+			self.assertEqual(data['num_results'], 1)
+
+		def test_bulk_requires_target(self):
+			status, data = self.request('patch', '/api/user', {"data": {"attributes": {"age": 1}}})
+			self.assertEqual(status, 400)
+			status, data = self.request('delete', '/api/user')
+			self.assertEqual(status, 400)
+
+		def test_bulk_patch_unknown_field(self):
+			status, data = self.request('patch', '/api/user', {"ids": [1], "data": {"attributes": {"unknown": 1}}})
+			self.assertEqual(status, 400)
@@ -0,0 +1,79 @@
+from . import SimpleTestBase, count_queries
+import datetime
+from flask import json
+from werkzeug.http import http_date
+from app.models import User, City
+from app import db
+
+class TestConditionalRequests(SimpleTestBase):
+
+		@classmethod
+		def setUpClass(self):
+			super(TestConditionalRequests, self).setUpClass()
+
+		def get(self, url, **headers):
+			headers["Content-Type"] = "application/json"
+			with count_queries(self.app) as statements:
+				response = self.client.get(url, headers = headers)
+			return response, statements
+
+		def test_collection_etag(self):
+			response, _ = self.get('/api/user')
+			etag = response.headers.get('ETag')
+			self.assertIsNotNone(etag)
+			response, _ = self.get('/api/user', **{'If-None-Match': etag})
+			self.assertEqual(response._status_code, 304)
+			self.assertEqual(response.get_data(), b'')
+			response, _ = self.get('/api/user?field=name', **{'If-None-Match': etag})
+			self.assertEqual(response._status_code, 200)
+
+		def test_instance_body_etag(self):
+			response, _ = self.get('/api/location/1')
+			self.assertIsNone(response.headers.get('Last-Modified'))
+			response, _ = self.get('/api/location/1', **{'If-None-Match': response.headers['ETag']})
+			self.assertEqual(response._status_code, 304)
+
+		def test_instance_last_modified(self):
+			response = self.client.patch('/api/user/1', data = json.dumps({"data": {"attributes": {"age": 30}}}),
+										headers = {"Content-Type": "application/json"})
+			self.assertEqual(response._status_code, 200)
+
+			response, _ = self.get('/api/user/1')
+			etag = response.headers['ETag']
+			last_modified = response.headers['Last-Modified']
+			self.assertTrue(etag.startswith('W/'))
+
+			response, statements = self.get('/api/user/1', **{'If-None-Match': etag})
+			self.assertEqual(response._status_code, 304)
+			self.assertEqual(len(statements), 1)
+			self.assertIn('updated_at', statements[0])
+			self.assertEqual(response.headers['ETag'], etag)
+
+			response, statements = self.get('/api/user/1', **{'If-Modified-Since': last_modified})
+			self.assertEqual(response._status_code, 304)
+			self.assertEqual(len(statements), 1)
+
+			earlier = http_date(datetime.datetime(2000, 1, 1))
+			response, _ = self.get('/api/user/1', **{'If-Modified-Since': earlier})
+			self.assertEqual(response._status_code, 200)
+			response, _ = self.get('/api/user/1?field=name', **{'If-None-Match': etag})
+			self.assertEqual(response._status_code, 200)
+
+		def test_to_many_relation_body_etag(self):
+			with self.app.test_request_context():
+				db.session.add(City(id = 99, title = "Old Multan"))
+				db.session.commit()
+			response = self.client.patch('/api/city/99', data = json.dumps({"data": {"attributes": {"title": "Multan"}}}),
+										headers = {"Content-Type": "application/json"})
+			self.assertEqual(response._status_code, 200)
+
+			response, _ = self.get('/api/city/99')
+			self.assertIsNone(response.headers.get('Last-Modified'))
+			etag = response.headers['ETag']
+			with self.app.test_request_context():
+				db.session.add(User(name = "New", username = "new_user", password = "secret", email = "new@example.com",
+									city_id = 99, location_id = 1))
+				db.session.commit()
+			response, _ = self.get('/api/city/99', **{'If-None-Match': etag})
+			self.assertEqual(response._status_code, 200)
+			self.assertIn('meta', json.loads(response.get_data())['data']['_embedded']['user'])
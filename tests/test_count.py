@@ -0,0 +1,120 @@
+import unittest
+from . import PaginatedTestBase, count_queries
+from flask import json
+from stargate import Manager
+from stargate.const import CountConst
+from sqlalchemy import bindparam
+from sqlalchemy.exc import DBAPIError
+from stargate.search import COUNT_CACHE, Explain
+from stargate.exception import IllegalArgumentError
+from stargate.resource_info import resource_info
+from app.models import User, City, Location
+from app import init_app, db
+from .data_insertion import insert_pagination_data
+
+class TestCount(PaginatedTestBase):
+		
+		@classmethod
+		def setUpClass(self):
+			super(TestCount, self).setUpClass()
+
+		def get(self, url):
+			response = self.client.get(url, headers={"Content-Type": "application/json"})
+			self.assertEqual(response._status_code, 200)
+			return json.loads(response.get_data())
+
+		def test_skip_count(self):
+			data = self.get('/api/user?count=none&page_number=2&page_size=50')
+			self.assertNotIn('num_results', data)
+			self.assertIsNone(data['links']['last'])
+			self.assertIn('page_number=3', data['links']['next'])
+			self.assertIn('page_number=1', data['links']['prev'])
+
+			data = self.get('/api/user?count=none&page_number=3&page_size=50')
+			self.assertEqual(len(data['data']), 20)
+			self.assertIsNone(data['links']['next'])
+
+		def test_cached_count(self):
+			COUNT_CACHE.clear()
+			data = self.get('/api/user?count=cached&page_number=2')
+			self.assertEqual(data['num_results'], 120)
+			self.assertEqual(len(COUNT_CACHE), 1)
+			
+			data = self.get('/api/user?count=cached&page_number=3')
+			self.assertEqual(data['num_results'], 120)
+			self.assertEqual(len(COUNT_CACHE), 1)
+
+		def test_estimated_count_fallback(self):
+			data = self.get('/api/user?count=estimated&page_number=2')
+			self.assertEqual(data['num_results'], 120)
+
+		def test_estimated_count_in_filter(self):
+			data = self.get('/api/user?count=estimated&page_size=2&filters=[{"name":"id","op":"in","val":"1,2,3"}]')
+			self.assertEqual(data['num_results'], 3)
+
+		def test_explain_expanding_parameters(self):
+			with self.app.test_request_context():
+				query = User.query.filter(User.id.in_(bindparam('ids', expanding = True))).params(ids = [1, 2, 3])
+				with count_queries(self.app, parameters = True) as statements:
+					try:
+						db.session.connection().execute(Explain(query.statement))
+					except DBAPIError:
+						#No EXPLAIN (FORMAT JSON) on sqlite, statement is only checked to be sent expanded
+						pass
+					finally:
+						db.session.rollback()
+			statement, parameters = statements[0]
+			self.assertTrue(statement.startswith('EXPLAIN (FORMAT JSON) SELECT'))
+			self.assertIn('IN (?, ?, ?)', statement)
+			self.assertEqual(tuple(parameters), (1, 2, 3))
+
+		def test_unknown_count_mode(self):
+			response = self.client.get('/api/user?count=abc', headers={"Content-Type": "application/json"})
+			self.assertEqual(response._status_code, 400)
+
+		def test_invalid_count_registration(self):
+			self.assertRaises(IllegalArgumentError, self.manager.register_resource, User, count = 'abc')
+			for ttl in (-1, 0, '60', None):
+				self.assertRaises(IllegalArgumentError, self.manager.register_resource, User, count = 'cached', count_ttl = ttl)
+
+class TestCountDowngrade(unittest.TestCase):
+
+		@classmethod
+		def setUpClass(self):
+			self.app = init_app(test=True)
+			self.client = self.app.test_client()
+			self.manager = Manager(self.app, db)
+			self.manager.register_resource(User, count = CountConst.NONE)
+			self.manager.register_resource(Location)
+			self.manager.register_resource(City, count = CountConst.CACHED)
+
+			with self.app.test_request_context():
+				db.create_all()
+			insert_pagination_data(self.app)
+
+		@classmethod
+		def tearDownClass(self):
+			with self.app.test_request_context():
+				db.session.remove()
+				db.drop_all()
+				resource_info.created_managers.clear()
+
+		def get(self, url):
+			response = self.client.get(url, headers={"Content-Type": "application/json"})
+			self.assertEqual(response._status_code, 200)
+			return json.loads(response.get_data())
+
+		def test_no_upgrade(self):
+			data = self.get('/api/user?count=exact&page_number=2')
+			self.assertNotIn('num_results', data)
+			data = self.get('/api/user?count=cached&page_number=2')
+			self.assertNotIn('num_results', data)
+
+		def test_downgrade_only(self):
+			COUNT_CACHE.clear()
+			#Resource default is kept, total lands in cache
+			data = self.get('/api/city?count=exact&page_number=2')
+			self.assertEqual(data['num_results'], 1)
+			self.assertEqual(len(COUNT_CACHE), 1)
+			data = self.get('/api/city?count=none&page_size=1')
+			self.assertNotIn('num_results', data)
@@ -0,0 +1,54 @@
+from . import PaginatedTestBase
+from flask import json
+from stargate.utils import encode_cursor
+
+class TestCursorPagination(PaginatedTestBase):
+		
+		@classmethod
+		def setUpClass(self):
+			super(TestCursorPagination, self).setUpClass()
+
+		def get(self, url):
+			response = self.client.get(url, headers={"Content-Type": "application/json"})
+			self.assertEqual(response._status_code, 200)
+			return response, json.loads(response.get_data())
+
+		def test_walk_forward_and_back(self):
+			response, data = self.get('/api/user?cursor=&page_size=25')
+			self.assertNotIn('num_results', data)
+			self.assertIsNone(data['links']['prev'])
+			self.assertIn('cursor=', response.headers['rel'])
+
+			pages = [[user['id'] for user in data['data']]]
+			while data['links']['next'] is not None:
+				response, data = self.get(data['links']['next'])
+				pages.append([user['id'] for user in data['data']])
+
+			ids = [pk for page in pages for pk in page]
+			self.assertEqual(ids, list(range(1, 121)))
+			self.assertEqual(len(pages), 5)
+
+			response, data = self.get(data['links']['prev'])
+			self.assertEqual([user['id'] for user in data['data']], pages[-2])
+
+			response, data = self.get(data['links']['next'])
+			self.assertEqual([user['id'] for user in data['data']], pages[-1])
+
+		def test_sorted_cursor(self):
+			response, data = self.get('/api/user?cursor=&page_size=50&sort=-username')
+			usernames = [user['attributes']['username'] for user in data['data']]
+			response, data = self.get(data['links']['next'])
+			usernames += [user['attributes']['username'] for user in data['data']]
+			self.assertEqual(usernames, sorted(usernames, reverse = True))
+			self.assertEqual(len(set(usernames)), 100)
+
+		def test_malformed_cursor(self):
+			response = self.client.get('/api/user?cursor=abc', headers={"Content-Type": "application/json"})
+			self.assertEqual(response._status_code, 400)
+			#Well formed cursor with unknown direction
+			response = self.client.get('/api/user?cursor={0}'.format(encode_cursor('sideways', [10])), headers={"Content-Type": "application/json"})
+			self.assertEqual(response._status_code, 400)
+
+		def test_nullable_sort_cursor(self):
+			response = self.client.get('/api/user?cursor=&sort=phone', headers={"Content-Type": "application/json"})
+			self.assertEqual(response._status_code, 400)
@@ -0,0 +1,59 @@
+from . import PaginatedTestBase, count_queries
+from flask import json
+
+class TestEagerLoading(PaginatedTestBase):
+		
+		@classmethod
+		def setUpClass(self):
+			super(TestEagerLoading, self).setUpClass()
+
+		def count_queries(self, url):
+			with count_queries(self.app) as statements:
+				response = self.client.get(url, headers={"Content-Type": "application/json"})
+			self.assertEqual(response._status_code, 200)
+			self.statements = statements
+			return len(statements), json.loads(response.get_data())
+
+		def test_to_one_constant_queries(self):
+			small, _ = self.count_queries('/api/user?page_size=10&page_number=2')
+			large, data = self.count_queries('/api/user?page_size=50&page_number=2&expand=city')
+			self.assertEqual(small, large)
+			for user in data['data']:
+				self.assertEqual(user['_embedded']['city']['data']['id'], 1)
+
+		def test_dynamic_relation_constant_queries(self):
+			collapsed, data = self.count_queries('/api/city')
+			user = data['data'][0]['_embedded']['user']
+			self.assertEqual(user['meta']['_links']['self'], 'http://localhost:5000/api/city/1/user?page_number=1&page_size=10')
+			self.assertNotIn('data', user)
+
+			expanded, data = self.count_queries('/api/city?expand=user')
+			self.assertEqual(expanded, collapsed + 1)
+			user = data['data'][0]['_embedded']['user']
+			self.assertEqual(len(user['data']), 10)
+			self.assertIsNotNone(user['meta']['_links']['next'])
+
+		def test_nested_expansion_constant_queries(self):
+			small, _ = self.count_queries('/api/user?page_size=10&expand=city')
+			large, data = self.count_queries('/api/user?page_size=50&expand=city(title,location(latitude))')
+			self.assertEqual(large, small + 1)
+			city = data['data'][0]['_embedded']['city']['data']
+			self.assertEqual(list(city['attributes']), ['title'])
+			self.assertEqual(list(city['_embedded']), ['location'])
+			self.assertEqual(list(city['_embedded']['location']['data'][0]['attributes']), ['latitude'])
+
+		def test_sparse_fieldset_columns(self):
+			count, data = self.count_queries('/api/user?page_size=5&page_number=2&field=name,age')
+			select = self.statements[0].split('FROM')[0]
+			self.assertIn('user.name', select)
+			self.assertNotIn('user.password', select)
+			self.assertNotIn('user.pic_url', select)
+			self.assertEqual(list(data['data'][0]['attributes']), ['name', 'age'])
+
+			count, data = self.count_queries('/api/user/3?exclude=password,pic_url&expand=city')
+			select = self.statements[0].split('FROM')[0]
+			self.assertNotIn('user.password', select)
+			self.assertIn('user.email', select)
+			self.assertEqual(count, 3)
+			self.assertEqual(data['data']['_embedded']['city']['data']['id'], 1)
+			self.assertNotIn('password', data['data']['attributes'])
@@ -0,0 +1,76 @@
+import csv
+import io
+import unittest
+from flask import json
+from stargate import Manager
+from stargate.resource_info import resource_info
+from app.models import User, City, Location
+from app import init_app, db
+from .data_insertion import insert_pagination_data
+
+class TestExport(unittest.TestCase):
+		
+		@classmethod
+		def setUpClass(self):
+			self.app = init_app(test=True)
+			self.client = self.app.test_client()
+			self.manager = Manager(self.app, db)
+			self.manager.register_resource(User, export = True)
+			self.manager.register_resource(Location)
+			self.manager.register_resource(City)
+
+			with self.app.test_request_context():
+				db.create_all()
+			insert_pagination_data(self.app)
+		
+		@classmethod
+		def tearDownClass(self):
+			with self.app.test_request_context():
+				db.session.remove()
+				db.drop_all()
+				resource_info.created_managers.clear()
+
+		def get(self, url):
+			response = self.client.get(url)
+			self.assertEqual(response._status_code, 200)
+			return response, response.get_data(as_text=True)
+
+		def test_ndjson_export(self):
+			response, body = self.get('/api/user/export')
+			rows = [json.loads(line) for line in body.splitlines()]
+			self.assertEqual(response.mimetype, 'application/x-ndjson')
+			self.assertNotIn("Content-Length", response.headers)
+			self.assertEqual(len(rows), 120)
+			self.assertEqual(rows[0]['id'], 1)
+			self.assertNotIn('_link', rows[0])
+
+		def test_export_filter_sort_fields(self):
+			filters = json.dumps([{"name": "id", "op": "lt", "val": 11}])
+			response, body = self.get('/api/user/export?filters={0}&sort=-id&field=username'.format(filters))
+			rows = [json.loads(line) for line in body.splitlines()]
+			self.assertEqual([row['id'] for row in rows], list(range(10, 0, -1)))
+			self.assertEqual(set(rows[0].keys()), set(['id', 'username']))
+
+		def test_csv_export(self):
+			response, body = self.get('/api/user/export?format=csv&field=username,phone')
+			rows = list(csv.reader(io.StringIO(body)))
+			self.assertEqual(response.mimetype, 'text/csv')
+			self.assertEqual(rows[0], ['id', 'username', 'phone'])
+			self.assertEqual(rows[1], ['1', 'John910', '923349725618'])
+			self.assertEqual(len(rows), 121)
+
+		def test_unknown_format(self):
+			response = self.client.get('/api/user/export?format=xml')
+			self.assertEqual(response._status_code, 400)
+
+		def test_unknown_sort_field(self):
+			response = self.client.get('/api/user/export?sort=-bogus')
+			self.assertEqual(response._status_code, 400)
+			self.assertEqual(json.loads(response.get_data())['details']['_exception_class'], 'UnknownField')
+
+		def test_export_not_registered(self):
+			#Without export endpoint path is an instance url, looked up as a city with primary key `export`
+			response = self.client.get('/api/city/export', headers={"Content-Type": "application/json"})
+			self.assertEqual(response._status_code, 200)
+			self.assertEqual(response.mimetype, 'application/json')
+			self.assertIsNone(json.loads(response.get_data())['data'])
@@ -60,4 +60,58 @@ class TestFilters(DescriptiveTestBase):
 			data = data['data']
 			for user in data:
 				self.assertIn(user['attributes']['name'], ['Vanguard', 'Wayne John'])		
-				self.assertGreater(user['attributes']['age'], 19)		
\ No newline at end of file
+				self.assertGreater(user['attributes']['age'], 19)		
+		def get_ids(self, filter_list):
+			query_str = json.dumps(filter_list)
+			response = self.client.get('/api/user?page_size=100&filters={0}'.format(query_str), headers={"Content-Type": "application/json"})
+			self.assertEqual(response._status_code, 200)
+			return sorted(user['id'] for user in json.loads(response.get_data())['data'] or [])
+
+		def test_compiled_filter_reuse(self):
+			from stargate.filter import compile_filters, COMPILED_FILTERS
+			first = compile_filters(User, [dict(name="age", op="lt", val=25), dict(name="name", op="in", val="a,b")])
+			size = len(COMPILED_FILTERS)
+			second = compile_filters(User, [dict(name="age", op="lt", val=40), dict(name="name", op="in", val="c,d,e")])
+			self.assertEqual(len(COMPILED_FILTERS), size)
+			self.assertEqual(str(first), str(second))
+
+		def test_compiled_filter_values(self):
+			young = self.get_ids([dict(name="age", op="lt", val=25)])
+			old = self.get_ids([dict(name="age", op="ge", val=25)])
+			self.assertTrue(young and old)
+			self.assertFalse(set(young) & set(old))
+			self.assertEqual(self.get_ids([dict(name="id", op="in", val=[young[0], old[0]])]), sorted([young[0], old[0]]))
+			self.assertEqual(self.get_ids([dict(name="phone", op="eq", val=None)]), self.get_ids([dict(name="phone", op="is_null")]))
+
+		def test_relation_filter(self):
+			titles = [dict(name="city", op="has", val=dict(name="title", op="eq", val=title)) for title in ("Lahore", "Unknown")]
+			self.assertEqual(len(self.get_ids([titles[1]])), 0)
+			self.assertEqual(self.get_ids([titles[0]]), self.get_ids([]))
+
+		def test_unknown_filter_field(self):
+			response = self.client.get('/api/user?filters=[{"name":"unknown","op":"eq","val":1}]', headers={"Content-Type": "application/json"})
+			self.assertEqual(response._status_code, 400)
+
+		def test_statement_cache(self):
+			from stargate.search import STATEMENT_CACHE
+			young = self.get_ids([dict(name="age", op="lt", val=25)])
+			stats = STATEMENT_CACHE.stats()
+			older = self.get_ids([dict(name="age", op="lt", val=40)])
+			self.assertEqual(STATEMENT_CACHE.stats()['shape_hits'], stats['shape_hits'] + 1)
+			self.assertEqual(STATEMENT_CACHE.stats()['shape_misses'], stats['shape_misses'])
+			self.assertGreater(STATEMENT_CACHE.stats()['compiled'], 0)
+			self.assertTrue(set(young) <= set(older))
+			with self.app.test_request_context():
+				self.assertEqual(older, sorted(user.id for user in User.query.filter(User.age < 40)))
+
+		def test_statement_cache_concurrent_record(self):
+			import threading
+			from stargate.search import StatementCache
+			cache = StatementCache()
+			threads = [threading.Thread(target = lambda: [cache.record('shape') for i in range(500)]) for j in range(8)]
+			for thread in threads:
+				thread.start()
+			for thread in threads:
+				thread.join()
+			self.assertEqual(cache.stats()['shape_misses'], 1)
+			self.assertEqual(cache.stats()['shape_hits'], 3999)
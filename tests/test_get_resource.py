@@ -0,0 +1,65 @@
+from . import SimpleTestBase, count_queries
+from sqlalchemy import Column, Integer
+from sqlalchemy.ext.declarative import declarative_base
+from stargate.utils import get_resource, primary_key_identity
+from stargate.exception import ValidationError
+from app.models import User, City
+from app import db
+
+#Test only models are kept off metadata of app, so they are not part of schema of other tests
+Base = declarative_base()
+
+class Membership(Base):
+	"""Composite primary key model used to test identity lookups.
+	"""
+	__tablename__ = 'test_membership'
+	user_id = Column(Integer, primary_key = True)
+	city_id = Column(Integer, primary_key = True)
+
+class TestGetResource(SimpleTestBase):
+		
+		@classmethod
+		def setUpClass(self):
+			super(TestGetResource, self).setUpClass()
+
+		def count_queries(self, func):
+			with count_queries(self.app) as statements:
+				result = func()
+			return len(statements), result
+
+		def test_identity_map_lookup(self):
+			with self.app.test_request_context():
+				first = get_resource(db.session, City, '1')
+				count, second = self.count_queries(lambda: get_resource(db.session, City, 1))
+				self.assertEqual(count, 0)
+				self.assertIs(first, second)
+
+		def test_request_cache(self):
+			with self.app.test_request_context():
+				first = get_resource(db.session, User, 1, cached = True)
+				count, second = self.count_queries(lambda: get_resource(db.session, User, '1', cached = True))
+				self.assertEqual(count, 0)
+				self.assertIs(first, second)
+
+		def test_request_cache_cleared(self):
+			with self.app.test_request_context():
+				first = get_resource(db.session, User, 1, cached = True)
+				db.session.expunge_all()
+				count, second = self.count_queries(lambda: get_resource(db.session, User, 1, cached = True))
+				self.assertEqual(count, 1)
+				self.assertIsNot(first, second)
+				self.assertIn(second, db.session)
+
+				db.session.query(User).filter(User.id == 1).delete(synchronize_session = 'evaluate')
+				self.assertIsNone(get_resource(db.session, User, 1, cached = True))
+				db.session.rollback()
+
+		def test_missing_resource(self):
+			with self.app.test_request_context():
+				self.assertIsNone(get_resource(db.session, City, 9999))
+
+		def test_composite_identity(self):
+			self.assertEqual(primary_key_identity(Membership, None, '1,2'), (1, 2))
+			self.assertEqual(primary_key_identity(Membership, None, (3, '4')), (3, 4))
+			with self.assertRaises(ValidationError):
+				primary_key_identity(Membership, None, '1')
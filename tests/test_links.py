@@ -0,0 +1,54 @@
+import unittest
+from flask import json
+from stargate import Manager
+from stargate.resource_info import resource_info
+from app.models import User, City, Location
+from app import init_app, db
+from .data_insertion import insert_simple_test_data
+
+class TestRelativeLinks(unittest.TestCase):
+		
+		@classmethod
+		def setUpClass(self):
+			self.app = init_app(test=True)
+			self.client = self.app.test_client()
+			self.manager = Manager(self.app, db, relative_links = True)
+			self.manager.register_resource(User)
+			self.manager.register_resource(Location)
+			self.manager.register_resource(City, relative_links = False)
+
+			with self.app.test_request_context():
+				db.create_all()
+			insert_simple_test_data(self.app)
+		
+		@classmethod
+		def tearDownClass(self):
+			with self.app.test_request_context():
+				db.session.remove()
+				db.drop_all()
+				resource_info.created_managers.clear()
+
+		def test_relative_self_link(self):
+			response = self.client.get('/api/user/1', headers={"Content-Type": "application/json"})
+			data = json.loads(response.get_data())
+			self.assertEqual(response.headers['rel'], '/api/user/1')
+			self.assertEqual(data['data']['_link'], '/api/user/1')
+			self.assertEqual(data['data']['_embedded']['city']['meta']['_links']['self'], '/api/user/1/city/1')
+
+		def test_resource_override(self):
+			response = self.client.get('/api/city/1', headers={"Content-Type": "application/json"})
+			data = json.loads(response.get_data())
+			self.assertEqual(data['data']['_link'], 'http://localhost:5000/api/city/1')
+
+		def test_relative_pagination_links(self):
+			response = self.client.get('/api/user?page_size=1', headers={"Content-Type": "application/json"})
+			links = json.loads(response.get_data())['links']
+			self.assertEqual(links['first'], '/api/user?page_number=1&page_size=1')
+			self.assertEqual(links['last'], '/api/user?page_number=1&page_size=1')
+
+			response = self.client.get('/api/user?cursor=', headers={"Content-Type": "application/json"})
+			self.assertTrue(response.headers['rel'].startswith('/api/user?'))
+
+			response = self.client.get('/api/city?page_size=1', headers={"Content-Type": "application/json"})
+			links = json.loads(response.get_data())['links']
+			self.assertEqual(links['first'], 'http://localhost:5000/api/city?page_number=1&page_size=1')
@@ -0,0 +1,37 @@
+from . import TestSetup
+from sqlalchemy.orm.interfaces import MANYTOONE, ONETOMANY
+from stargate.metadata import model_metadata
+from stargate.utils import get_relations, get_related_model, has_field, is_like_list
+from app.models import User, City, Location
+
+class TestMetadata(TestSetup):
+		
+		@classmethod
+		def setUpClass(self):
+			super(TestMetadata, self).setUpClass()
+
+		def test_model_metadata(self):
+			metadata = model_metadata(User)
+			self.assertIs(metadata, model_metadata(User))
+			self.assertEqual(metadata.pk_names, ('id',))
+			self.assertEqual(metadata.relation_names, ('city', 'location'))
+			self.assertEqual(metadata.foreign_keys, frozenset(['city_id', 'location_id']))
+			self.assertIn('username', metadata.columns)
+
+			city = metadata.relations['city']
+			self.assertIs(city.related_model, City)
+			self.assertEqual(city.direction, MANYTOONE)
+			self.assertFalse(city.uselist)
+
+			user = model_metadata(City).relations['user']
+			self.assertEqual(user.direction, ONETOMANY)
+			self.assertEqual(user.lazy, 'dynamic')
+
+		def test_utils_use_metadata(self):
+			self.assertEqual(get_relations(City), ['location', 'user'])
+			self.assertIs(get_related_model(Location, 'city'), City)
+			self.assertIsNone(get_related_model(Location, 'title'))
+			self.assertTrue(has_field(User, 'city'))
+			self.assertFalse(has_field(User, 'unknown'))
+			self.assertTrue(is_like_list(City(), 'location'))
+			self.assertFalse(is_like_list(Location(), 'city'))
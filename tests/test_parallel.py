@@ -0,0 +1,89 @@
+import unittest
+from flask import json
+from stargate import Manager
+from stargate.search import Search, COUNT_CACHE, FAN_OUT
+from stargate.exception import IllegalArgumentError
+from stargate.resource_info import resource_info
+from app.models import User, City, Location
+from app import init_app, db
+from .data_insertion import insert_pagination_data
+
+class TestParallelSearch(unittest.TestCase):
+
+		@classmethod
+		def setUpClass(self):
+			self.app = init_app(test=True)
+			self.client = self.app.test_client()
+			self.manager = Manager(self.app, db)
+			self.manager.register_resource(User, parallel = True)
+			self.manager.register_resource(Location)
+			self.manager.register_resource(City, parallel = True, count = 'cached')
+
+			with self.app.test_request_context():
+				db.create_all()
+			insert_pagination_data(self.app)
+
+			with self.app.test_request_context():
+				for title in ("Karachi", "Quetta", "Multan"):
+					city = City(title = title)
+					db.session.add(city)
+					db.session.flush()
+					db.session.add_all([Location(title = "{0} {1}".format(title, i), city_id = city.id) for i in range(3)])
+				db.session.commit()
+
+		@classmethod
+		def tearDownClass(self):
+			with self.app.test_request_context():
+				db.session.remove()
+				db.drop_all()
+				resource_info.created_managers.clear()
+
+		def get(self, url):
+			response = self.client.get(url, headers={"Content-Type": "application/json"})
+			self.assertEqual(response._status_code, 200)
+			return json.loads(response.get_data())
+
+		def search(self, parallel, **kw):
+			with self.app.test_request_context():
+				search = Search(db.session, City, parallel = parallel)
+				collection = search.search_resource(**kw)
+				locations = [[location.title for location in city.location] for city in collection.items]
+				users = dict((pk, page.total) for pk, page in search.prefetched.get('user', {}).items())
+				return collection.total, locations, users
+
+		def test_matches_serial_search(self):
+			for page_number in (1, 2):
+				kw = dict(page_size = 3, page_number = page_number, expand = 'location,user', sort = [('-', 'id')])
+				self.assertEqual(self.search(True, **kw), self.search(False, **kw))
+
+		def test_expanded_relations(self):
+			COUNT_CACHE.clear()
+			data = self.get('/api/city?page_size=2&page_number=2&expand=location,user')
+			self.assertEqual(data['num_results'], 4)
+			self.assertEqual(len(COUNT_CACHE), 1)
+			titles = [[location['attributes']['title'] for location in city['_embedded']['location']['data']]
+						for city in data['data']]
+			self.assertEqual(titles, [["Quetta 0", "Quetta 1", "Quetta 2"], ["Multan 0", "Multan 1", "Multan 2"]])
+
+			data = self.get('/api/city?page_size=1&expand=user')
+			user = data['data'][0]['_embedded']['user']
+			self.assertEqual(len(user['data']), 10)
+			self.assertEqual(user['meta']['_links']['last'], 'http://localhost:5000/api/city/1/user?page_number=12&page_size=10')
+
+		def test_count(self):
+			data = self.get('/api/user?page_number=3&page_size=50')
+			self.assertEqual(data['num_results'], 120)
+			self.assertEqual(len(data['data']), 20)
+			data = self.get('/api/user?page_size=200&expand=city')
+			self.assertEqual(data['num_results'], 120)
+
+		def test_pool_capacity(self):
+			config = dict((key, self.app.config.get(key)) for key in ('SQLALCHEMY_POOL_SIZE', 'SQLALCHEMY_MAX_OVERFLOW'))
+			try:
+				self.app.config.update(SQLALCHEMY_POOL_SIZE = 10, SQLALCHEMY_MAX_OVERFLOW = 5)
+				self.assertEqual(self.manager.asgi_app().max_workers, 15 - FAN_OUT.max_workers)
+				self.app.config.update(SQLALCHEMY_POOL_SIZE = 5, SQLALCHEMY_MAX_OVERFLOW = FAN_OUT.max_workers - 5)
+				self.assertRaises(IllegalArgumentError, self.manager.register_resource, Location, parallel = True,
+									endpoint = 'parallel_location')
+			finally:
+				self.app.config.update(config)
@@ -67,4 +67,11 @@ class TestPatch(DescriptiveTestBase):
 
 				get_response = json.loads(get_response.get_data())
 				data = get_response['data']
-				self.assertEqual(data.pop('id'), id_tobe_compared)
\ No newline at end of file
+				self.assertEqual(data.pop('id'), id_tobe_compared)
+		def test_missing_related_ids(self):
+			request_data = { "data": { "_embedded": {"user": {"data":[{"id": 1}, {"id": 9998}, {"id": 9999}] }}}}
+			
+			response = self.client.patch('/api/city/2', data = json.dumps(request_data), headers={"Content-Type": "application/json"})
+			response_doc = json.loads(response.get_data())
+			self.assertEqual(response._status_code, 404)
+			self.assertEqual(response_doc['details']['primary_key'], [9998, 9999])
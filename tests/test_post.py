@@ -1,8 +1,13 @@
-from . import TestSetup
+import unittest
+from . import TestSetup, count_queries
 from flask import json
 import datetime
 from app.models import User, City, Location
-from app import db
+from app import init_app, db
+from stargate import Manager
+from stargate.exception import IllegalArgumentError
+from stargate.resource_info import resource_info
+from .data_insertion import insert_simple_test_data
 
 class TestPost(TestSetup):
 		
@@ -172,4 +177,94 @@ class TestPost(TestSetup):
 			response_obj.pop('_embedded')
 			response_obj.pop('_link')
 
-			self.assertDictEqual(related, response_obj)			
\ No newline at end of file
+			self.assertDictEqual(related, response_obj)			
+		def test_bulk_post(self):
+			request_data = {"data": {"attributes": {"title": "Karachi", "latitude": 72.8176, "longitude": 79.2998}}}
+			response = self.client.post('/api/city', data = json.dumps(request_data), headers={"Content-Type": "application/json"})
+			city_id = json.loads(response.get_data())['data']['id']
+
+			request_data = {
+							"data": [{
+								"attributes": {
+									"title": "Block {0}".format(i),
+									"latitude": 72.8176,
+									"longitude": 79.2998,
+									"parent_id": -1
+									},
+								"_embedded":{
+									"city":{'data':{"id": city_id}}
+								}
+							} for i in range(5)]
+						}
+
+			with count_queries(self.app) as statements:
+				response = self.client.post('/api/location', data = json.dumps(request_data), headers={"Content-Type": "application/json"})
+
+			response_doc = json.loads(response.get_data())
+			self.assertEqual(response_doc['meta']['status_code'], 201)
+			self.assertEqual(len(response_doc['data']), 5)
+			self.assertEqual(len([s for s in statements if s.startswith('SELECT')]), 1)
+
+			for i, created in enumerate(response_doc['data']):
+				get_response = self.client.get(created['_link'] + '?expand=city', headers={"Content-Type": "application/json"})
+				location = json.loads(get_response.get_data())['data']
+				self.assertEqual(location['id'], created['id'])
+				self.assertEqual(location['attributes']['title'], "Block {0}".format(i))
+				self.assertEqual(location['_embedded']['city']['data']['id'], city_id)
+
+		def test_minimal_post(self):
+			request_data = {"data": {"attributes": {"title": "Quetta", "latitude": 30.18, "longitude": 66.97}}}
+			with count_queries(self.app) as statements:
+				response = self.client.post('/api/city', data = json.dumps(request_data), 
+											headers={"Content-Type": "application/json", "Prefer": "return=minimal"})
+
+			self.assertEqual(response.headers.get('Preference-Applied'), 'return=minimal')
+			self.assertEqual([s for s in statements if s.startswith('SELECT')], [])
+			data = json.loads(response.get_data())['data']
+			self.assertNotIn('_embedded', data)
+			self.assertEqual(data['attributes'], request_data['data']['attributes'])
+
+			get_response = self.client.get(data['_link'], headers={"Content-Type": "application/json"})
+			self.assertEqual(json.loads(get_response.get_data())['data']['attributes']['title'], "Quetta")
+
+			request_data = {"data": {"attributes": {"title": "Sukkur"}}}
+			response = self.client.patch(data['_link'], data = json.dumps(request_data), 
+										headers={"Content-Type": "application/json", "Prefer": "return=minimal"})
+			patched = json.loads(response.get_data())['data']
+			self.assertEqual(patched['id'], data['id'])
+			self.assertEqual(patched['attributes'], {"title": "Sukkur"})
+
+			response = self.client.patch(data['_link'], data = json.dumps(request_data), 
+										headers={"Content-Type": "application/json", "Prefer": "return=representation"})
+			self.assertIn('_embedded', json.loads(response.get_data())['data'])
+
+		def test_invalid_write_return_registration(self):
+			self.assertRaises(IllegalArgumentError, self.manager.register_resource, City, write_return = 'none')
+
+class TestMinimalExclude(unittest.TestCase):
+
+		@classmethod
+		def setUpClass(self):
+			self.app = init_app(test=True)
+			self.client = self.app.test_client()
+			self.manager = Manager(self.app, db)
+			self.manager.register_resource(User, methods = ['GET', 'PATCH'], exclude = ['password'])
+			self.manager.register_resource(Location)
+			self.manager.register_resource(City)
+			with self.app.test_request_context():
+				db.create_all()
+			insert_simple_test_data(self.app)
+
+		@classmethod
+		def tearDownClass(self):
+			with self.app.test_request_context():
+				db.session.remove()
+				db.drop_all()
+				resource_info.created_managers.clear()
+
+		def test_minimal_respects_exclude(self):
+			request_data = {"data": {"attributes": {"password": "p2", "age": 31}}}
+			response = self.client.patch('/api/user/1', data = json.dumps(request_data),
+										headers={"Content-Type": "application/json", "Prefer": "return=minimal"})
+			self.assertEqual(response._status_code, 200)
+			self.assertEqual(json.loads(response.get_data())['data']['attributes'], {"age": 31})
@@ -0,0 +1,130 @@
+import unittest
+from flask import json
+from stargate import Manager
+from stargate.exception import IllegalArgumentError, ValidationError
+from stargate.search import statement_timeout
+from stargate.resource_info import resource_info
+from app.models import User, City, Location
+from app import init_app, db
+from .data_insertion import insert_pagination_data
+
+class RecordingConnection():
+	"""Connection stand-in of a server enforced dialect recording executed statements.
+	"""
+	def __init__(self, dialect):
+		self.dialect = type('Dialect', (), {'name': dialect})
+		self.statements = []
+		self.invalidated = False
+
+	def execute(self, statement):
+		self.statements.append(str(statement))
+
+	def invalidate(self):
+		self.invalidated = True
+
+class RecordingSession():
+	def __init__(self, dialect):
+		self.bind = RecordingConnection(dialect)
+
+	def connection(self, mapper = None):
+		return self.bind
+
+class TestQueryLimits(unittest.TestCase):
+
+		@classmethod
+		def setUpClass(self):
+			self.app = init_app(test=True)
+			self.client = self.app.test_client()
+			self.manager = Manager(self.app, db)
+			self.manager.register_resource(User, statement_timeout = 1e-6)
+			self.manager.register_resource(Location, statement_timeout = 30)
+			self.manager.register_resource(City, max_filter_depth = 1, max_offset = 1)
+
+			with self.app.test_request_context():
+				db.create_all()
+			insert_pagination_data(self.app)
+			with self.app.test_request_context():
+				db.session.add_all([City(title = "Karachi"), City(title = "Quetta")])
+				db.session.commit()
+
+		@classmethod
+		def tearDownClass(self):
+			with self.app.test_request_context():
+				db.session.remove()
+				db.drop_all()
+				resource_info.created_managers.clear()
+
+		def get(self, url):
+			response = self.client.get(url, headers={"Content-Type": "application/json"})
+			return response._status_code, json.loads(response.get_data())
+
+		def test_statement_timeout(self):
+			status, data = self.get('/api/user?page_size=100')
+			self.assertEqual(status, 503)
+			self.assertEqual(data['details']['_exception_class'], 'StatementTimeout')
+			self.assertEqual(data['details']['limit'], 'statement_timeout')
+
+			status, data = self.get('/api/user/1')
+			self.assertEqual(status, 200)
+			status, data = self.get('/api/location')
+			self.assertEqual(status, 200)
+			self.assertEqual(len(data['data']), 1)
+
+		def test_filter_depth(self):
+			flat = json.dumps([{"name": "title", "op": "eq", "val": "Lahore"}])
+			status, data = self.get('/api/city?filters={0}'.format(flat))
+			self.assertEqual(status, 200)
+			self.assertEqual(len(data['data']), 1)
+
+			nested = json.dumps([{"or": [{"name": "title", "op": "eq", "val": "Lahore"},
+										{"name": "title", "op": "eq", "val": "Quetta"}]}])
+			status, data = self.get('/api/city?filters={0}'.format(nested))
+			self.assertEqual(status, 422)
+			self.assertEqual(data['details']['_exception_class'], 'QueryLimitExceeded')
+			self.assertEqual(data['details']['limit'], 'max_filter_depth')
+
+			related = json.dumps([{"name": "location", "op": "any", "val": {"name": "title", "op": "eq", "val": "Lahore"}}])
+			status, data = self.get('/api/city?filters={0}'.format(related))
+			self.assertEqual(status, 422)
+			self.assertEqual(data['details']['limit'], 'max_filter_depth')
+
+		def test_relation_filter_depth(self):
+			from stargate.filter import filter_depth
+			has = lambda relation, val: {"name": relation, "op": "has", "val": val}
+			plain = {"name": "title", "op": "eq", "val": "Lahore"}
+			self.assertEqual(filter_depth([plain]), 1)
+			self.assertEqual(filter_depth([has("city", plain)]), 2)
+			self.assertEqual(filter_depth([has("city", has("location", {"or": [plain, plain]}))]), 4)
+
+			for malformed in ([{"or": 5}], [has("location", [plain])]):
+				status, data = self.get('/api/city?filters={0}'.format(json.dumps(malformed)))
+				self.assertEqual(status, 400)
+
+		def test_max_offset(self):
+			status, data = self.get('/api/city?page_size=1&page_number=2')
+			self.assertEqual(status, 200)
+			self.assertEqual(data['data'][0]['attributes']['title'], "Karachi")
+			status, data = self.get('/api/city?page_size=1&page_number=3')
+			self.assertEqual(status, 422)
+			self.assertEqual(data['details']['limit'], 'max_offset')
+			status, data = self.get('/api/city?page_size=1&cursor=')
+			self.assertEqual(status, 200)
+
+		def test_timeout_reset(self):
+			for dialect in ('postgresql', 'mysql'):
+				session = RecordingSession(dialect)
+				with statement_timeout(session, 5):
+					pass
+				self.assertEqual(len(session.bind.statements), 2)
+				self.assertIn('DEFAULT', session.bind.statements[1])
+
+				session = RecordingSession(dialect)
+				with self.assertRaises(ValidationError):
+					with statement_timeout(session, 5):
+						raise ValidationError(msg = "Bad filter value")
+				self.assertEqual(len(session.bind.statements), 1)
+				self.assertEqual(session.bind.invalidated, dialect == 'mysql')
+
+		def test_invalid_limits(self):
+			self.assertRaises(IllegalArgumentError, self.manager.register_resource, City, statement_timeout = 0)
+			self.assertRaises(IllegalArgumentError, self.manager.register_resource, City, max_offset = -1)
@@ -0,0 +1,107 @@
+import os
+import tempfile
+import unittest
+from flask import json
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+from stargate import Manager
+from stargate.routing import ReadReplicas
+from stargate.cache import RESPONSE_CACHES
+from stargate.resource_info import resource_info
+from app.models import User, City, Location
+from app import init_app, db
+from .data_insertion import insert_simple_test_data
+
+class TestReadReplicas(unittest.TestCase):
+
+		@classmethod
+		def setUpClass(self):
+			self.app = init_app(test=True)
+			self.client = self.app.test_client()
+			#Replicas hold a city of their own, so responses tell which database served them
+			self.paths = [tempfile.mkstemp(suffix = '.db')[1] for i in range(2)]
+			self.engines = [create_engine('sqlite:///{0}'.format(path), poolclass = QueuePool) for path in self.paths]
+			for index, engine in enumerate(self.engines):
+				db.Model.metadata.create_all(engine)
+				session = Session(bind = engine)
+				session.add(City(id = 1, title = "Replica {0}".format(index)))
+				session.commit()
+				session.close()
+
+			self.manager = Manager(self.app, db, read_binds = self.engines)
+			self.manager.register_resource(User)
+			self.manager.register_resource(Location, cache = True)
+			self.manager.register_resource(City, methods = ['GET', 'PATCH'], export = True)
+
+			with self.app.test_request_context():
+				db.create_all()
+			insert_simple_test_data(self.app)
+
+		@classmethod
+		def tearDownClass(self):
+			with self.app.test_request_context():
+				db.session.remove()
+				db.drop_all()
+				resource_info.created_managers.clear()
+			for engine, path in zip(self.engines, self.paths):
+				engine.dispose()
+				os.remove(path)
+
+		def title(self, client, url = '/api/city/1', **headers):
+			headers["Content-Type"] = "application/json"
+			response = client.get(url, headers = headers)
+			self.assertEqual(response._status_code, 200)
+			data = json.loads(response.get_data())['data']
+			return (data[0] if isinstance(data, list) else data)['attributes']['title']
+
+		def test_round_robin(self):
+			titles = set(self.title(self.app.test_client()) for i in range(4))
+			self.assertEqual(titles, set(["Replica 0", "Replica 1"]))
+			titles = set(self.title(self.app.test_client(), '/api/city') for i in range(4))
+			self.assertEqual(titles, set(["Replica 0", "Replica 1"]))
+			export = self.app.test_client().get('/api/city/export')
+			self.assertTrue(json.loads(export.get_data().splitlines()[0])['title'].startswith("Replica"))
+
+		def test_primary_header(self):
+			self.assertEqual(self.title(self.app.test_client(), **{'X-Read-Primary': '1'}), "Lahore")
+
+		def test_read_your_writes(self):
+			client = self.app.test_client()
+			response = client.patch('/api/city/1', data = json.dumps({"data": {"attributes": {"title": "Lahore"}}}),
+									headers = {"Content-Type": "application/json"})
+			self.assertEqual(response._status_code, 200)
+			self.assertEqual(self.title(client), "Lahore")
+			self.assertTrue(self.title(self.app.test_client()).startswith("Replica"))
+
+		def test_response_cache(self):
+			get = lambda client, **headers: client.get('/api/location', headers = headers)
+			client = self.app.test_client()
+			response = client.patch('/api/city/1', data = json.dumps({"data": {"attributes": {"title": "Lahore"}}}),
+									headers = {"Content-Type": "application/json"})
+			self.assertEqual(response._status_code, 200)
+
+			#Replicas have no locations, responses read from them within pin window are not stored
+			for i in range(2):
+				response = get(self.app.test_client())
+				self.assertEqual(response.headers['X-Cache'], 'MISS')
+				self.assertFalse(json.loads(response.get_data())['data'])
+			response = get(client)
+			self.assertEqual(response.headers['X-Cache'], 'BYPASS')
+			self.assertTrue(json.loads(response.get_data())['data'])
+			self.assertEqual(get(self.app.test_client(), **{'X-Read-Primary': '1'}).headers['X-Cache'], 'BYPASS')
+
+			cache = RESPONSE_CACHES[Location]
+			cache.backend.set(cache.invalidated_key, '0')
+			self.assertEqual(get(self.app.test_client()).headers['X-Cache'], 'MISS')
+			self.assertEqual(get(self.app.test_client()).headers['X-Cache'], 'HIT')
+			self.assertEqual(get(client).headers['X-Cache'], 'BYPASS')
+
+		def test_least_loaded(self):
+			replicas = ReadReplicas(self.engines, strategy = 'least_loaded')
+			connection = self.engines[0].connect()
+			try:
+				self.assertEqual([replicas.choose() for i in range(3)], [self.engines[1]] * 3)
+			finally:
+				connection.close()
+			self.assertRaises(ValueError, ReadReplicas, self.engines, strategy = 'random')
@@ -0,0 +1,40 @@
+from . import SimpleTestBase
+from flask import json
+import datetime
+from stargate import representation
+
+class TestRepresentation(SimpleTestBase):
+		
+		@classmethod
+		def setUpClass(self):
+			super(TestRepresentation, self).setUpClass()
+
+		def test_compact_response(self):
+			response = self.client.get('/api/user/1', headers={"Content-Type": "application/json"})
+			body = response.get_data(as_text = True)
+			self.assertNotIn('\n', body)
+			self.assertNotIn('": ', body)
+
+		def test_pretty_response(self):
+			response = self.client.get('/api/user/1?pretty=1', headers={"Content-Type": "application/json"})
+			body = response.get_data(as_text = True)
+			self.assertIn('\n    "data": {', body)
+
+		def test_datetime_encoding(self):
+			document = {'date': datetime.date(2017, 2, 24), 'time': datetime.datetime(2017, 2, 24, 17, 35, 24, 223328),
+						'interval': datetime.timedelta(minutes = 1)}
+			expected = {'date': '2017-02-24', 'time': '2017-02-24T17:35:24.223328', 'interval': 60.0}
+			
+			self.assertEqual(json.loads(representation.dumps(document)), expected)
+			self.assertEqual(json.loads(representation.dumps(document, pretty = True)), expected)
+			
+			fast_backend = representation.orjson
+			representation.orjson = None
+			try:
+				self.assertEqual(json.loads(representation.dumps(document)), expected)
+			finally:
+				representation.orjson = fast_backend
+			
+			response = self.client.get('/api/user/1', headers={"Content-Type": "application/json"})
+			created_at = json.loads(response.get_data())['data']['attributes']['created_at']
+			self.assertRegex(created_at, r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}')
@@ -0,0 +1,126 @@
+import unittest
+from flask import json
+from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy.orm import relationship
+from sqlalchemy.ext.declarative import declarative_base
+from stargate import Manager
+from stargate.cache import KeyValueCache
+from stargate.exception import IllegalArgumentError
+from stargate.resource_info import resource_info
+from app.models import User, City, Location
+from app import init_app, db
+from .data_insertion import insert_pagination_data
+
+#Test only models are kept off metadata of app, so they are not part of schema of other tests
+Base = declarative_base()
+
+class Continent(Base):
+	"""Models related only through `Country`, used to test transitive invalidation.
+	"""
+	__tablename__ = 'test_continent'
+	id = Column(Integer, primary_key = True)
+	name = Column(String(64))
+
+class Country(Base):
+	__tablename__ = 'test_country'
+	id = Column(Integer, primary_key = True)
+	continent_id = Column(Integer, ForeignKey('test_continent.id'))
+	continent = relationship('Continent')
+
+class Capital(Base):
+	__tablename__ = 'test_capital'
+	id = Column(Integer, primary_key = True)
+	country_id = Column(Integer, ForeignKey('test_country.id'))
+	country = relationship('Country')
+
+class DictClient():
+	"""Redis compatible stand-in keeping values in a dict."""
+	def __init__(self):
+		self.data = {}
+
+	def get(self, key):
+		value = self.data.get(key)
+		return value.encode('utf-8') if value is not None else None
+
+	def set(self, key, value, ex = None):
+		self.data[key] = value
+
+	def delete(self, key):
+		self.data.pop(key, None)
+
+class TestResponseCache(unittest.TestCase):
+
+		@classmethod
+		def setUpClass(self):
+			self.app = init_app(test=True)
+			self.client = self.app.test_client()
+			self.store = DictClient()
+			self.manager = Manager(self.app, db)
+			self.manager.register_resource(User, methods = ['GET', 'PATCH'])
+			self.manager.register_resource(City, methods = ['GET', 'PATCH'], cache = True)
+			self.manager.register_resource(Location, cache = KeyValueCache(self.store))
+			self.manager.register_resource(Continent, methods = ['GET', 'PATCH'])
+			self.manager.register_resource(Country)
+			self.manager.register_resource(Capital, cache = True)
+
+			with self.app.test_request_context():
+				db.create_all()
+				Base.metadata.create_all(db.engine)
+				continent = Continent(id = 1, name = "Asia")
+				country = Country(id = 1, continent = continent)
+				db.session.add(Capital(id = 1, country = country))
+				db.session.commit()
+			insert_pagination_data(self.app)
+
+		@classmethod
+		def tearDownClass(self):
+			with self.app.test_request_context():
+				db.session.remove()
+				Base.metadata.drop_all(db.engine)
+				db.drop_all()
+				resource_info.created_managers.clear()
+
+		def get(self, url):
+			response = self.client.get(url, headers={"Content-Type": "application/json"})
+			return response.headers.get('X-Cache'), json.loads(response.get_data())
+
+		def patch(self, url, data):
+			response = self.client.patch(url, data = json.dumps(data), headers={"Content-Type": "application/json"})
+			self.assertEqual(response._status_code, 200)
+
+		def test_cache_hit(self):
+			status, first = self.get('/api/city/1?field=title&expand=location')
+			self.assertEqual(status, 'MISS')
+			status, second = self.get('/api/city/1?expand=location&field=title')
+			self.assertEqual(status, 'HIT')
+			self.assertEqual(first, second)
+			status, data = self.get('/api/city/1?field=latitude')
+			self.assertEqual(status, 'MISS')
+			self.assertIsNone(self.get('/api/user/1')[0])
+
+		def test_invalidate_on_write(self):
+			self.get('/api/city/1')
+			self.assertEqual(self.get('/api/city/1')[0], 'HIT')
+			self.patch('/api/city/1', {"data": {"attributes": {"title": "Karachi"}}})
+			status, data = self.get('/api/city/1')
+			self.assertEqual(status, 'MISS')
+			self.assertEqual(data['data']['attributes']['title'], 'Karachi')
+
+		def test_invalidate_related(self):
+			self.get('/api/location?page_size=5')
+			self.assertEqual(self.get('/api/location?page_size=5')[0], 'HIT')
+			self.assertTrue(self.store.data)
+			self.patch('/api/user/1', {"data": {"attributes": {"age": 40}}})
+			self.assertEqual(self.get('/api/location?page_size=5')[0], 'MISS')
+			self.assertEqual(self.get('/api/city')[0], 'MISS')
+
+		def test_invalidate_transitively(self):
+			status, data = self.get('/api/test_capital/1?expand=country(continent(name))')
+			self.assertEqual(self.get('/api/test_capital/1?expand=country(continent(name))')[0], 'HIT')
+			self.patch('/api/test_continent/1', {"data": {"attributes": {"name": "Eurasia"}}})
+			status, data = self.get('/api/test_capital/1?expand=country(continent(name))')
+			self.assertEqual(status, 'MISS')
+			self.assertIn('Eurasia', json.dumps(data))
+
+		def test_invalid_cache_registration(self):
+			self.assertRaises(IllegalArgumentError, self.manager.register_resource, User, cache = 'redis')
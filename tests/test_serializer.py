@@ -0,0 +1,44 @@
+from . import DescriptiveTestBase
+from flask import json
+from app.models import User
+from stargate.resource_info import resource_info
+from stargate.utils import parse_expansions, EXPANSION
+from stargate.exception import ValidationError
+from stargate.const import ResourceInfoConst
+
+class TestSerializer(DescriptiveTestBase):
+		
+		@classmethod
+		def setUpClass(self):
+			super(TestSerializer, self).setUpClass()
+
+		def test_plan_reuse(self):
+			serializer = resource_info(ResourceInfoConst.SERIALIZER, User)
+			plan = serializer.compile(User, fields = ['name', 'age'], expand = 'city')
+			self.assertIs(plan, serializer.compile(User, fields = ['age', 'name'], expand = 'city'))
+			self.assertCountEqual(plan.columns, ['id', 'name', 'age'])
+			self.assertIsNot(plan, serializer.compile(User, fields = ['name']))
+
+		def test_plan_eviction(self):
+			serializer = resource_info(ResourceInfoConst.SERIALIZER, User)
+			for i in range(serializer._plans.maxsize + 10):
+				serializer.compile(User, fields = ['name', 'field{0}'.format(i)])
+			self.assertEqual(len(serializer._plans), serializer._plans.maxsize)
+
+		def test_exclude_removes_attributes(self):
+			response = self.client.get('/api/user?exclude=name,age', headers={"Content-Type": "application/json"})
+			data = json.loads(response.get_data())
+			for key in data['data']:
+				self.assertNotIn('name', key['attributes'])
+				self.assertNotIn('age', key['attributes'])
+				self.assertIn('id', key)
+
+		def test_parse_expansions(self):
+			expansions = parse_expansions(User, 'location(latitude, longitude),city(title,location(latitude)),unknown')
+			self.assertEqual(expansions, (EXPANSION('city', frozenset(['title']), (EXPANSION('location', frozenset(['latitude']), ()),)),
+										EXPANSION('location', frozenset(['latitude', 'longitude']), ())))
+			self.assertIs(expansions, parse_expansions(User, 'location(latitude, longitude),city(title,location(latitude)),unknown'))
+			self.assertIs(expansions, parse_expansions(User, expansions))
+			self.assertEqual(parse_expansions(User, 'city(location)'), (EXPANSION('city', None, (EXPANSION('location', None, ()),)),))
+			with self.assertRaises(ValidationError):
+				parse_expansions(User, 'city(location(title)')
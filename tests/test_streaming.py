@@ -0,0 +1,55 @@
+from . import PaginatedTestBase
+from flask import json
+from unittest import mock
+from stargate.search import StreamedPagination
+from stargate.exception import StatementTimeout
+
+class TestStreaming(PaginatedTestBase):
+		
+		@classmethod
+		def setUpClass(self):
+			super(TestStreaming, self).setUpClass()
+
+		def get(self, url):
+			response = self.client.get(url, headers={"Content-Type": "application/json"})
+			self.assertEqual(response._status_code, 200)
+			return response, json.loads(response.get_data())
+
+		def test_streamed_page_matches_buffered(self):
+			buffered_response, buffered = self.get('/api/user?page_number=2&page_size=50&expand=city')
+			streamed_response, streamed = self.get('/api/user?page_number=2&page_size=50&expand=city&stream=1')
+			
+			self.assertNotIn("Content-Length", streamed_response.headers)
+			self.assertEqual(streamed_response.headers['rel'], buffered_response.headers['rel'])
+			self.assertEqual(streamed['num_results'], buffered['num_results'])
+			self.assertEqual(streamed['links']['next'].replace('&stream=1', ''), buffered['links']['next'])
+			self.assertEqual(streamed['data'], buffered['data'])
+
+		def test_streamed_uncounted_page(self):
+			response, data = self.get('/api/user?page_number=3&page_size=50&stream=1&count=none')
+			self.assertEqual(len(data['data']), 20)
+			self.assertNotIn('num_results', data)
+			self.assertIsNone(data['links']['next'])
+
+		def test_streamed_dynamic_relation(self):
+			response, data = self.get('/api/city?expand=user&stream=1')
+			self.assertEqual(len(data['data'][0]['_embedded']['user']['data']), 10)
+
+		def test_empty_streamed_page(self):
+			response, data = self.get('/api/user?page_number=30&stream=1')
+			self.assertEqual(data['data'], [])
+
+		def test_error_in_first_chunk(self):
+			def failing_chunks(pagination, chunk_size = None):
+				raise StatementTimeout("Chunk query timed out")
+				yield
+			with mock.patch.object(StreamedPagination, 'chunks', failing_chunks):
+				response = self.client.get('/api/user?stream=1', headers={"Content-Type": "application/json"})
+			self.assertEqual(response._status_code, 503)
+
+		def test_pretty_not_streamed(self):
+			response = self.client.get('/api/user?page_size=5&stream=1&pretty=1', headers={"Content-Type": "application/json"})
+			self.assertEqual(response._status_code, 200)
+			self.assertIn("Content-Length", response.headers)
+			self.assertIn(b'\n', response.get_data())
+			self.assertEqual(len(json.loads(response.get_data())['data']), 5)